@@ -0,0 +1,8 @@
+"""Benchmarks for the application's hot paths.
+
+Run against a scratch database, e.g.::
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks --leads 100000
+
+See :mod:`benchmarks.suite` for the scenarios and the result format.
+"""
@@ -0,0 +1,85 @@
+"""Command line entry point: ``python -m benchmarks``."""
+
+import argparse
+import json
+import sys
+
+from getconnects_admin import create_app
+from getconnects_admin.models import Base, SessionLocal, engine
+from getconnects_admin.services.query_plan_service import analyze
+from getconnects_admin.services.seed_service import seed_dataset
+
+from .suite import SCENARIOS, run_benchmarks
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--leads", type=int, default=10_000, help="synthetic leads to seed"
+    )
+    parser.add_argument(
+        "--notification-logs",
+        type=int,
+        default=None,
+        help="synthetic logs (default: 2 per lead)",
+    )
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--campaigns-per-client", type=int, default=5)
+    parser.add_argument("--lead-types", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-seed", action="store_true", help="benchmark the existing data"
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--sync-campaigns", type=int, default=500)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="repeat to select several",
+    )
+    parser.add_argument(
+        "--output", default="-", help="JSON file to write ('-' for stdout)"
+    )
+    args = parser.parse_args(argv)
+
+    app = create_app("benchmark")
+    dataset = {}
+    if not args.no_seed:
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            dataset = seed_dataset(
+                db,
+                clients=args.clients,
+                campaigns_per_client=args.campaigns_per_client,
+                lead_types=args.lead_types,
+                leads=args.leads,
+                notification_logs=(
+                    args.leads * 2
+                    if args.notification_logs is None
+                    else args.notification_logs
+                ),
+                seed=args.seed,
+            )
+            analyze(db)
+        finally:
+            db.close()
+    result = run_benchmarks(
+        app,
+        iterations=args.iterations,
+        names=args.scenario,
+        dataset=dataset,
+        sync_campaign_count=args.sync_campaigns,
+    )
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output == "-":
+        sys.stdout.write(text + "\n")
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,727 @@
+"""Webhook load test: ``python -m benchmarks.loadtest``.
+
+Drives ``POST /webhooks/justcall/<token>`` at a fixed request rate with
+generated or recorded JustCall payloads while the JustCall SMS and Gmail
+APIs are replaced by local stub servers with configurable latency and error
+rates. The report answers the questions that matter when sizing gunicorn
+workers: how many leads per second are sustained, what the tail latency is,
+how close the database connection pool gets to exhaustion and how many
+notifications are waiting on the providers.
+
+The load is open-loop: request *i* is due at ``start + i / rate`` and its
+latency is measured from that moment, so a server that falls behind shows
+up as growing latency instead of silently lowering the request rate.
+
+By default the app is served in this process by a WSGI server with a fixed
+number of threads, the equivalent of one gthread worker. To measure a real
+deployment, start gunicorn against the same ``DATABASE_URL`` with the
+provider URLs pointing at the stubs and pass ``--target``::
+
+    JUSTCALL_API_URL=http://127.0.0.1:8701 \\
+    GMAIL_API_URL=http://127.0.0.1:8702 \\
+    GOOGLE_OAUTH_URL=http://127.0.0.1:8702 JUSTCALL_API_KEY=stub \\
+    JUSTCALL_API_SECRET=stub GMAIL_API_CLIENT_ID=stub \\
+    GMAIL_API_CLIENT_SECRET=stub GMAIL_API_REFRESH_TOKEN=stub \\
+    GMAIL_API_FROM_EMAIL=loadtest@example.com \\
+    gunicorn -w 4 --threads 8 wsgi:app
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000 \\
+        --sms-port 8701 --gmail-port 8702 --rate 50 --duration 60
+
+Pool statistics are only available for the in-process server; on
+PostgreSQL the number of open database connections is sampled for either
+target. Use a scratch database.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.pool import NullPool, QueuePool
+from werkzeug.serving import BaseWSGIServer
+
+from getconnects_admin.models import DATABASE_URL, engine
+from getconnects_admin.models.campaign import Campaign
+from getconnects_admin.models.client import Client
+from getconnects_admin.models.justcall_webhook import JustCallWebhook
+from getconnects_admin.models.justcall_webhook_payload import (
+    JustCallWebhookPayload,
+)
+from getconnects_admin.models.lead import Lead
+from getconnects_admin.models.notification_log import NotificationLog
+from getconnects_admin.services import email_service, sms_service
+from getconnects_admin.services.helpers import get_session
+from getconnects_admin.services.seed_service import justcall_webhook_payload
+
+from .suite import percentile
+
+# Credentials the app needs before it attempts to notify anyone
+STUB_CREDENTIALS = {
+    "JUSTCALL_API_KEY": "stub",
+    "JUSTCALL_API_SECRET": "stub",
+    "GMAIL_API_CLIENT_ID": "stub",
+    "GMAIL_API_CLIENT_SECRET": "stub",
+    "GMAIL_API_REFRESH_TOKEN": "stub",
+    "GMAIL_API_FROM_EMAIL": "loadtest@example.com",
+}
+
+
+class StubAPI:
+    """Local HTTP server answering every POST the way the provider would.
+
+    Each request waits *latency* seconds plus up to *jitter* more and fails
+    with a 500 with probability *error_rate*. ``/token`` returns an OAuth
+    access token so one stub can stand in for both Google endpoints.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        port: int = 0,
+        seed: int = 0,
+    ):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, body = stub._respond(self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, path: str) -> tuple[int, dict]:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            number = self.requests
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if failed:
+            return 500, {"error": {"message": f"{self.name} stub error"}}
+        if path.rstrip("/").endswith("/token"):
+            return 200, {"access_token": "stub-token", "expires_in": 3600}
+        return 200, {"id": f"{self.name}-{number}"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+    def start(self) -> "StubAPI":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name=f"stub-{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubAPI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling requests on a fixed number of threads.
+
+    Unlike werkzeug's threaded server, which starts a thread per request,
+    this caps concurrency the way a gunicorn gthread worker does.
+    """
+
+    def __init__(self, host: str, port: int, app, threads: int):
+        super().__init__(host, port, app)
+        self._pool = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="wsgi"
+        )
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self._pool.shutdown(wait=True)
+        super().server_close()
+
+
+@contextmanager
+def serve_app(app, threads: int):
+    """Serve *app* on a free local port and yield its base URL."""
+
+    server = PooledWSGIServer("127.0.0.1", 0, app, threads)
+    thread = threading.Thread(
+        target=server.serve_forever, name="wsgi-server", daemon=True
+    )
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def notification_stubs(sms: StubAPI, gmail: StubAPI):
+    """Point this process's SMS and Gmail helpers at the stubs."""
+
+    urls = {
+        (sms_service, "JUSTCALL_SMS_URL"): f"{sms.url}/v2.1/texts/new",
+        (email_service, "GMAIL_TOKEN_URL"): f"{gmail.url}/token",
+        (
+            email_service,
+            "GMAIL_SEND_URL",
+        ): f"{gmail.url}/gmail/v1/users/me/messages/send",
+    }
+    saved_urls = {key: getattr(*key) for key in urls}
+    saved_env = {key: os.environ.get(key) for key in STUB_CREDENTIALS}
+    for (module, name), url in urls.items():
+        setattr(module, name, url)
+    os.environ.update(STUB_CREDENTIALS)
+    try:
+        yield
+    finally:
+        for (module, name), url in saved_urls.items():
+            setattr(module, name, url)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def prepare_target(session, run: str) -> tuple[str, str]:
+    """Create a client, campaign and lead webhook.
+
+    Returns the webhook token and the campaign name.
+
+    The client has a phone number and an email address, so every lead sent
+    to the campaign triggers both notifications.
+    """
+
+    client = Client(
+        company_name=f"Load Test {run}",
+        contact_name="Load Test",
+        contact_email="loadtest-client@example.com",
+        phone="+15550000000",
+    )
+    session.add(client)
+    session.flush()
+    campaign_name = f"Load Test {run}"
+    session.add(
+        Campaign(
+            id=f"loadtest-{run}",
+            campaign_name=campaign_name,
+            status="active",
+            client_id=client.id,
+        )
+    )
+    token = f"loadtest{run}"
+    session.add(JustCallWebhook(token=token, target_type="lead"))
+    session.commit()
+    return token, campaign_name
+
+
+def load_payloads(path: str) -> list:
+    """Read recorded webhook bodies from a JSON lines file, one per line."""
+
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def recorded_payloads(session, token: str, limit: int = 1000) -> list:
+    """Return the latest bodies the webhook *token* received, oldest first."""
+
+    rows = (
+        session.query(JustCallWebhookPayload.payload)
+        .join(
+            JustCallWebhook,
+            JustCallWebhook.id == JustCallWebhookPayload.token_id,
+        )
+        .filter(JustCallWebhook.token == token)
+        .order_by(JustCallWebhookPayload.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [payload for (payload,) in reversed(rows)]
+
+
+def unique_payload(body, seq: int):
+    """Return a copy of *body* tagged with *seq*.
+
+    The webhook ignores a body identical to one of the last 20 it received,
+    so replayed bodies get an extra key in each item's ``data``, which the
+    lead import does not read.
+    """
+
+    body = deepcopy(body)
+    for item in body if isinstance(body, list) else [body]:
+        if isinstance(item, dict) and isinstance(item.get("data"), dict):
+            item["data"]["loadtest_seq"] = seq
+    return body
+
+
+class Sampler:
+    """Call each probe every *interval* seconds on a background thread."""
+
+    def __init__(
+        self, probes: dict[str, Callable[[], float]], interval: float = 0.25
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.samples: dict[str, list[float]] = {name: [] for name in probes}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name="loadtest-sampler", daemon=True
+        )
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            for name, probe in self.probes.items():
+                try:
+                    self.samples[name].append(probe())
+                except Exception:
+                    pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, name: str) -> dict | None:
+        values = self.samples.get(name)
+        if not values:
+            return None
+        return {
+            "peak": max(values),
+            "mean": round(sum(values) / len(values), 2),
+        }
+
+
+def drive(
+    send: Callable[[int], int],
+    rate: float,
+    duration: float,
+    concurrency: int = 64,
+    outstanding: list | None = None,
+) -> dict:
+    """Call ``send(i)`` *rate* times per second for *duration* seconds.
+
+    ``send`` returns the HTTP status; exceptions are counted by type. If
+    given, ``outstanding[0]`` tracks requests that are due but unanswered.
+    """
+
+    total = max(1, int(rate * duration))
+    outstanding = outstanding if outstanding is not None else [0]
+    statuses: Counter = Counter()
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def _one(i: int, due: float) -> None:
+        try:
+            status = str(send(i))
+        except Exception as exc:
+            status = type(exc).__name__
+        elapsed = time.perf_counter() - due
+        with lock:
+            statuses[status] += 1
+            latencies.append(elapsed)
+            outstanding[0] -= 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="loadtest"
+    ) as pool:
+        for i in range(total):
+            due = start + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with lock:
+                outstanding[0] += 1
+            pool.submit(_one, i, due)
+    elapsed = time.perf_counter() - start
+    return {
+        "sent": total,
+        "elapsed": elapsed,
+        "statuses": dict(statuses),
+        "latencies": latencies,
+    }
+
+
+def _pool_probes() -> dict[str, Callable[[], float]]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "pool_checked_out": pool.checkedout,
+        "pool_overflow": lambda: max(0, pool.overflow()),
+    }
+
+
+def _connection_probe() -> tuple[dict[str, Callable[[], float]], object]:
+    if not DATABASE_URL.startswith("postgresql"):
+        return {}, None
+    # A separate unpooled engine so sampling does not occupy the app's pool
+    monitor = create_engine(DATABASE_URL, poolclass=NullPool)
+
+    def _count() -> float:
+        with monitor.connect() as conn:
+            return conn.execute(
+                text(
+                    "SELECT count(*) FROM pg_stat_activity"
+                    " WHERE datname = current_database()"
+                )
+            ).scalar()
+
+    return {"db_connections": _count}, monitor
+
+
+def _max_lead_id() -> int:
+    with get_session() as session:
+        return session.query(func.max(Lead.id)).scalar() or 0
+
+
+def run_loadtest(
+    target: str,
+    token: str,
+    payload_for: Callable[[int], object],
+    sms: StubAPI,
+    gmail: StubAPI,
+    rate: float = 20.0,
+    duration: float = 30.0,
+    concurrency: int = 64,
+    sample_interval: float = 0.25,
+    in_process: bool = True,
+) -> dict:
+    """Load *target* and return the report.
+
+    The provider stubs must already be running.
+    """
+
+    url = f"{target.rstrip('/')}/webhooks/justcall/{token}"
+    local = threading.local()
+
+    def send(i: int) -> int:
+        if not hasattr(local, "http"):
+            local.http = requests.Session()
+        return local.http.post(
+            url, json=payload_for(i), timeout=60
+        ).status_code
+
+    first_lead = _max_lead_id()
+    outstanding = [0]
+    probes = {
+        "notification_backlog": lambda: sms.in_flight + gmail.in_flight,
+        "client_backlog": lambda: outstanding[0],
+    }
+    pool_probes = _pool_probes() if in_process else {}
+    connection_probes, monitor = _connection_probe()
+    probes.update(pool_probes)
+    probes.update(connection_probes)
+    try:
+        with Sampler(probes, sample_interval) as sampler:
+            result = drive(send, rate, duration, concurrency, outstanding)
+    finally:
+        if monitor is not None:
+            monitor.dispose()
+
+    with get_session() as session:
+        leads = (
+            session.query(func.count(Lead.id))
+            .filter(Lead.id > first_lead)
+            .scalar()
+        )
+        outcomes = (
+            session.query(
+                NotificationLog.channel, NotificationLog.status, func.count()
+            )
+            .filter(NotificationLog.lead_id > first_lead)
+            .group_by(NotificationLog.channel, NotificationLog.status)
+            .all()
+        )
+
+    elapsed = result["elapsed"]
+    latencies = result["latencies"]
+    db_pool = None
+    if pool_probes:
+        checked_out = sampler.samples["pool_checked_out"]
+        size = engine.pool.size()
+        db_pool = {
+            "size": size,
+            "peak_checked_out": max(checked_out, default=0),
+            "mean_checked_out": (
+                round(sum(checked_out) / len(checked_out), 2)
+                if checked_out
+                else 0
+            ),
+            "peak_overflow": max(sampler.samples["pool_overflow"], default=0),
+            # Share of samples in which every pooled connection was in use
+            "saturated_pct": (
+                round(
+                    100
+                    * sum(1 for n in checked_out if n >= size)
+                    / len(checked_out),
+                    1,
+                )
+                if checked_out
+                else 0.0
+            ),
+        }
+    return {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "database": engine.dialect.name,
+        "target": "in-process" if in_process else target,
+        "config": {
+            "rate": rate,
+            "duration": duration,
+            "concurrency": concurrency,
+            "sms": {
+                "latency": sms.latency,
+                "jitter": sms.jitter,
+                "error_rate": sms.error_rate,
+            },
+            "gmail": {
+                "latency": gmail.latency,
+                "jitter": gmail.jitter,
+                "error_rate": gmail.error_rate,
+            },
+        },
+        "requests": {
+            "sent": result["sent"],
+            "statuses": result["statuses"],
+            "per_sec": round(len(latencies) / elapsed, 2) if elapsed else None,
+        },
+        "leads": {
+            "created": leads,
+            "per_sec": round(leads / elapsed, 2) if elapsed else None,
+        },
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 1)
+            for name, pct in (
+                ("p50", 50),
+                ("p95", 95),
+                ("p99", 99),
+                ("max", 100),
+            )
+        },
+        "db_pool": db_pool,
+        "db_connections": sampler.summary("db_connections"),
+        "client_backlog": sampler.summary("client_backlog"),
+        "notifications": {
+            "backlog": sampler.summary("notification_backlog"),
+            "outcomes": {
+                f"{channel}:{status}": count
+                for channel, status, count in outcomes
+            },
+            "sms": sms.stats(),
+            "gmail": gmail.stats(),
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Load test the JustCall lead webhook."
+    )
+    parser.add_argument(
+        "--target",
+        help="base URL of a running server (default: serve in process)",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=8, help="in-process server threads"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=20.0, help="webhook requests per second"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="seconds of load"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=64, help="max requests in flight"
+    )
+    parser.add_argument(
+        "--token", help="existing lead webhook token (default: create one)"
+    )
+    parser.add_argument(
+        "--campaign", help="campaign name for generated payloads with --token"
+    )
+    parser.add_argument(
+        "--payloads",
+        help="JSON lines file of recorded webhook bodies to replay",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="TOKEN",
+        help="replay bodies recorded for this webhook",
+    )
+    parser.add_argument("--replay-limit", type=int, default=1000)
+    parser.add_argument(
+        "--sms-latency", type=float, default=0.2, help="seconds"
+    )
+    parser.add_argument("--sms-error-rate", type=float, default=0.0)
+    parser.add_argument("--sms-port", type=int, default=0)
+    parser.add_argument(
+        "--gmail-latency", type=float, default=0.3, help="seconds"
+    )
+    parser.add_argument("--gmail-error-rate", type=float, default=0.0)
+    parser.add_argument("--gmail-port", type=int, default=0)
+    parser.add_argument(
+        "--jitter", type=float, default=0.1, help="extra random stub latency"
+    )
+    parser.add_argument("--sample-interval", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", default="-", help="JSON file to write ('-' for stdout)"
+    )
+    args = parser.parse_args(argv)
+
+    from getconnects_admin import create_app
+    from getconnects_admin.models import Base
+
+    app = create_app("benchmark")
+    # One access log line per request would drown the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    Base.metadata.create_all(bind=engine)
+    run = str(time.time_ns())
+    with app.app_context():
+        recorded = None
+        if args.payloads:
+            recorded = load_payloads(args.payloads)
+        elif args.replay:
+            with get_session() as session:
+                recorded = recorded_payloads(
+                    session, args.replay, args.replay_limit
+                )
+        if recorded is not None and not recorded:
+            parser.error("no recorded payloads to replay")
+        if args.token:
+            token, campaign_name = args.token, args.campaign
+        else:
+            with get_session() as session:
+                token, campaign_name = prepare_target(session, run)
+
+        def payload_for(i: int):
+            if recorded:
+                return unique_payload(recorded[i % len(recorded)], i)
+            return justcall_webhook_payload(int(run) + i, campaign_name)
+
+        sms = StubAPI(
+            "sms",
+            args.sms_latency,
+            args.jitter,
+            args.sms_error_rate,
+            args.sms_port,
+            args.seed,
+        )
+        gmail = StubAPI(
+            "gmail",
+            args.gmail_latency,
+            args.jitter,
+            args.gmail_error_rate,
+            args.gmail_port,
+            args.seed,
+        )
+        with sms, gmail:
+            options = dict(
+                payload_for=payload_for,
+                sms=sms,
+                gmail=gmail,
+                rate=args.rate,
+                duration=args.duration,
+                concurrency=args.concurrency,
+                sample_interval=args.sample_interval,
+            )
+            if args.target:
+                result = run_loadtest(
+                    args.target, token, in_process=False, **options
+                )
+            else:
+                with (
+                    notification_stubs(sms, gmail),
+                    serve_app(app, args.threads) as url,
+                ):
+                    result = run_loadtest(url, token, **options)
+                result["config"]["threads"] = args.threads
+
+    text_out = json.dumps(result, indent=2, sort_keys=True)
+    if args.output == "-":
+        sys.stdout.write(text_out + "\n")
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(text_out + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
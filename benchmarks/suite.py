@@ -0,0 +1,244 @@
+"""Benchmark scenarios and measurement.
+
+Every scenario in :data:`SCENARIOS` prepares whatever it needs and returns
+an ``op(i)`` callable that performs one operation. :func:`run_benchmarks`
+calls each op ``iterations`` times after a warm-up call and records
+throughput, latency percentiles and the number of SQL statements per
+operation. HTTP scenarios go through the Flask test client, so they cover
+routing, templates and serialisation but not the WSGI server. The JustCall
+SMS and Gmail APIs are replaced by the local stubs of :mod:`.loadtest`, so
+scenarios that create leads never notify anyone.
+
+The result is a JSON-serialisable dict::
+
+    {
+      "generated_at": "...", "database": "sqlite", "dataset": {...},
+      "results": {
+        "get_stats": {"iterations": 50, "ops_per_sec": 812.3, "mean_ms": 1.2,
+                      "p50_ms": 1.1, "p99_ms": 2.9, "queries_per_op": 4.0},
+        ...
+      },
+      "stubs": {"sms": {"requests": 51, "errors": 0, "peak_in_flight": 1}, ...}
+    }
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import event
+
+from getconnects_admin.models import engine
+from getconnects_admin.models.justcall_webhook import JustCallWebhook
+from getconnects_admin.services.helpers import get_session
+from getconnects_admin.services.justcall_service import sync_campaigns
+from getconnects_admin.services.lead_service import (
+    create_lead,
+    list_leads_paginated,
+)
+from getconnects_admin.services.query_plan_service import (
+    PlanParams,
+    plan_params,
+)
+from getconnects_admin.services.seed_service import (
+    justcall_campaigns,
+    justcall_webhook_payload,
+)
+from getconnects_admin.services.stats_service import get_stats
+
+
+@dataclass
+class BenchContext:
+    app: object
+    params: PlanParams
+    sync_campaigns: int = 500
+    client: object = field(default=None)
+
+    def http_client(self):
+        if self.client is None:
+            self.client = self.app.test_client()
+            # An unknown user has no permissions, which the testing
+            # configuration treats as unrestricted
+            with self.client.session_transaction() as sess:
+                sess["uid"] = "benchmark"
+        return self.client
+
+
+# name -> setup(ctx) returning op(i)
+SCENARIOS: dict[str, Callable[[BenchContext], Callable[[int], None]]] = {}
+
+
+def scenario(name: str):
+    def _decorator(setup):
+        SCENARIOS[name] = setup
+        return setup
+
+    return _decorator
+
+
+def _expect(resp, status: int) -> None:
+    if resp.status_code != status:
+        raise RuntimeError(f"{resp.request.path} returned {resp.status_code}")
+
+
+@scenario("webhook_ingest")
+def _webhook_ingest(ctx: BenchContext):
+    token = f"bench{time.time_ns()}"
+    with get_session() as session:
+        session.add(JustCallWebhook(token=token, target_type="lead"))
+        session.commit()
+    client = ctx.app.test_client()
+    run = time.time_ns()
+
+    def op(i: int) -> None:
+        payload = justcall_webhook_payload(run + i)
+        _expect(client.post(f"/webhooks/justcall/{token}", json=payload), 204)
+
+    return op
+
+
+@scenario("create_lead")
+def _create_lead(ctx: BenchContext):
+    def op(i: int) -> None:
+        with ctx.app.test_request_context():
+            ok, err = create_lead(
+                name=f"Bench Lead {i}",
+                phone=f"+1555{i:07d}",
+                email=f"bench{i}@example.com",
+                campaign_id=ctx.params.campaign_id,
+                lead_type=ctx.params.lead_type,
+                flash_error=False,
+            )
+        if not ok:
+            raise RuntimeError(err)
+
+    return op
+
+
+@scenario("list_leads_paginated")
+def _list_leads_paginated(ctx: BenchContext):
+    def op(i: int) -> None:
+        list_leads_paginated(page=1 + i % 5, client_id=ctx.params.client_id)
+
+    return op
+
+
+@scenario("api_search")
+def _api_search(ctx: BenchContext):
+    client = ctx.http_client()
+
+    def op(i: int) -> None:
+        _expect(client.get(f"/api/search?q=Lead {i % 100}"), 200)
+
+    return op
+
+
+@scenario("leads_report")
+def _leads_report(ctx: BenchContext):
+    client = ctx.http_client()
+
+    def op(i: int) -> None:
+        _expect(
+            client.get(
+                f"/leads/report?client_id={ctx.params.client_id or ''}"
+            ),
+            200,
+        )
+
+    return op
+
+
+@scenario("get_stats")
+def _get_stats(ctx: BenchContext):
+    return lambda i: get_stats()
+
+
+@scenario("sync_campaigns")
+def _sync_campaigns(ctx: BenchContext):
+    # The first sync creates everything; measured runs rename one campaign
+    # each, the steady state of the periodic sync
+    data = justcall_campaigns(ctx.sync_campaigns)
+    sync_campaigns(data)
+
+    def op(i: int) -> None:
+        data[i % len(data)]["name"] = f"Campaign {i % len(data)} rev {i}"
+        sync_campaigns(data)
+
+    return op
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of *values*."""
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def measure(op: Callable[[int], None], iterations: int) -> dict:
+    queries = 0
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal queries
+        queries += 1
+
+    op(-1)  # warm-up: caches, compiled statements, connection
+    durations = []
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        for i in range(iterations):
+            start = time.perf_counter()
+            op(i)
+            durations.append(time.perf_counter() - start)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    total = sum(durations)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 2) if total else None,
+        "mean_ms": round(total / iterations * 1000, 3),
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "queries_per_op": round(queries / iterations, 2),
+    }
+
+
+def run_benchmarks(
+    app,
+    iterations: int = 50,
+    names: list[str] | None = None,
+    dataset: dict | None = None,
+    sync_campaign_count: int = 500,
+) -> dict:
+    """Run the selected scenarios (all by default) against the current data."""
+
+    from .loadtest import StubAPI, notification_stubs
+
+    sms, gmail = StubAPI("sms"), StubAPI("gmail")
+    with app.app_context(), sms, gmail, notification_stubs(sms, gmail):
+        with get_session() as session:
+            params = plan_params(session)
+        ctx = BenchContext(
+            app=app, params=params, sync_campaigns=sync_campaign_count
+        )
+        results = {}
+        for name in names or SCENARIOS:
+            results[name] = measure(SCENARIOS[name](ctx), iterations)
+    return {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "database": engine.dialect.name,
+        "dataset": dataset or {},
+        "results": results,
+        "stubs": {"sms": sms.stats(), "gmail": gmail.stats()},
+    }
+
+
+__all__ = [
+    "SCENARIOS",
+    "BenchContext",
+    "measure",
+    "percentile",
+    "run_benchmarks",
+    "scenario",
+]
@@ -76,3 +76,7 @@ if not existing_tables:
 else:
     print(f'Database already has {len(existing_tables)} tables, skipping schema creation')
 "
+
+# Bring existing databases up to date (new columns, tables and indexes).
+# Every migration is idempotent, so this is a no-op on a fresh schema.
+FLASK_APP=wsgi.py flask migrate
@@ -6,6 +6,7 @@ from flask_wtf import CSRFProtect
 from flask_caching import Cache
 import click
 import hashlib
+import os
 
 from .models import Base, SessionLocal, engine
 from .models.user import User
@@ -25,12 +26,32 @@ from .routes import (
     pages_bp,
     webhooks_bp,
     notifications_bp,
+    metrics_bp,
 )
+from .services.auth_decorators import bump_permissions_version, has_permission
 from .services.auth_service import supabase_config, verify_supabase_token
 from .services.client_service import create_client, list_clients
 from .services.campaign_service import list_campaigns
 from .services.stats_service import get_stats, get_leads_by_campaign
 from .services.lead_service import create_lead, list_leads
+from .services.retention_service import apply_retention_policies
+from .services.migration_service import apply_migrations, pending_migrations
+from .services.query_plan_service import (
+    analyze,
+    compare_plans,
+    explain_queries,
+    load_baseline,
+    save_baseline,
+)
+from .services.seed_service import seed_dataset
+from .services.instrumentation_service import init_app as init_instrumentation
+from .services.metrics_service import init_app as init_metrics
+from .services.profiling_service import init_app as init_profiling
+from .services.job_service import schedule_periodic
+from .services.justcall_service import (
+    CAMPAIGN_SYNC_JOB,
+    scheduled_campaign_sync,
+)
 from .config import config, ProductionConfig
 
 csrf = CSRFProtect()
@@ -65,19 +86,16 @@ def create_app(config_name: str | None = None) -> Flask:
         raise RuntimeError("ENCRYPTION_KEY must be set in production")
     app.secret_key = secret_key
     csrf.init_app(app)
-    cache.init_app(app, config={"CACHE_TYPE": "simple"})
+    cache.init_app(app)
     db.init_app(app)
+    init_instrumentation(app)
+    init_metrics(app)
+    init_profiling(app)
 
     @app.context_processor
     def inject_permissions():
         """Expose ``has_permission`` to templates."""
 
-        def has_permission(path: str) -> bool:
-            if session.get("is_superuser"):
-                return True
-            perms = session.get("permissions") or []
-            return any(path.startswith(p) or p.startswith(path) for p in perms)
-
         def md5_hash(text: str) -> str:
             """Generate MD5 hash for Gravatar URLs."""
             return hashlib.md5(text.encode('utf-8')).hexdigest()
@@ -92,6 +110,7 @@ def create_app(config_name: str | None = None) -> Flask:
         "auth.login_page",
         "auth.session_login",
         "auth.logout",
+        "metrics.metrics",
         "static",
     }
 
@@ -120,8 +139,16 @@ def create_app(config_name: str | None = None) -> Flask:
     app.register_blueprint(root_bp)
     app.register_blueprint(webhooks_bp)
     app.register_blueprint(notifications_bp)
+    app.register_blueprint(metrics_bp)
     csrf.exempt(webhooks_bp)
 
+    sync_interval = app.config.get("CAMPAIGN_SYNC_INTERVAL")
+    if sync_interval and not app.config.get("TESTING"):
+        # Each worker schedules syncs; the job lock lets only one run at a time
+        schedule_periodic(
+            app, CAMPAIGN_SYNC_JOB, sync_interval, scheduled_campaign_sync
+        )
+
     @app.errorhandler(403)
     def forbidden(_):  # pragma: no cover - template rendering
         return render_template("403.html"), 403
@@ -153,11 +180,134 @@ def create_app(config_name: str | None = None) -> Flask:
                 db.add(user)
             user.is_staff = True
             user.is_superuser = True
+            bump_permissions_version(user)
             db.commit()
             click.echo(f"User {email} promoted to superuser")
         finally:
             db.close()
 
+    @app.cli.command("migrate")
+    @click.option(
+        "--dry-run",
+        is_flag=True,
+        help="List pending migrations without applying them",
+    )
+    def migrate(dry_run: bool) -> None:
+        """Apply outstanding schema migrations."""
+
+        migrations = pending_migrations() if dry_run else apply_migrations()
+        if not migrations:
+            click.echo("Schema is up to date")
+        for migration in migrations:
+            verb = "pending" if dry_run else "applied"
+            click.echo(f"{migration.version} {verb}: {migration.description}")
+
+    @app.cli.command("check-query-plans")
+    @click.option(
+        "--baseline",
+        default="query_plans.json",
+        show_default=True,
+        type=click.Path(dir_okay=False),
+        help="JSON file holding the recorded plans",
+    )
+    @click.option(
+        "--update-baseline",
+        is_flag=True,
+        help="Record the current plans as the baseline",
+    )
+    @click.option(
+        "--seed-leads",
+        default=0,
+        type=int,
+        help="Insert this many synthetic leads first (scratch databases only)",
+    )
+    @click.option(
+        "--force",
+        is_flag=True,
+        help="Seed even if leads exist or the configuration is production",
+    )
+    @click.option(
+        "--cost-threshold",
+        default=0.5,
+        show_default=True,
+        type=float,
+        help="Allowed relative cost increase over the baseline",
+    )
+    def check_query_plans(
+        baseline: str,
+        update_baseline: bool,
+        seed_leads: int,
+        force: bool,
+        cost_threshold: float,
+    ) -> None:
+        """Explain the canonical queries and fail on plan regressions."""
+
+        if seed_leads:
+            db = SessionLocal()
+            try:
+                production = (
+                    cfg_class is ProductionConfig
+                    or os.getenv("FLASK_CONFIG") == "production"
+                )
+                if production and not force:
+                    raise click.ClickException(
+                        "Refusing to seed leads with the production "
+                        "configuration; pass --force to override"
+                    )
+                if not force and db.query(Lead.id).first() is not None:
+                    raise click.ClickException(
+                        "Refusing to seed leads into a database that already "
+                        "has leads; pass --force to override"
+                    )
+                seed_dataset(db, leads=seed_leads)
+                analyze(db)
+            finally:
+                db.close()
+        dialect, reports = explain_queries()
+        for report in reports:
+            cost = "" if report.cost is None else f" cost={report.cost:.1f}"
+            scans = ", ".join(report.scans) or "none"
+            click.echo(f"{report.name}: full scans: {scans}{cost}")
+        if update_baseline:
+            save_baseline(baseline, dialect, reports)
+            click.echo(f"Baseline for {dialect} written to {baseline}")
+            return
+        regressions = compare_plans(
+            reports, load_baseline(baseline, dialect), cost_threshold
+        )
+        if regressions:
+            raise click.ClickException(
+                "Query plan regressions:\n" + "\n".join(regressions)
+            )
+
+    @app.cli.command("archive-logs")
+    @click.option(
+        "--dry-run",
+        is_flag=True,
+        help=(
+            "Report rows and bytes that would be reclaimed without "
+            "changing anything"
+        ),
+    )
+    def archive_logs(dry_run: bool) -> None:
+        """Archive and delete expired notification logs and payloads."""
+
+        for result in apply_retention_policies(app.config, dry_run=dry_run):
+            if dry_run:
+                click.echo(
+                    f"{result.table}: {result.rows} rows "
+                    f"({result.bytes} bytes) older than "
+                    f"{result.cutoff:%Y-%m-%d} would be archived"
+                )
+            elif result.rows:
+                click.echo(
+                    f"{result.table}: archived {result.rows} rows "
+                    f"({result.bytes} bytes) to {result.archive_path}, "
+                    f"deleted {result.deleted}"
+                )
+            else:
+                click.echo(f"{result.table}: nothing to archive")
+
     return app
 
 
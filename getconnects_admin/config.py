@@ -1,15 +1,116 @@
 import os
 
 
+# SQL statements allowed per request for the busiest pages; list pages must
+# not grow with the number of rows shown. POSTs to the leads page create a
+# lead and record its notifications.
+DEFAULT_QUERY_BUDGETS = {
+    "dashboard.dashboard_index": 10,
+    "pages.leads_page": 25,
+    "pages.leads_report": 5,
+    "pages.search": 15,
+    "clients.clients_page": 5,
+    "campaigns.campaigns_page": 5,
+    "notifications.notifications_index": 5,
+}
+
+
+def _parse_budgets(value: str) -> dict[str, int]:
+    """Parse ``"endpoint=count,endpoint=count"`` into a dict."""
+
+    budgets = {}
+    for item in value.split(","):
+        endpoint, _, count = item.partition("=")
+        if endpoint.strip() and count.strip():
+            budgets[endpoint.strip()] = int(count)
+    return budgets
+
+
 class BaseConfig:
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
+    # Fail requests over their query budget instead of logging a warning
+    QUERY_BUDGET_STRICT = False
 
     def __init__(self) -> None:
         self.SECRET_KEY = os.getenv("FLASK_SECRET_KEY")
         self.ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
         # Logo URL for sidebar and navigation
+        # Shared cache backend; use e.g. "RedisCache" with CACHE_REDIS_URL so
+        # invalidation stamps are visible to every worker process.
+        self.CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+        self.CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
         self.LOGO_URL = os.getenv("LOGO_URL") or "/static/assets/images/logo.png"
+        # Retention for high-volume log tables (see ``flask archive-logs``)
+        self.NOTIFICATION_LOG_RETENTION_DAYS = int(
+            os.getenv("NOTIFICATION_LOG_RETENTION_DAYS", "90")
+        )
+        self.WEBHOOK_PAYLOAD_RETENTION_DAYS = int(
+            os.getenv("WEBHOOK_PAYLOAD_RETENTION_DAYS", "30")
+        )
+        self.RETENTION_ARCHIVE_DIR = os.getenv(
+            "RETENTION_ARCHIVE_DIR", "archives"
+        )
+        self.RETENTION_BATCH_SIZE = int(
+            os.getenv("RETENTION_BATCH_SIZE", "1000")
+        )
+        # Background jobs: worker threads per process and periodic campaign
+        # sync interval in seconds (0 disables the scheduler)
+        self.JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+        self.CAMPAIGN_SYNC_INTERVAL = int(
+            os.getenv("CAMPAIGN_SYNC_INTERVAL", "0")
+        )
+        self.CAMPAIGN_SYNC_LOCK_SECONDS = int(
+            os.getenv("CAMPAIGN_SYNC_LOCK_SECONDS", "900")
+        )
+        # Leads updated per transaction when a campaign changes client
+        self.LEAD_REASSIGN_CHUNK_SIZE = int(
+            os.getenv("LEAD_REASSIGN_CHUNK_SIZE", "5000")
+        )
+        self.LEAD_BULK_BATCH_SIZE = int(
+            os.getenv("LEAD_BULK_BATCH_SIZE", "1000")
+        )
+        self.CLIENT_DELETE_BATCH_SIZE = int(
+            os.getenv("CLIENT_DELETE_BATCH_SIZE", "1000")
+        )
+        self.CLIENT_DELETE_INLINE_LEADS = int(
+            os.getenv("CLIENT_DELETE_INLINE_LEADS", "5000")
+        )
+        # Seconds the JustCall number inventory is served before revalidating
+        self.JUSTCALL_NUMBERS_TTL = int(
+            os.getenv("JUSTCALL_NUMBERS_TTL", "300")
+        )
+        # Seconds the Gmail API connection status is shown before rechecking
+        self.GMAIL_STATUS_TTL = int(os.getenv("GMAIL_STATUS_TTL", "60"))
+        # Per-request instrumentation: Server-Timing header, slow-query log
+        # threshold and SQL statements allowed per endpoint, e.g.
+        # QUERY_BUDGETS="pages.leads_page=12,stats.stats_index=8"
+        self.SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in {
+            "1",
+            "true",
+            "yes",
+        }
+        self.SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+        # Bearer token required by ``/metrics``. Without one the endpoint is
+        # hidden unless METRICS_PUBLIC explicitly opens it (e.g. behind a
+        # proxy that already restricts the path)
+        self.METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+        self.METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() in {
+            "1",
+            "true",
+            "yes",
+        }
+        # On-demand request profiles: directory, how many to keep and the
+        # stack sampling interval in seconds
+        self.PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+        self.PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+        self.PROFILE_SAMPLE_INTERVAL = float(
+            os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005")
+        )
+        self.QUERY_BUDGETS = {
+            **DEFAULT_QUERY_BUDGETS,
+            **_parse_budgets(os.getenv("QUERY_BUDGETS", "")),
+        }
 
 
 class DevelopmentConfig(BaseConfig):
@@ -21,6 +122,14 @@ class TestingConfig(BaseConfig):
     TESTING = True
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    # Run background jobs synchronously so tests can assert on their effects
+    RUN_JOBS_INLINE = True
+    QUERY_BUDGET_STRICT = True
+
+
+class BenchmarkConfig(TestingConfig):
+    # Benchmarks measure over-budget requests instead of failing them
+    QUERY_BUDGET_STRICT = False
 
 
 class ProductionConfig(BaseConfig):
@@ -30,5 +139,6 @@ class ProductionConfig(BaseConfig):
 config = {
     "development": DevelopmentConfig,
     "testing": TestingConfig,
+    "benchmark": BenchmarkConfig,
     "production": ProductionConfig,
 }
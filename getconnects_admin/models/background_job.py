@@ -0,0 +1,25 @@
+"""Background job bookkeeping model."""
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Text, func
+
+from . import Base
+
+
+class BackgroundJob(Base):
+    """A unit of work run outside the request cycle and its outcome."""
+
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer)
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+__all__ = ["BackgroundJob"]
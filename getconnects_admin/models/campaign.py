@@ -15,6 +15,8 @@ class Campaign(Base):
     campaign_name = Column(String, nullable=False)
     status = Column(String)
     client_id = Column(Integer, ForeignKey("clients.id"))
+    # Digest of the JustCall payload last synchronised into this row
+    sync_hash = Column(String(64))
 
     client = relationship("Client", back_populates="campaigns")
     leads = relationship(
@@ -0,0 +1,33 @@
+"""Materialised lead types accepted by each campaign."""
+
+from sqlalchemy import Column, ForeignKey, Index, String
+
+from . import Base
+
+
+class CampaignEffectiveLeadType(Base):
+    """A lead type a campaign accepts, directly or through one of its groups.
+
+    Rows are derived from ``campaign_lead_types`` and the lead types of the
+    campaign's ``campaign_lead_type_groups`` and are rebuilt by
+    :func:`services.lead_type_service.refresh_effective_lead_types`.
+    """
+
+    __tablename__ = "campaign_effective_lead_types"
+    __table_args__ = (
+        Index(
+            "ix_campaign_effective_lead_types_name",
+            "campaign_id",
+            "lead_type_name",
+        ),
+    )
+
+    campaign_id = Column(String, ForeignKey("campaigns.id"), primary_key=True)
+    lead_type_id = Column(String, primary_key=True)
+    lead_type_name = Column(String, nullable=False)
+    group_id = Column(String)
+    # "campaign" for explicit mappings, "group" for group-derived ones
+    source = Column(String, nullable=False)
+
+
+__all__ = ["CampaignEffectiveLeadType"]
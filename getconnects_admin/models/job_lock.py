@@ -0,0 +1,18 @@
+"""Cross-process lock rows for background jobs."""
+
+from sqlalchemy import Column, DateTime, String
+
+from . import Base
+
+
+class JobLock(Base):
+    """A named lease held by one worker until ``expires_at``."""
+
+    __tablename__ = "job_locks"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+__all__ = ["JobLock"]
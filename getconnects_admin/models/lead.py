@@ -1,6 +1,14 @@
 """Lead model."""
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from . import Base
@@ -10,6 +18,14 @@ class Lead(Base):
     """A sales lead generated from a campaign."""
 
     __tablename__ = "leads"
+    __table_args__ = (
+        # Listing filters and stats: per client/campaign date ranges, lead
+        # type and global date counts. Created by migration 0001.
+        Index("ix_leads_client_id_created_at", "client_id", "created_at"),
+        Index("ix_leads_campaign_id_created_at", "campaign_id", "created_at"),
+        Index("ix_leads_lead_type", "lead_type"),
+        Index("ix_leads_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
@@ -0,0 +1,24 @@
+"""Content-addressed storage for rendered notification bodies."""
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, func
+
+from . import Base
+
+
+class NotificationBody(Base):
+    """A compressed message body shared by every log with the same content.
+
+    ``hash`` is the SHA-256 hex digest of the uncompressed UTF-8 text, so
+    identical renders (for example the same template sent to many leads)
+    are stored once.
+    """
+
+    __tablename__ = "notification_bodies"
+
+    hash = Column(String(64), primary_key=True)
+    content = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+__all__ = ["NotificationBody"]
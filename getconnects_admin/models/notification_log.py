@@ -1,6 +1,14 @@
 """Notification log model."""
 
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from . import Base
@@ -10,6 +18,14 @@ class NotificationLog(Base):
     """Stores results of notification attempts."""
 
     __tablename__ = "notification_logs"
+    __table_args__ = (
+        Index(
+            "ix_notification_logs_client_id_created_at",
+            "client_id",
+            "created_at",
+        ),
+        Index("ix_notification_logs_status_channel", "status", "channel"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("clients.id"))
@@ -17,10 +33,16 @@ class NotificationLog(Base):
     channel = Column(String)
     status = Column(String)
     message = Column(String)
-
-    # Convenience relationships for accessing related names in templates/API
-    client = relationship("Client", lazy="joined")
-    lead = relationship("Lead", lazy="joined")
+    body_hash = Column(
+        String(64), ForeignKey("notification_bodies.hash"), index=True
+    )
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Convenience relationships for the detail view. Listings select the
+    # related names with explicit joins instead of eager loading objects.
+    client = relationship("Client")
+    lead = relationship("Lead")
+    body = relationship("NotificationBody")
 
 
 __all__ = ["NotificationLog"]
@@ -0,0 +1,18 @@
+"""Applied schema migration model."""
+
+from sqlalchemy import Column, DateTime, String, func
+
+from . import Base
+
+
+class SchemaMigration(Base):
+    """Records a migration version that has been applied to the database."""
+
+    __tablename__ = "schema_migrations"
+
+    version = Column(String, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, server_default=func.now())
+
+
+__all__ = ["SchemaMigration"]
@@ -1,6 +1,6 @@
 """User model definition."""
 
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String
 from sqlalchemy.orm import relationship
 
 from . import Base
@@ -18,6 +18,10 @@ class User(Base):
     last_name = Column(String, nullable=True)
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_staff = Column(Boolean, default=False, nullable=False)
+    # Authorisation stamp, bumped whenever flags or page permissions change
+    auth_version = Column(
+        BigInteger, default=0, server_default="0", nullable=False
+    )
 
     permissions = relationship(
         "PagePermission", back_populates="user", cascade="all, delete-orphan"
@@ -11,6 +11,7 @@ from .pages import pages_bp
 from .settings import settings_bp
 from .webhooks import webhooks_bp
 from .notifications import notifications_bp
+from .metrics import metrics_bp
 
 root_bp = Blueprint("root", __name__)
 
@@ -30,5 +31,6 @@ __all__ = [
     "settings_bp",
     "webhooks_bp",
     "notifications_bp",
+    "metrics_bp",
     "root_bp",
 ]
@@ -4,6 +4,7 @@ from flask import Blueprint, render_template, request, session, redirect
 
 from ..models import SessionLocal
 from ..models.user import User
+from ..services.auth_decorators import store_user_authorisation
 from ..services.auth_service import supabase_config, verify_supabase_token
 
 auth_bp = Blueprint("auth", __name__)
@@ -71,9 +72,7 @@ def session_login():  # pragma: no cover - view logic
             session["uid"] = uid
             session["user_id"] = user.id
             session["email"] = user.email
-            session["is_staff"] = user.is_staff
-            session["is_superuser"] = user.is_superuser
-            session["permissions"] = [p.path for p in user.permissions]
+            store_user_authorisation(user)
             return ("", 204)
         except Exception as e:
             db.rollback()
@@ -13,11 +13,17 @@ from flask import (
 from ..models.campaign import Campaign
 from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
 from ..models.lead_type_group import LeadTypeGroup
-from ..models.lead import Lead
 from ..services.campaign_service import list_campaigns
 from ..services.client_service import list_clients
 from ..services.helpers import get_session
-from ..services.justcall_service import fetch_campaigns, sync_campaigns
+from ..services.job_service import latest_job
+from ..services.justcall_service import (
+    CAMPAIGN_SYNC_JOB,
+    campaign_sync_configured,
+    start_campaign_sync,
+)
+from ..services.lead_service import start_lead_reassignment
+from ..services.lead_type_service import mark_effective_lead_types_stale
 from ..services.auth_decorators import require_page
 
 campaigns_bp = Blueprint("campaigns", __name__)
@@ -26,9 +32,10 @@ campaigns_bp = Blueprint("campaigns", __name__)
 @campaigns_bp.route("/campaigns", methods=["GET"])
 @require_page
 def campaigns_page():  # pragma: no cover - template rendering
-    """Render the campaigns listing page."""
+    """Render the campaigns listing page with the last sync status."""
 
-    return render_template("campaigns.html")
+    last_sync = latest_job(CAMPAIGN_SYNC_JOB, skipped=False)
+    return render_template("campaigns.html", last_sync=last_sync)
 
 
 @campaigns_bp.route("/api/campaigns", methods=["GET"])
@@ -42,23 +49,16 @@ def campaigns_index():
 @campaigns_bp.route("/campaigns/sync", methods=["POST"])
 @require_page
 def sync_campaigns_route():
-    """Synchronise campaigns using stored JustCall credentials."""
-
-    from ..models.justcall_credential import (
-        JustCallCredential,
-    )  # local import to avoid circular
-
-    with get_session() as session:
-        creds = session.query(JustCallCredential).first()
-        if not creds:
-            flash("No API credentials configured", "error")
-            return redirect(url_for("campaigns.campaigns_page"))
-    try:  # pragma: no cover - network errors
-        campaigns = fetch_campaigns(creds.api_key, creds.api_secret)
-        sync_campaigns(campaigns)
-        flash("Campaigns synchronised", "info")
-    except Exception as exc:  # pragma: no cover - network errors
-        flash(f"Sync failed: {exc}", "error")
+    """Queue a background sync of campaigns from JustCall."""
+
+    if not campaign_sync_configured():
+        flash(
+            "Add JustCall API credentials before syncing campaigns", "danger"
+        )
+    elif start_campaign_sync() is None:
+        flash("A campaign sync is already running", "info")
+    else:
+        flash("Campaign sync started", "info")
     return redirect(url_for("campaigns.campaigns_page"))
 
 
@@ -72,13 +72,9 @@ def manage_campaign(campaign_id: str):  # pragma: no cover - template rendering
         group_ids = request.form.getlist("group_ids")
         with get_session() as session:
             campaign = session.get(Campaign, campaign_id)
-            campaign.client_id = int(client_id) if client_id else None
-
-            # Propagate client assignment to existing leads for this campaign so
-            # that the leads page reflects the updated client immediately.
-            session.query(Lead).filter_by(campaign_id=campaign_id).update(
-                {"client_id": campaign.client_id}, synchronize_session=False
-            )
+            new_client_id = int(client_id) if client_id else None
+            owner_changed = campaign.client_id != new_client_id
+            campaign.client_id = new_client_id
 
             # update lead type group assignments
             session.query(CampaignLeadTypeGroup).filter_by(
@@ -92,7 +88,15 @@ def manage_campaign(campaign_id: str):  # pragma: no cover - template rendering
                             lead_type_group_id=gid,
                         )
                     )
+            # The bulk delete above is invisible to the flush hooks
+            mark_effective_lead_types_stale(
+                session, campaign_ids=[campaign_id]
+            )
             session.commit()
+        if owner_changed:
+            # Lead reads follow the campaign's client straight away; the
+            # stored copy on each lead is updated in chunks in the background
+            start_lead_reassignment(campaign_id)
         flash("Campaign updated", "info")
         return redirect(url_for("campaigns.campaigns_page"))
 
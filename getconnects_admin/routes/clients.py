@@ -1,19 +1,32 @@
 """Client management routes."""
 
-from flask import Blueprint, jsonify, redirect, render_template, request, flash
+from flask import (
+    Blueprint,
+    current_app,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    flash,
+)
 
 from collections import defaultdict
 
 from ..forms import ClientForm
 from ..services.auth_decorators import require_staff, require_page
-from ..services.client_service import create_client, list_clients, delete_client as delete_client_service
+from ..services.client_service import (
+    client_deletion_running,
+    count_client_leads,
+    create_client,
+    delete_client as delete_client_service,
+    list_clients,
+    save_lead_type_settings,
+    start_client_deletion,
+)
 from ..services.helpers import get_session
+from ..services.lead_type_service import client_lead_types
 from ..models.client import Client
-from ..models.campaign import Campaign
-from ..models.campaign_lead_type import CampaignLeadType
-from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
 from ..models.client_lead_type_setting import ClientLeadTypeSetting
-from ..models.lead_type import LeadType
 from ..models.notification_template import NotificationTemplate
 
 clients_bp = Blueprint("clients", __name__)
@@ -59,42 +72,37 @@ def manage_client(client_id):  # pragma: no cover - template rendering
             flash("Client not found", "error")
             return redirect("/clients")
 
-        # gather campaigns and associated lead types
-        campaigns = session.query(Campaign).filter_by(client_id=client_id).all()
-        groups = defaultdict(list)
-        lead_types = []
-        lead_type_ids: set[str] = set()
-        for camp in campaigns:
-            clts = session.query(CampaignLeadType).filter_by(campaign_id=camp.id).all()
-            if clts:
-                for clt in clts:
-                    lt = clt.lead_type or LeadType(
-                        id=clt.lead_type_id,
-                        name=clt.lead_type_name,
-                    )
-                    if lt.id not in lead_type_ids:
-                        group_name = lt.group.name if lt.group else "Ungrouped"
-                        groups[group_name].append(lt)
-                        lead_types.append(lt)
-                        lead_type_ids.add(lt.id)
-                continue
-
-            # Fallback: derive lead types from associated groups when no
-            # specific campaign lead type mappings exist. This ensures the
-            # manage client page still lists available lead types for
-            # campaigns that only reference lead type groups.
-            for cltg in (
-                session.query(CampaignLeadTypeGroup)
-                .filter_by(campaign_id=camp.id)
-                .all()
-            ):
-                group = cltg.group
-                for lt in group.lead_types:
-                    if lt.id not in lead_type_ids:
-                        group_name = group.name if group else "Ungrouped"
-                        groups[group_name].append(lt)
-                        lead_types.append(lt)
-                        lead_type_ids.add(lt.id)
+        lead_types = client_lead_types(session, client_id)
+        if request.method == "POST" and form.validate_on_submit():
+            client.company_name = form.company_name.data
+            client.contact_name = form.contact_name.data
+            client.contact_email = form.contact_email.data
+            client.phone = form.phone.data
+
+            save_lead_type_settings(
+                session,
+                client_id,
+                [
+                    {
+                        "lead_type_id": lt["id"],
+                        "sms_enabled": request.form.get(f"sms_{lt['id']}")
+                        == "on",
+                        "email_enabled": request.form.get(f"email_{lt['id']}")
+                        == "on",
+                        "template_id": (
+                            int(val)
+                            if (
+                                val := request.form.get(f"template_{lt['id']}")
+                            )
+                            else None
+                        ),
+                    }
+                    for lt in lead_types
+                ],
+            )
+            session.commit()
+            flash("Client updated", "info")
+            return redirect("/clients")
 
         settings = {
             s.lead_type_id: s
@@ -107,31 +115,9 @@ def manage_client(client_id):  # pragma: no cover - template rendering
             .order_by(NotificationTemplate.name)
             .all()
         )
-
-        if request.method == "POST" and form.validate_on_submit():
-            client.company_name = form.company_name.data
-            client.contact_name = form.contact_name.data
-            client.contact_email = form.contact_email.data
-            client.phone = form.phone.data
-
-            for lt in lead_types:
-                setting = settings.get(lt.id)
-                if not setting:
-                    setting = ClientLeadTypeSetting(
-                        client_id=client_id, lead_type_id=lt.id
-                    )
-                    session.add(setting)
-                setting.sms_enabled = request.form.get(f"sms_{lt.id}") == "on"
-                setting.email_enabled = request.form.get(f"email_{lt.id}") == "on"
-                setting.template_id = (
-                    int(val) if (val := request.form.get(f"template_{lt.id}")) else None
-                )
-                setting.sms_template = ""
-                setting.email_subject = ""
-                setting.email_html = ""
-            session.commit()
-            flash("Client updated", "info")
-            return redirect("/clients")
+        groups = defaultdict(list)
+        for lt in lead_types:
+            groups[lt["group_name"] or "Ungrouped"].append(lt)
 
         if request.method == "GET":
             form.company_name.data = client.company_name
@@ -153,8 +139,20 @@ def manage_client(client_id):  # pragma: no cover - template rendering
 @require_staff
 @require_page
 def delete_client(client_id):
-    """Delete the specified client and redirect to the clients list."""
-
-    if delete_client_service(client_id):
+    """Delete the specified client and redirect to the clients list.
+
+    Clients with many leads are deleted by a background job.
+    """
+
+    if client_deletion_running(client_id):
+        flash("Client is already being deleted", "info")
+    elif count_client_leads(client_id) > current_app.config.get(
+        "CLIENT_DELETE_INLINE_LEADS", 5000
+    ):
+        if start_client_deletion(client_id) is None:
+            flash("Client is already being deleted", "info")
+        else:
+            flash("Client is being deleted in the background", "info")
+    elif delete_client_service(client_id):
         flash("Client deleted", "info")
     return redirect("/clients")
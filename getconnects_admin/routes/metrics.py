@@ -0,0 +1,28 @@
+"""Prometheus scrape endpoint."""
+
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request
+
+from ..services.metrics_service import render
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Return all metrics in the Prometheus text format.
+
+    Scrapers must send ``METRICS_TOKEN`` as a bearer token. Without a token
+    the endpoint does not exist unless ``METRICS_PUBLIC`` is set.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if not token:
+        if not current_app.config.get("METRICS_PUBLIC"):
+            abort(404)
+    elif not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        abort(401)
+    body, content_type = render()
+    return Response(body, content_type=content_type)
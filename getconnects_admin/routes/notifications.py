@@ -1,58 +1,111 @@
 """Notification log routes."""
 
+from datetime import datetime
+
 from flask import Blueprint, abort, jsonify, render_template, request
 
+from ..services.client_service import list_clients
 from ..services.helpers import get_session
+from ..services.notification_service import (
+    DEFAULT_PAGE_SIZE,
+    clamp_page_size,
+    get_notification_body,
+    list_notification_logs,
+)
 from ..models.notification_log import NotificationLog
 
 notifications_bp = Blueprint("notifications", __name__)
 
+NOTIFICATION_STATUSES = ["sent", "failed", "skipped", "error"]
+NOTIFICATION_CHANNELS = ["sms", "email"]
+
+
+def _parse_date(value: str | None) -> datetime | None:
+    """Parse an ISO date from the query string, ignoring invalid input."""
+
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _filter_args() -> dict:
+    """Collect notification log filters from the query string."""
+
+    return {
+        "status": request.args.get("status", ""),
+        "channel": request.args.get("channel", ""),
+        "client_id": request.args.get("client_id", ""),
+        "start_date": request.args.get("start_date", ""),
+        "end_date": request.args.get("end_date", ""),
+    }
+
+
+def _query_logs(filters: dict, limit: int):
+    return list_notification_logs(
+        limit=limit,
+        before_id=request.args.get("before_id", type=int),
+        since_id=request.args.get("since_id", type=int),
+        status=filters["status"] or None,
+        channel=filters["channel"] or None,
+        client_id=(
+            int(filters["client_id"])
+            if filters["client_id"].isdigit()
+            else None
+        ),
+        start_date=_parse_date(filters["start_date"]),
+        end_date=_parse_date(filters["end_date"]),
+    )
+
+
+def _serialise(log: dict) -> dict:
+    data = dict(log)
+    created_at = data.get("created_at")
+    data["created_at"] = created_at.isoformat() if created_at else None
+    return data
+
 
 @notifications_bp.route("/notifications", methods=["GET"])
 def notifications_index():
-    """Return recent notification logs as JSON."""
-    limit = request.args.get("limit", 10, type=int)
-    with get_session() as session:
-        logs = (
-            session.query(NotificationLog)
-            .order_by(NotificationLog.id.desc())
-            .limit(limit)
-            .all()
-        )
-        data = [
-            {
-                "id": log.id,
-                "client_id": log.client_id,
-                "client_name": (
-                    log.client.company_name
-                    if getattr(log, "client", None)
-                    else None
-                ),
-                "lead_id": log.lead_id,
-                "lead_name": (
-                    log.lead.name
-                    if getattr(log, "lead", None)
-                    else None
-                ),
-                "channel": log.channel,
-                "status": log.status,
-                "message": log.message,
-            }
-            for log in logs
-        ]
-    return jsonify(data)
+    """Return recent notification logs as JSON.
+
+    Supports the same filters as the HTML browser plus ``before_id`` for
+    cursor pagination and ``since_id`` for incremental polling. ``limit`` is
+    capped so a single request can never return the whole table. When more
+    entries exist the cursor for the next page is returned in the
+    ``X-Next-Before-Id`` header.
+    """
+
+    limit = clamp_page_size(request.args.get("limit", 10, type=int))
+    logs, next_before_id = _query_logs(_filter_args(), limit)
+    response = jsonify([_serialise(log) for log in logs])
+    if next_before_id is not None:
+        response.headers["X-Next-Before-Id"] = str(next_before_id)
+    return response
 
 
 @notifications_bp.route("/notifications/all", methods=["GET"])
 def notifications_all():  # pragma: no cover - mostly template rendering
-    """Render a page listing all notification logs."""
-    with get_session() as session:
-        logs = (
-            session.query(NotificationLog)
-            .order_by(NotificationLog.id.desc())
-            .all()
-        )
-        return render_template("notifications.html", logs=logs)
+    """Render a filterable, paginated page of notification logs."""
+
+    filters = _filter_args()
+    limit = clamp_page_size(
+        request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    )
+    logs, next_before_id = _query_logs(filters, limit)
+    return render_template(
+        "notifications.html",
+        logs=logs,
+        filters=filters,
+        limit=limit,
+        next_before_id=next_before_id,
+        is_first_page=request.args.get("before_id") is None,
+        clients=list_clients(),
+        statuses=NOTIFICATION_STATUSES,
+        channels=NOTIFICATION_CHANNELS,
+    )
 
 
 @notifications_bp.route("/notifications/<int:log_id>", methods=["GET"])
@@ -65,4 +118,18 @@ def notification_detail(log_id):  # pragma: no cover - template rendering
         return render_template("notification_detail.html", log=log)
 
 
+@notifications_bp.route("/notifications/<int:log_id>/body", methods=["GET"])
+def notification_body(log_id):
+    """Return the full delivered message for a notification log.
+
+    Bodies are only decompressed here so listings and the detail page stay
+    light; the detail page fetches this on demand.
+    """
+
+    body = get_notification_body(log_id)
+    if body is None:
+        abort(404)
+    return jsonify({"id": log_id, "body": body})
+
+
 __all__ = ["notifications_bp"]
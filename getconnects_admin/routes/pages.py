@@ -14,11 +14,8 @@ from flask import (
 )
 
 from ..models.campaign import Campaign
-from ..models.client import Client
 from ..models.lead_type_group import LeadTypeGroup
 from ..models.lead_type import LeadType
-from ..models.campaign_lead_type import CampaignLeadType
-from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
 from ..services.helpers import get_session
 from uuid import uuid4
 from ..forms import LeadForm, LeadImportForm
@@ -29,10 +26,13 @@ from ..services.lead_service import (
     delete_lead,
     list_leads,
     list_leads_paginated,
+    start_bulk_lead_job,
     update_lead,
 )
 from ..services.client_service import list_clients
 from ..services.campaign_service import list_campaigns
+from ..services.notification_service import notification_log_buffer
+from ..services.reference_service import get_reference_data
 import csv
 import io
 import re
@@ -106,6 +106,59 @@ def manage_dispositions(group_id: str):
     return render_template("manage_dispositions.html", group=data)
 
 
+def _lead_filters(args) -> dict:
+    """Convert the leads page filters into ``_query_leads`` kwargs."""
+
+    return {
+        "client_id": int(args["client_id"]) if args.get("client_id") else None,
+        "campaign_id": args.get("campaign_id") or None,
+        "lead_type": args.get("lead_type") or None,
+        "start_date": (
+            datetime.fromisoformat(args["start_date"])
+            if args.get("start_date")
+            else None
+        ),
+        "end_date": (
+            datetime.fromisoformat(args["end_date"])
+            if args.get("end_date")
+            else None
+        ),
+    }
+
+
+def _matching_filters(form) -> dict | None:
+    """Return the filters of a ``scope=filter`` bulk action, or ``None``.
+
+    With no filter set every lead would match, so the action is refused.
+    """
+
+    filters = _lead_filters(form)
+    if not any(value is not None for value in filters.values()):
+        flash("Set at least one filter before acting on all matching leads")
+        return None
+    return filters
+
+
+def _knows(reference, campaign_id: str | None, lead_type: str | None) -> bool:
+    campaigns = {c for c, _ in reference.campaign_choices}
+    return (not campaign_id or campaign_id in campaigns) and (
+        not lead_type or lead_type in reference.lead_types
+    )
+
+
+def _reference_for(campaign_id: str | None, lead_type: str | None):
+    """Return reference data, rebuilt if it lacks a submitted value.
+
+    Another worker may have added the value since this process's snapshot
+    was built.
+    """
+
+    reference = get_reference_data()
+    if _knows(reference, campaign_id, lead_type):
+        return reference
+    return get_reference_data(refresh=True)
+
+
 @pages_bp.route("/leads", methods=["GET", "POST"])
 @require_page
 def leads_page():
@@ -130,47 +183,10 @@ def leads_page():
     form = LeadForm()
     edit_form = LeadForm()
     upload_form = LeadImportForm()
-    with get_session() as session:
-        campaigns = session.query(Campaign).all()
-        lead_types = session.query(LeadType).all()
-        clients = session.query(Client).all()
-        for f in (form, edit_form):
-            f.campaign_id.choices = [
-                (c.id, c.campaign_name) for c in campaigns
-            ]
-            f.lead_type.choices = [
-                (lt.name, lt.name) for lt in lead_types
-            ]
-
-        type_map: dict[str, list[str]] = {}
-        for clt in session.query(CampaignLeadType).all():
-            name = clt.lead_type_name or (
-                clt.lead_type.name if clt.lead_type else None
-            )
-            if name:
-                type_map.setdefault(clt.campaign_id, []).append(name)
-
-        for cltg in session.query(CampaignLeadTypeGroup).all():
-            if cltg.group:
-                existing = type_map.setdefault(cltg.campaign_id, [])
-                for lt in cltg.group.lead_types:
-                    if lt.name not in existing:
-                        existing.append(lt.name)
-
-        campaign_data = [
-            {
-                "id": c.id,
-                "name": c.campaign_name,
-                "client": c.client.company_name if c.client else "None",
-                "client_id": c.client_id,
-                "lead_types": type_map.get(c.id, []),
-            }
-            for c in campaigns
-        ]
-        client_data = [
-            {"id": cl.id, "name": cl.company_name} for cl in clients
-        ]
-        all_lead_types = [lt.name for lt in lead_types]
+    reference = _reference_for(form.campaign_id.data, form.lead_type.data)
+    for f in (form, edit_form):
+        f.campaign_id.choices = reference.campaign_choices
+        f.lead_type.choices = reference.lead_type_choices
 
     if form.validate_on_submit():
         create_lead(
@@ -188,24 +204,8 @@ def leads_page():
         )
         return redirect(url_for("pages.leads_page"))
 
-    start = (
-        datetime.fromisoformat(filter_args["start_date"])
-        if filter_args["start_date"]
-        else None
-    )
-    end = (
-        datetime.fromisoformat(filter_args["end_date"])
-        if filter_args["end_date"]
-        else None
-    )
     leads, total = list_leads_paginated(
-        page=page,
-        per_page=per_page,
-        client_id=int(filter_args["client_id"]) if filter_args["client_id"] else None,
-        campaign_id=filter_args["campaign_id"] or None,
-        lead_type=filter_args["lead_type"] or None,
-        start_date=start,
-        end_date=end,
+        page=page, per_page=per_page, **_lead_filters(filter_args)
     )
     total_pages = (total + per_page - 1) // per_page
 
@@ -215,26 +215,46 @@ def leads_page():
         edit_form=edit_form,
         upload_form=upload_form,
         leads=leads,
-        campaigns=campaign_data,
-        clients=client_data,
-        lead_types=all_lead_types,
+        campaigns=reference.campaigns,
+        clients=reference.clients,
+        lead_types=reference.lead_types,
+        reference_etag=reference.etag,
         filters=filter_args,
         page=page,
         total_pages=total_pages,
     )
 
 
+@pages_bp.route("/leads/reference-data")
+@require_page
+def leads_reference_data():
+    """Serve the lead form reference data as cacheable JSON.
+
+    The leads page requests this with ``?v=<etag>``; such URLs never change
+    content and may be cached indefinitely. Plain requests revalidate with
+    ``If-None-Match``.
+    """
+
+    reference = get_reference_data()
+    resp = make_response(reference.payload)
+    resp.mimetype = "application/json"
+    resp.set_etag(reference.etag)
+    if request.args.get("v") == reference.etag:
+        resp.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
+
+
 @pages_bp.route("/leads/<int:lead_id>/update", methods=["POST"])
 @require_page
 def update_lead_route(lead_id: int):
     """Handle updates to an existing lead."""
 
     form = LeadForm()
-    with get_session() as session:
-        campaigns = session.query(Campaign).all()
-        lead_types = session.query(LeadType).all()
-        form.campaign_id.choices = [(c.id, c.campaign_name) for c in campaigns]
-        form.lead_type.choices = [(lt.name, lt.name) for lt in lead_types]
+    reference = _reference_for(form.campaign_id.data, form.lead_type.data)
+    form.campaign_id.choices = reference.campaign_choices
+    form.lead_type.choices = reference.lead_type_choices
     if form.validate_on_submit():
         update_lead(
             lead_id,
@@ -267,10 +287,46 @@ def delete_lead_route(lead_id: int):
 )
 @require_page
 def bulk_delete_leads_route():
-    """Delete multiple leads selected on the listing page."""
+    """Delete the selected leads, or every lead matching the page filters.
 
-    ids = [int(i) for i in request.form.getlist("lead_ids")]
-    bulk_delete_leads(ids)
+    With ``scope=filter`` the deletion runs as a background job using the
+    submitted filter fields instead of ``lead_ids``.
+    """
+
+    if request.form.get("scope") == "filter":
+        filters = _matching_filters(request.form)
+        if filters is not None:
+            start_bulk_lead_job("delete", filters)
+            flash("Deleting matching leads in the background")
+    else:
+        ids = [int(i) for i in request.form.getlist("lead_ids")]
+        bulk_delete_leads(ids)
+    return redirect(url_for("pages.leads_page"))
+
+
+@pages_bp.route(
+    "/leads/bulk-update", methods=["POST"], endpoint="bulk_update_leads"
+)
+@require_page
+def bulk_update_leads_route():
+    """Move selected or matching leads to another campaign or lead type."""
+
+    campaign_id = request.form.get("new_campaign_id") or None
+    lead_type = request.form.get("new_lead_type") or None
+    reference = _reference_for(campaign_id, lead_type)
+    if not _knows(reference, campaign_id, lead_type):
+        abort(400)
+    if campaign_id or lead_type:
+        if request.form.get("scope") == "filter":
+            filters = _matching_filters(request.form)
+        else:
+            filters = {
+                "lead_ids": [int(i) for i in request.form.getlist("lead_ids")]
+            }
+        if filters is not None:
+            start_bulk_lead_job(
+                "update", filters, campaign_id=campaign_id, lead_type=lead_type
+            )
     return redirect(url_for("pages.leads_page"))
 
 
@@ -339,104 +395,118 @@ def import_leads():
                     if alias_key in lookup:
                         mapping[key] = lookup[alias_key]
                         break
-        # Build a lookup of allowed lead types for each campaign
-        with get_session() as session:
-            type_map: dict[str, set[str]] = {}
-            for clt in session.query(CampaignLeadType).all():
-                name = clt.lead_type_name or (
-                    clt.lead_type.name if clt.lead_type else None
-                )
-                if name:
-                    type_map.setdefault(clt.campaign_id, set()).add(name)
-            for cltg in session.query(CampaignLeadTypeGroup).all():
-                if cltg.group:
-                    existing = type_map.setdefault(cltg.campaign_id, set())
-                    for lt in cltg.group.lead_types:
-                        existing.add(lt.name)
+        # Allowed lead types for each campaign
+        type_map = get_reference_data().campaign_lead_types
+        refreshed = False
         total = 0
         successes = 0
         failures: list[tuple[int, str]] = []
-        for row_num, row in enumerate(reader, start=1):
-            total += 1
-            name_val = (
-                row.get(mapping["name"], "") if mapping["name"] else ""
-            )
-            if not name_val:
-                failures.append((row_num, "Missing name"))
-                continue
-            phone_val = (
-                row.get(mapping["phone"], "") if mapping["phone"] else ""
-            )
-            if not phone_val:
-                failures.append((row_num, "Missing phone"))
-                continue
-            campaign_value = (
-                row.get(mapping["campaign_id"])
-                if mapping["campaign_id"]
-                else None
-            )
-            campaign_id: str | None = None
-            if campaign_value:
-                with get_session() as session:
-                    campaign = session.get(Campaign, campaign_value)
-                    if not campaign:
-                        campaign = (
-                            session.query(Campaign)
-                            .filter_by(campaign_name=campaign_value)
-                            .first()
+        # Share one notification log buffer across the import so outcomes
+        # are written in a single insert rather than per row.
+        with notification_log_buffer() as log_buffer:
+            for row_num, row in enumerate(reader, start=1):
+                total += 1
+                name_val = (
+                    row.get(mapping["name"], "") if mapping["name"] else ""
+                )
+                if not name_val:
+                    failures.append((row_num, "Missing name"))
+                    continue
+                phone_val = (
+                    row.get(mapping["phone"], "") if mapping["phone"] else ""
+                )
+                if not phone_val:
+                    failures.append((row_num, "Missing phone"))
+                    continue
+                campaign_value = (
+                    row.get(mapping["campaign_id"])
+                    if mapping["campaign_id"]
+                    else None
+                )
+                campaign_id: str | None = None
+                if campaign_value:
+                    with get_session() as session:
+                        campaign = session.get(Campaign, campaign_value)
+                        if not campaign:
+                            campaign = (
+                                session.query(Campaign)
+                                .filter_by(campaign_name=campaign_value)
+                                .first()
+                            )
+                        if campaign:
+                            campaign_id = campaign.id
+                        else:
+                            failures.append(
+                                (
+                                    row_num,
+                                    f"Unknown campaign '{campaign_value}'",
+                                )
+                            )
+                            continue
+                lead_type_val = (
+                    row.get(mapping["lead_type"])
+                    if mapping["lead_type"]
+                    else None
+                )
+                if lead_type_val:
+                    if not campaign_id:
+                        failures.append(
+                            (row_num, "Lead type provided without campaign")
                         )
-                    if campaign:
-                        campaign_id = campaign.id
-                    else:
+                        continue
+                    if lead_type_val not in type_map.get(campaign_id, ()):
+                        if not refreshed:
+                            # Added by another worker since the snapshot
+                            type_map = get_reference_data(
+                                refresh=True
+                            ).campaign_lead_types
+                            refreshed = True
+                    if lead_type_val not in type_map.get(campaign_id, ()):
                         failures.append(
-                            (row_num, f"Unknown campaign '{campaign_value}'")
+                            (row_num, f"Unknown lead type '{lead_type_val}'")
                         )
                         continue
-            lead_type_val = (
-                row.get(mapping["lead_type"]) if mapping["lead_type"] else None
-            )
-            if lead_type_val:
-                if not campaign_id:
-                    failures.append(
-                        (row_num, "Lead type provided without campaign")
-                    )
-                    continue
-                allowed = type_map.get(campaign_id, set())
-                if lead_type_val not in allowed:
-                    failures.append(
-                        (row_num, f"Unknown lead type '{lead_type_val}'")
-                    )
-                    continue
-            caller_name_val = (
-                row.get(mapping["caller_name"])
-                if mapping["caller_name"]
-                else None
-            )
-            caller_number_val = (
-                row.get(mapping["caller_number"])
-                if mapping["caller_number"]
-                else None
-            )
-            ok, err = create_lead(
-                name_val,
-                phone_val,
-                row.get(mapping["email"]) if mapping["email"] else None,
-                row.get(mapping["address"]) if mapping["address"] else None,
-                row.get(mapping["company"]) if mapping["company"] else None,
-                row.get(mapping["secondary_phone"])
-                if mapping["secondary_phone"]
-                else None,
-                campaign_id,
-                lead_type_val,
-                caller_name_val,
-                caller_number_val,
-                row.get(mapping["notes"]) if mapping["notes"] else None,
-                flash_error=False,
-            )
-            if ok:
-                successes += 1
-            else:
-                failures.append((row_num, err or "Unknown error"))
+                caller_name_val = (
+                    row.get(mapping["caller_name"])
+                    if mapping["caller_name"]
+                    else None
+                )
+                caller_number_val = (
+                    row.get(mapping["caller_number"])
+                    if mapping["caller_number"]
+                    else None
+                )
+                ok, err = create_lead(
+                    name_val,
+                    phone_val,
+                    row.get(mapping["email"]) if mapping["email"] else None,
+                    (
+                        row.get(mapping["address"])
+                        if mapping["address"]
+                        else None
+                    ),
+                    (
+                        row.get(mapping["company"])
+                        if mapping["company"]
+                        else None
+                    ),
+                    (
+                        row.get(mapping["secondary_phone"])
+                        if mapping["secondary_phone"]
+                        else None
+                    ),
+                    campaign_id,
+                    lead_type_val,
+                    caller_name_val,
+                    caller_number_val,
+                    row.get(mapping["notes"]) if mapping["notes"] else None,
+                    flash_error=False,
+                    notification_logs=log_buffer,
+                )
+                if ok:
+                    successes += 1
+                else:
+                    failures.append((row_num, err or "Unknown error"))
         flash(f"Imported {successes} of {total} leads")
         if failures:
             details = "; ".join(
@@ -5,10 +5,12 @@ import os
 
 from flask import (
     Blueprint,
+    current_app,
     flash,
     redirect,
     render_template,
     request,
+    send_file,
     url_for,
     session as flask_session,
     abort,
@@ -17,7 +19,7 @@ from flask import (
 from uuid import uuid4
 from types import SimpleNamespace
 
-from sqlalchemy import inspect as sa_inspect, text
+from sqlalchemy import text
 from sqlalchemy.inspection import inspect
 
 from ..models.lead import Lead
@@ -30,19 +32,33 @@ from ..models.notification_template import NotificationTemplate
 from ..models.user import User
 from ..models.page_permission import PagePermission
 from ..services.auth_decorators import (
+    bump_permissions_version,
     require_superuser,
     require_page,
     PAGE_OPTIONS,
 )
 from ..services.helpers import get_session
+from ..services.schema_service import schema_capabilities
+from ..services.profiling_service import (
+    PROFILE_ARG,
+    PROFILE_HEADER,
+    list_profiles,
+    profile_path,
+)
 from ..services.auth_service import send_activation_email, create_supabase_user
-from ..services.sms_service import send_sms, fetch_sms_numbers
+from ..services.sms_service import (
+    get_sms_numbers,
+    invalidate_sms_numbers,
+    send_sms,
+)
 from ..services.email_service import (
     send_email,
     verify_gmail_api_credentials,
     GmailCredentialAuthenticationError,
     GmailCredentialSendError,
-    get_gmail_api_status,
+    cached_gmail_api_status,
+    invalidate_gmail_api_status,
+    record_gmail_api_status,
 )
 
 settings_bp = Blueprint("settings", __name__, url_prefix="/settings")
@@ -54,11 +70,9 @@ def _notification_templates_supports_email_text(session) -> bool:
     bind = session.get_bind()
     if bind is None:
         return True
-    try:
-        columns = sa_inspect(bind).get_columns("notification_templates")
-    except Exception:
-        return False
-    return any(column["name"] == "email_text" for column in columns)
+    return schema_capabilities(bind).supports(
+        "notification_template_email_text"
+    )
 
 
 def _load_legacy_notification_templates(session):
@@ -120,11 +134,12 @@ def justcall_settings():  # pragma: no cover - mostly template rendering
     with get_session() as session:
         creds = session.query(JustCallCredential).first()
         webhooks = session.query(JustCallWebhook).all()
-        numbers = fetch_sms_numbers() if creds else []
+        numbers = get_sms_numbers() if creds else []
         if request.method == "POST":
             if request.form.get("delete") and creds:
                 session.delete(creds)
                 session.commit()
+                invalidate_sms_numbers()
                 flash("Credentials deleted", "info")
                 return redirect(url_for("settings.justcall_settings"))
             elif request.form.get("add_webhook"):
@@ -154,6 +169,7 @@ def justcall_settings():  # pragma: no cover - mostly template rendering
                     JustCallCredential(api_key=api_key, api_secret=api_secret)
                 )
                 session.commit()
+                invalidate_sms_numbers()
                 flash("Credentials saved", "info")
                 return redirect(url_for("settings.justcall_settings"))
     return render_template(
@@ -169,8 +185,6 @@ def gmail_settings():  # pragma: no cover - mostly template rendering
 
     with get_session() as session:
         creds = session.query(GmailCredential).first()
-        api_status = get_gmail_api_status(creds)
-
         if request.method == "POST":
             action = request.form.get("action", "")
 
@@ -189,6 +203,7 @@ def gmail_settings():  # pragma: no cover - mostly template rendering
                 ):
                     os.environ.pop(key, None)
                 session.commit()
+                invalidate_gmail_api_status()
                 flash("Gmail API credentials removed.", "info")
                 return redirect(url_for("settings.gmail_settings"))
 
@@ -244,9 +259,22 @@ def gmail_settings():  # pragma: no cover - mostly template rendering
                     os.environ["GMAIL_API_FROM_EMAIL"] = from_email
 
                 session.commit()
+                # The credentials were just verified against Google
+                record_gmail_api_status(
+                    {
+                        "client_id": client_id,
+                        "refresh_token": refresh_token,
+                        "user_email": creds.api_from_email
+                        or creds.from_email
+                        or creds.username,
+                    },
+                    True,
+                    "Connected to the Gmail API.",
+                )
                 flash("Gmail API credentials saved.", "info")
                 return redirect(url_for("settings.gmail_settings"))
 
+        api_status = cached_gmail_api_status(creds)
     return render_template(
         "gmail_settings.html",
         credentials=creds,
@@ -430,7 +458,7 @@ def edit_notification_template(template_id: int):  # pragma: no cover - mostly t
 @require_page
 def notification_test():  # pragma: no cover - mostly template rendering
     """Allow sending test SMS and email messages."""
-    numbers = fetch_sms_numbers()
+    numbers = get_sms_numbers()
 
     if request.method == "POST":
         action = request.form.get("action")
@@ -467,6 +495,34 @@ def justcall_webhook_detail(webhook_id: int):
     return render_template("justcall_webhook_detail.html", webhook=webhook)
 
 
+@settings_bp.route("/profiles")
+@require_superuser
+def request_profiles():
+    """List the most recent on-demand request profiles."""
+
+    return render_template(
+        "request_profiles.html",
+        profiles=list_profiles(current_app.config["PROFILE_DIR"]),
+        profile_arg=PROFILE_ARG,
+        profile_header=PROFILE_HEADER,
+    )
+
+
+@settings_bp.route("/profiles/<profile_id>.<kind>")
+@require_superuser
+def download_profile(profile_id: str, kind: str):
+    """Download the pstats or collapsed-stack file of a profile."""
+
+    path = profile_path(current_app.config["PROFILE_DIR"], profile_id, kind)
+    if not path:
+        abort(404)
+    return send_file(
+        os.path.abspath(path),
+        as_attachment=True,
+        download_name=f"{profile_id}.{kind}",
+    )
+
+
 @settings_bp.route("/users", methods=["GET", "POST"])
 @require_superuser
 @require_page
@@ -515,6 +571,7 @@ def user_settings():  # pragma: no cover - mostly template rendering
                     session.query(PagePermission).filter_by(user_id=user.id).delete()
                     for path in pages:
                         session.add(PagePermission(user_id=user.id, path=path))
+                    bump_permissions_version(user)
                     session.commit()
                     flash("Permissions updated", "info")
                 return redirect(url_for("settings.user_settings"))
@@ -14,6 +14,8 @@ from ..models.justcall_webhook_payload import JustCallWebhookPayload
 from ..models.campaign import Campaign
 from ..services.helpers import get_session
 from ..services.lead_service import create_lead
+from ..services.metrics_service import record_webhook_payload
+from ..services.notification_service import notification_log_buffer
 
 webhooks_bp = Blueprint("webhooks", __name__, url_prefix="/webhooks")
 
@@ -63,6 +65,17 @@ def _extract(obj, path):
     return current
 
 
+@webhooks_bp.after_request
+def _count_failed_payloads(response):
+    # Covers aborts as well as explicit error responses
+    if (
+        request.endpoint == "webhooks.justcall_webhook"
+        and response.status_code >= 400
+    ):
+        record_webhook_payload("failed")
+    return response
+
+
 def _fingerprint_payload(payload) -> str:
     """Return a stable hash for *payload* suitable for deduplication checks."""
 
@@ -74,6 +87,7 @@ def _fingerprint_payload(payload) -> str:
 @webhooks_bp.route("/justcall/<token>", methods=["POST"])
 def justcall_webhook(token: str):
     """Receive lead data from JustCall and store it in the database."""
+    record_webhook_payload("received")
     with get_session() as session:
         webhook = session.query(JustCallWebhook).filter_by(token=token).first()
         if not webhook:
@@ -96,6 +110,7 @@ def justcall_webhook(token: str):
             current_app.logger.info(
                 "Ignoring duplicate JustCall payload for token %s", token
             )
+            record_webhook_payload("deduplicated")
             return "", 204
 
         session.add(JustCallWebhookPayload(token_id=webhook.id, payload=payload))
@@ -105,118 +120,134 @@ def justcall_webhook(token: str):
             if webhook.target_type == "campaign"
             else LEAD_WRITABLE_FIELDS
         )
-        for item in payload:
-            if mapping:
-                # Start with any default data provided, restricting to writable fields
-                data: dict = {
-                    k: v
-                    for k, v in (item.get("data") or {}).items()
-                    if k in writable_fields
-                }
-                for field, path in mapping.items():
-                    if webhook.target_type != "campaign" and field == "campaign_id":
-                        value = _extract(item, path)
-                        if value is not None:
-                            campaign = (
-                                session.query(Campaign)
-                                .filter(
-                                    or_(
-                                        Campaign.id == value,
-                                        Campaign.campaign_name == value,
+        # Notification outcomes for every lead in the payload are written
+        # with a single insert once the batch has been processed.
+        with notification_log_buffer() as log_buffer:
+            for item in payload:
+                if mapping:
+                    # Start with any default data provided, restricting to
+                    # writable fields
+                    data: dict = {
+                        k: v
+                        for k, v in (item.get("data") or {}).items()
+                        if k in writable_fields
+                    }
+                    for field, path in mapping.items():
+                        if (
+                            webhook.target_type != "campaign"
+                            and field == "campaign_id"
+                        ):
+                            value = _extract(item, path)
+                            if value is not None:
+                                campaign = (
+                                    session.query(Campaign)
+                                    .filter(
+                                        or_(
+                                            Campaign.id == value,
+                                            Campaign.campaign_name == value,
+                                        )
                                     )
+                                    .first()
                                 )
+                                if campaign:
+                                    data["campaign_id"] = campaign.id
+                                    if (
+                                        campaign.client_id
+                                        and "client_id" not in data
+                                    ):
+                                        data["client_id"] = campaign.client_id
+                                else:
+                                    abort(400, f"Campaign not found: {value}")
+                            continue
+                        # Only allow whitelisted fields to be written
+                        if field in writable_fields:
+                            data[field] = _extract(item, path)
+                            continue
+                        # Allow campaign name mapping for lead webhooks
+                        if (
+                            webhook.target_type != "campaign"
+                            and field in {"campaign", "campaign_name"}
+                        ):
+                            value = _extract(item, path)
+                            campaign = (
+                                session.query(Campaign)
+                                .filter_by(campaign_name=value)
                                 .first()
                             )
                             if campaign:
                                 data["campaign_id"] = campaign.id
+                                # Map the campaign's client to the lead if
+                                # available
                                 if campaign.client_id and "client_id" not in data:
                                     data["client_id"] = campaign.client_id
-                            else:
-                                abort(400, f"Campaign not found: {value}")
-                        continue
-                    # Only allow whitelisted fields to be written
-                    if field in writable_fields:
-                        data[field] = _extract(item, path)
-                        continue
-                    # Allow campaign name mapping for lead webhooks
-                    if (
-                        webhook.target_type != "campaign"
-                        and field in {"campaign", "campaign_name"}
-                    ):
-                        value = _extract(item, path)
-                        campaign = (
-                            session.query(Campaign)
-                            .filter_by(campaign_name=value)
-                            .first()
+                            continue
+                        # Ignore any disallowed fields
+                        current_app.logger.debug(
+                            "Ignoring disallowed field '%s'", field
                         )
-                        if campaign:
-                            data["campaign_id"] = campaign.id
-                            # Map the campaign's client to the lead if available
-                            if campaign.client_id and "client_id" not in data:
-                                data["client_id"] = campaign.client_id
-                        continue
-                    # Ignore any disallowed fields
-                    current_app.logger.debug("Ignoring disallowed field '%s'", field)
-                if webhook.target_type == "campaign" and "id" not in data:
-                    data["id"] = uuid4().hex
-                if webhook.target_type == "campaign":
-                    session.add(Campaign(**data))
-                else:
-                    ok, err = create_lead(
-                        name=data.get("name"),
-                        phone=data.get("phone"),
-                        email=data.get("email"),
-                        address=data.get("address"),
-                        company=data.get("company"),
-                        secondary_phone=data.get("secondary_phone"),
-                        campaign_id=data.get("campaign_id"),
-                        lead_type=data.get("lead_type"),
-                        caller_name=data.get("caller_name"),
-                        caller_number=data.get("caller_number"),
-                        notes=data.get("notes"),
-                        flash_error=False,
-                    )
-                    if not ok:
-                        return jsonify({"error": err}), 409
-            else:
-                data = item.get("data", {})
-                if webhook.target_type == "campaign":
-                    session.add(
-                        Campaign(
-                            id=data.get("id"),
-                            campaign_name=data.get("campaign_name"),
-                            status=data.get("status"),
-                            client_id=data.get("client_id"),
+                    if webhook.target_type == "campaign" and "id" not in data:
+                        data["id"] = uuid4().hex
+                    if webhook.target_type == "campaign":
+                        session.add(Campaign(**data))
+                    else:
+                        ok, err = create_lead(
+                            name=data.get("name"),
+                            phone=data.get("phone"),
+                            email=data.get("email"),
+                            address=data.get("address"),
+                            company=data.get("company"),
+                            secondary_phone=data.get("secondary_phone"),
+                            campaign_id=data.get("campaign_id"),
+                            lead_type=data.get("lead_type"),
+                            caller_name=data.get("caller_name"),
+                            caller_number=data.get("caller_number"),
+                            notes=data.get("notes"),
+                            flash_error=False,
+                            notification_logs=log_buffer,
                         )
-                    )
+                        if not ok:
+                            return jsonify({"error": err}), 409
                 else:
-                    cf = data.get("custom_fields") or {}
-                    campaign_id = data.get("campaign_id")
-                    campaign_name = data.get("campaign_name")
-                    if campaign_name:
-                        campaign = (
-                            session.query(Campaign)
-                            .filter_by(campaign_name=campaign_name)
-                            .first()
+                    data = item.get("data", {})
+                    if webhook.target_type == "campaign":
+                        session.add(
+                            Campaign(
+                                id=data.get("id"),
+                                campaign_name=data.get("campaign_name"),
+                                status=data.get("status"),
+                                client_id=data.get("client_id"),
+                            )
+                        )
+                    else:
+                        cf = data.get("custom_fields") or {}
+                        campaign_id = data.get("campaign_id")
+                        campaign_name = data.get("campaign_name")
+                        if campaign_name:
+                            campaign = (
+                                session.query(Campaign)
+                                .filter_by(campaign_name=campaign_name)
+                                .first()
+                            )
+                            if campaign:
+                                campaign_id = campaign.id
+                        ok, err = create_lead(
+                            name=data.get("client_name"),
+                            phone=data.get("client_number")
+                            or data.get("phone"),
+                            address=data.get("address"),
+                            email=data.get("email"),
+                            company=cf.get("Company"),
+                            secondary_phone=cf.get("Alternate Phone Number"),
+                            campaign_id=campaign_id,
+                            lead_type=data.get("disposition"),
+                            caller_name=data.get("caller_name"),
+                            caller_number=data.get("caller_number"),
+                            notes=cf.get("Notes") or data.get("notes"),
+                            flash_error=False,
+                            notification_logs=log_buffer,
                         )
-                        if campaign:
-                            campaign_id = campaign.id
-                    ok, err = create_lead(
-                        name=data.get("client_name"),
-                        phone=data.get("client_number") or data.get("phone"),
-                        address=data.get("address"),
-                        email=data.get("email"),
-                        company=cf.get("Company"),
-                        secondary_phone=cf.get("Alternate Phone Number"),
-                        campaign_id=campaign_id,
-                        lead_type=data.get("disposition"),
-                        caller_name=data.get("caller_name"),
-                        caller_number=data.get("caller_number"),
-                        notes=cf.get("Notes") or data.get("notes"),
-                        flash_error=False,
-                    )
-                    if not ok:
-                        return jsonify({"error": err}), 409
+                        if not ok:
+                            return jsonify({"error": err}), 409
         try:
             session.commit()
         except IntegrityError as exc:
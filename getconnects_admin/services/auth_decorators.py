@@ -1,7 +1,10 @@
 """Role-based access decorators for Flask routes."""
 
-from functools import wraps
-from flask import abort, session, request, current_app
+import time
+from functools import lru_cache, wraps
+from flask import abort, g, has_app_context, session, request, current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
 
 try:
     from ..models import SessionLocal
@@ -10,6 +13,12 @@ except ImportError:  # pragma: no cover - fallback when imported directly
     from models import SessionLocal
     from models.user import User
 
+# Seconds a user's authorisation stamp is cached before the row is re-read
+AUTH_VERSION_TTL = 30
+
+_STAMP_KEY = "auth_version:"
+_BUMPED = "auth_versions_bumped"
+
 # Available pages that can be assigned to users via the settings interface
 PAGE_OPTIONS = [
     ("/dashboard", "Dashboard"),
@@ -25,31 +34,180 @@ PAGE_OPTIONS = [
 ]
 
 
-def _user_permissions() -> list[str]:
-    """Return cached page permissions for the current session."""
+class PermissionTrie:
+    """Prefix trie of page permissions.
+
+    ``allows`` answers "does the path start with a granted prefix" (route
+    access) and ``covers`` additionally accepts paths that are a prefix of a
+    grant (navigation sections). Both walk the path once, so checks cost
+    O(len(path)) regardless of how many permissions a user holds.
+    """
+
+    __slots__ = ("root",)
+
+    _END = object()
+
+    def __init__(self, prefixes=()) -> None:
+        self.root: dict = {}
+        for prefix in prefixes:
+            node = self.root
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[self._END] = True
+
+    def __bool__(self) -> bool:
+        return bool(self.root)
+
+    def allows(self, path: str) -> bool:
+        node = self.root
+        if self._END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+    def covers(self, path: str) -> bool:
+        node = self.root
+        for char in path:
+            if self._END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return True
+
+
+@lru_cache(maxsize=1024)
+def compile_permissions(prefixes: tuple[str, ...]) -> PermissionTrie:
+    """Return the compiled trie for a normalised tuple of prefixes."""
+
+    return PermissionTrie(prefixes)
+
+
+def remember_permissions_version(uid: str, version: int) -> None:
+    """Cache *uid*'s stamp for ``AUTH_VERSION_TTL`` seconds."""
+
+    if has_app_context():
+        from .. import cache
+
+        cache.set(_STAMP_KEY + uid, version, timeout=AUTH_VERSION_TTL)
+
+
+def permissions_version(uid: str) -> int:
+    """Return the authorisation stamp of *uid* (``0`` if unset).
+
+    Served from the shared cache, where bumps are published as soon as
+    they are committed. The ``users`` row is read only on a miss, so with a
+    per-process cache a bump made by another worker is seen within
+    ``AUTH_VERSION_TTL`` seconds.
+    """
+
+    version = None
+    if has_app_context():
+        from .. import cache
+
+        version = cache.get(_STAMP_KEY + uid)
+    if version is None:
+        db = SessionLocal()
+        try:
+            version = (
+                db.execute(
+                    select(User.auth_version).where(User.uid == uid)
+                ).scalar()
+                or 0
+            )
+        finally:
+            db.close()
+        remember_permissions_version(uid, version)
+    return version
+
+
+def bump_permissions_version(user) -> None:
+    """Invalidate cached authorisation for *user* after role or page changes.
+
+    Call before committing the change so the new stamp is written with it;
+    it is published to the cache once the commit succeeds. Sessions carry
+    the stamp they were built with; a mismatch on the next request reloads
+    the user's flags and permissions once. A timestamp is used instead of a
+    counter so a restored row can never reissue a stamp an older session
+    still holds.
+    """
+
+    user.auth_version = time.time_ns()
+    db = object_session(user)
+    if db is not None:
+        db.info.setdefault(_BUMPED, {})[user.uid] = user.auth_version
+
+
+def store_user_authorisation(user) -> None:
+    """Copy *user*'s flags, permissions and stamp into the session."""
+
+    session["is_staff"] = bool(user.is_staff) if user else False
+    session["is_superuser"] = bool(user.is_superuser) if user else False
+    session["permissions"] = (
+        [perm.path for perm in user.permissions] if user else []
+    )
+    session["auth_version"] = (user.auth_version or 0) if user else 0
+    if user:
+        remember_permissions_version(user.uid, session["auth_version"])
+
+
+def _refresh_if_stale() -> None:
+    """Reload authorisation from the database only when the stamp changed.
+
+    The stamp is compared at most once per request.
+    """
 
-    if session.get("is_superuser"):
-        return [p for p, _ in PAGE_OPTIONS]
-    perms = session.get("permissions")
-    if perms:
-        return perms
     uid = session.get("uid")
-    if not uid:
-        return []
+    if not uid or g.get("auth_checked"):
+        return
+    g.auth_checked = True
+    if "is_staff" in session and session.get(
+        "auth_version", 0
+    ) == permissions_version(uid):
+        return
     db = SessionLocal()
-    collected: list[str] = []
     try:
-        user = db.query(User).filter_by(uid=uid).first()
-        if user:
-            collected = [perm.path for perm in user.permissions]
-            session["permissions"] = collected
+        store_user_authorisation(db.query(User).filter_by(uid=uid).first())
     finally:
         db.close()
-    if collected:
-        return collected
-    if current_app.config.get("TESTING"):
-        return [p for p, _ in PAGE_OPTIONS]
-    return []
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_bumps(db) -> None:
+    for uid, version in db.info.pop(_BUMPED, {}).items():
+        remember_permissions_version(uid, version)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_bumps(db) -> None:
+    db.info.pop(_BUMPED, None)
+
+
+def current_permissions() -> PermissionTrie:
+    """Return the compiled permission trie for the current request."""
+
+    if "permission_trie" not in g:
+        _refresh_if_stale()
+        if session.get("is_superuser"):
+            prefixes = tuple(p for p, _ in PAGE_OPTIONS)
+        else:
+            prefixes = tuple(sorted(set(session.get("permissions") or [])))
+        g.permission_trie = compile_permissions(prefixes)
+    return g.permission_trie
+
+
+def has_permission(path: str) -> bool:
+    """Return whether navigation for *path* should be shown."""
+
+    if session.get("is_superuser"):
+        return True
+    return current_permissions().covers(path)
+
 
 def require_page(view):
     """Restrict access to routes based on per-user page permissions."""
@@ -65,8 +223,10 @@ def require_page(view):
         if path.startswith("/api/"):
             path = path[4:]
 
-        perms = _user_permissions()
-        if any(path.startswith(p) for p in perms):
+        perms = current_permissions()
+        if perms.allows(path):
+            return view(*args, **kwargs)
+        if not perms and current_app.config.get("TESTING"):
             return view(*args, **kwargs)
         abort(403)
 
@@ -78,19 +238,9 @@ def require_staff(view):
 
     @wraps(view)
     def wrapper(*args, **kwargs):
+        _refresh_if_stale()
         if session.get("is_staff") or session.get("is_superuser"):
             return view(*args, **kwargs)
-        uid = session.get("uid")
-        if uid:
-            db = SessionLocal()
-            try:
-                user = db.query(User).filter_by(uid=uid).first()
-                if user and (user.is_staff or user.is_superuser):
-                    session["is_staff"] = user.is_staff
-                    session["is_superuser"] = user.is_superuser
-                    return view(*args, **kwargs)
-            finally:
-                db.close()
         abort(403)
 
     return wrapper
@@ -101,19 +251,9 @@ def require_superuser(view):
 
     @wraps(view)
     def wrapper(*args, **kwargs):
+        _refresh_if_stale()
         if session.get("is_superuser"):
             return view(*args, **kwargs)
-        uid = session.get("uid")
-        if uid:
-            db = SessionLocal()
-            try:
-                user = db.query(User).filter_by(uid=uid).first()
-                if user and user.is_superuser:
-                    session["is_superuser"] = True
-                    session["is_staff"] = user.is_staff
-                    return view(*args, **kwargs)
-            finally:
-                db.close()
         abort(403)
 
     return wrapper
@@ -1,31 +1,132 @@
 """Authentication related helpers using Supabase."""
 
+import logging
 import os
 import smtplib
+import threading
 from typing import Optional, Dict
 
+import jwt
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Clock skew tolerated when checking ``exp``/``iat`` of Supabase tokens
+JWT_LEEWAY_SECONDS = 30
+# How long a fetched JWKS document is trusted before it is refreshed
+JWKS_CACHE_SECONDS = 600
+# Asymmetric algorithms Supabase issues when signing keys are enabled
+_ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+_jwks_clients: dict[str, jwt.PyJWKClient] = {}
+_jwks_lock = threading.Lock()
+
+_client: Client | None = None
+_client_config: tuple[str, str] | None = None
+_client_lock = threading.Lock()
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally (no key material)."""
+
 
 def _get_supabase_client() -> Client:
-    """Initialise and return a Supabase client instance."""
+    """Return the process-wide Supabase client, creating it on first use.
+
+    Building a client sets up HTTP sessions and the auth/storage sub-clients,
+    so one instance is shared across requests and threads. It is rebuilt
+    only when ``SUPABASE_URL`` or the key changes.
+    """
+
+    global _client, _client_config
 
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_KEY") or os.environ.get("SUPABASE_ANON_KEY")
     if not url or not key:
         raise ValueError("Supabase credentials are not configured")
-    return create_client(url, key)
+    config = (url, key)
+    client = _client
+    if client is not None and _client_config == config:
+        return client
+    with _client_lock:
+        if _client is None or _client_config != config:
+            _client = create_client(url, key)
+            _client_config = config
+        return _client
+
+
+def _jwks_client() -> jwt.PyJWKClient:
+    """Return the cached JWKS client for the configured Supabase project.
+
+    ``PyJWKClient`` keeps the key set for ``JWKS_CACHE_SECONDS`` and fetches
+    it again when a token names a ``kid`` it has not seen, which covers key
+    rotation without a restart.
+    """
 
+    url = os.environ.get("SUPABASE_JWKS_URL")
+    if not url:
+        base = os.environ.get("SUPABASE_URL")
+        if not base:
+            raise LocalVerificationUnavailable(
+                "SUPABASE_URL is not configured"
+            )
+        url = f"{base.rstrip('/')}/auth/v1/.well-known/jwks.json"
+    with _jwks_lock:
+        client = _jwks_clients.get(url)
+        if client is None:
+            client = jwt.PyJWKClient(
+                url, cache_jwk_set=True, lifespan=JWKS_CACHE_SECONDS
+            )
+            _jwks_clients[url] = client
+        return client
 
-def verify_supabase_token(id_token: str) -> Optional[Dict[str, str]]:
-    """Validate *id_token* using Supabase and return its claims.
 
-    Returns ``None`` when verification fails.
+def _decode_locally(id_token: str) -> Dict[str, str]:
+    """Verify *id_token*'s signature, expiry and audience offline.
+
+    Raises :class:`jwt.PyJWTError` for tokens that are definitely not
+    valid and :class:`LocalVerificationUnavailable` when no key is available.
     """
 
+    header = jwt.get_unverified_header(id_token)
+    algorithm = header.get("alg", "")
+    if algorithm == "HS256":
+        secret = os.environ.get("SUPABASE_JWT_SECRET")
+        if not secret:
+            raise LocalVerificationUnavailable(
+                "SUPABASE_JWT_SECRET is not configured"
+            )
+        key, algorithms = secret, ["HS256"]
+    elif algorithm in _ASYMMETRIC_ALGORITHMS:
+        try:
+            key = _jwks_client().get_signing_key_from_jwt(id_token).key
+        except jwt.PyJWKClientConnectionError as exc:
+            raise LocalVerificationUnavailable(str(exc)) from exc
+        algorithms = [algorithm]
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported algorithm {algorithm!r}")
+    return jwt.decode(
+        id_token,
+        key,
+        algorithms=algorithms,
+        audience=os.environ.get("SUPABASE_JWT_AUDIENCE", "authenticated"),
+        leeway=JWT_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def _remote_fallback_enabled() -> bool:
+    return os.environ.get("SUPABASE_REMOTE_VERIFY", "true").lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+
+
+def _verify_remotely(id_token: str) -> Optional[Dict[str, str]]:
     try:
         client = _get_supabase_client()
         user = client.auth.get_user(id_token).user
@@ -34,6 +135,30 @@ def verify_supabase_token(id_token: str) -> Optional[Dict[str, str]]:
         return None
 
 
+def verify_supabase_token(id_token: str) -> Optional[Dict[str, str]]:
+    """Validate *id_token* and return its ``sub`` and ``email`` claims.
+
+    Tokens are verified locally with ``SUPABASE_JWT_SECRET`` (HS256 projects)
+    or the project's cached JWKS (asymmetric signing keys). Only when neither
+    is available, and ``SUPABASE_REMOTE_VERIFY`` is not disabled, is the token
+    sent to Supabase's ``auth.get_user`` endpoint.
+
+    Returns ``None`` when verification fails.
+    """
+
+    try:
+        claims = _decode_locally(id_token)
+    except LocalVerificationUnavailable as exc:
+        if not _remote_fallback_enabled():
+            logger.warning("Cannot verify Supabase token locally: %s", exc)
+            return None
+        return _verify_remotely(id_token)
+    except jwt.PyJWTError as exc:
+        logger.info("Rejected Supabase token: %s", exc)
+        return None
+    return {"sub": claims["sub"], "email": claims.get("email")}
+
+
 def supabase_config() -> tuple[dict, list[str]]:
     """Return Supabase configuration and list missing keys."""
 
@@ -11,22 +11,24 @@ except ImportError:  # pragma: no cover
 from .helpers import get_session
 
 
+def _campaign_groups(session, campaign_id: str):
+    return (
+        session.query(LeadTypeGroup.name)
+        .join(
+            CampaignLeadTypeGroup,
+            LeadTypeGroup.id == CampaignLeadTypeGroup.lead_type_group_id,
+        )
+        .filter(CampaignLeadTypeGroup.campaign_id == campaign_id)
+    )
+
+
 def list_campaigns() -> list[dict]:
     """Return all campaigns as a list of dictionaries."""
 
     with get_session() as session:
         results = []
         for c in session.query(Campaign).all():
-            groups = (
-                session.query(LeadTypeGroup.name)
-                .join(
-                    CampaignLeadTypeGroup,
-                    LeadTypeGroup.id
-                    == CampaignLeadTypeGroup.lead_type_group_id,
-                )
-                .filter(CampaignLeadTypeGroup.campaign_id == c.id)
-                .all()
-            )
+            groups = _campaign_groups(session, c.id).all()
             group_names = sorted({name for (name,) in groups})
 
             results.append(
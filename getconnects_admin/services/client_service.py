@@ -1,13 +1,35 @@
 """Business logic for client operations."""
 
 from datetime import datetime
-from flask import current_app, flash
+from flask import current_app, flash, has_app_context
+from sqlalchemy import delete, func, select, update
 
 try:
+    from ..models.campaign import Campaign
+    from ..models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from ..models.campaign_lead_type import CampaignLeadType
+    from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
     from ..models.client import Client
+    from ..models.client_lead_type_setting import ClientLeadTypeSetting
+    from ..models.lead import Lead
+    from ..models.notification_log import NotificationLog
 except ImportError:  # pragma: no cover - fallback for direct usage
+    from models.campaign import Campaign
+    from models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from models.campaign_lead_type import CampaignLeadType
+    from models.campaign_lead_type_group import CampaignLeadTypeGroup
     from models.client import Client
-from .helpers import get_session
+    from models.client_lead_type_setting import ClientLeadTypeSetting
+    from models.lead import Lead
+    from models.notification_log import NotificationLog
+from .helpers import dialect_insert, get_session
+from .job_service import lock_held, start_locked_job, update_job_progress
+from .lead_service import lead_client_filter
+
+CLIENT_DELETE_JOB = "client_delete"
+DEFAULT_DELETE_BATCH_SIZE = 1000
+# Seconds a deletion lease is held if its worker dies mid-job
+CLIENT_DELETE_LOCK_SECONDS = 3600
 
 
 def list_clients() -> list[dict]:
@@ -61,20 +83,208 @@ def create_client(
             return False
 
 
+def _delete_batch_size() -> int:
+    if not has_app_context():
+        return DEFAULT_DELETE_BATCH_SIZE
+    return current_app.config.get(
+        "CLIENT_DELETE_BATCH_SIZE", DEFAULT_DELETE_BATCH_SIZE
+    )
+
+
+def count_client_leads(client_id: int) -> int:
+    with get_session() as session:
+        owned = lead_client_filter(session, client_id)
+        return session.execute(
+            select(func.count(Lead.id)).where(owned)
+        ).scalar()
+
+
+def _purge_client(
+    session, client_id: int, batch_size: int, job_id: int | None = None
+) -> dict:
+    """Delete *client_id* and everything referencing it with bulk statements.
+
+    Leads go first, ``batch_size`` at a time together with their
+    notification logs, committing after each batch so no transaction holds
+    more than one batch of row locks. Leads are matched by the same rule as
+    the lead filters: the campaign's owner, and the stored ``client_id``
+    only for leads without a campaign, which may be out of date while a
+    reassignment job runs. The client's remaining logs follow in batches,
+    then campaign mappings, settings, campaigns and the client row in a
+    final transaction. Returns the number of leads and logs removed.
+    """
+
+    counts = {"leads": 0, "notification_logs": 0}
+    owned = lead_client_filter(session, client_id)
+    total = session.execute(select(func.count(Lead.id)).where(owned)).scalar()
+    update_job_progress(job_id, 0, total)
+    while True:
+        ids = session.execute(
+            select(Lead.id)
+            .where(lead_client_filter(session, client_id))
+            .order_by(Lead.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        counts["notification_logs"] += session.execute(
+            delete(NotificationLog)
+            .where(NotificationLog.lead_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        counts["leads"] += session.execute(
+            delete(Lead)
+            .where(Lead.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        update_job_progress(job_id, counts["leads"])
+
+    while True:
+        log_ids = (
+            select(NotificationLog.id)
+            .where(NotificationLog.client_id == client_id)
+            .order_by(NotificationLog.id)
+            .limit(batch_size)
+        )
+        result = session.execute(
+            delete(NotificationLog)
+            .where(NotificationLog.id.in_(log_ids.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        if not result.rowcount:
+            break
+        counts["notification_logs"] += result.rowcount
+
+    # Leads of campaigns moved to another client may still carry this
+    # client's id until their reassignment job reaches them
+    session.execute(
+        update(Lead)
+        .where(Lead.client_id == client_id)
+        .values(
+            client_id=select(Campaign.client_id)
+            .where(Campaign.id == Lead.campaign_id)
+            .scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    campaign_ids = select(Campaign.id).where(Campaign.client_id == client_id)
+    for model in (
+        CampaignEffectiveLeadType,
+        CampaignLeadType,
+        CampaignLeadTypeGroup,
+    ):
+        session.execute(
+            delete(model)
+            .where(model.campaign_id.in_(campaign_ids))
+            .execution_options(synchronize_session=False)
+        )
+    for stmt in (
+        delete(ClientLeadTypeSetting).where(
+            ClientLeadTypeSetting.client_id == client_id
+        ),
+        delete(Campaign).where(Campaign.client_id == client_id),
+        delete(Client).where(Client.id == client_id),
+    ):
+        session.execute(stmt.execution_options(synchronize_session=False))
+    session.commit()
+    return counts
+
+
+def _delete_client_job(job_id: int, client_id: int, batch_size: int) -> dict:
+    with get_session() as session:
+        counts = _purge_client(session, client_id, batch_size, job_id)
+    return {"client_id": client_id, **counts}
+
+
+def _delete_lock(client_id: int) -> str:
+    return f"{CLIENT_DELETE_JOB}:{client_id}"
+
+
+def client_deletion_running(client_id: int) -> bool:
+    """Return whether a background job is deleting *client_id*."""
+
+    return lock_held(_delete_lock(client_id))
+
+
+def start_client_deletion(client_id: int) -> int | None:
+    """Queue a background job deleting *client_id* and its data.
+
+    Returns the job id, or ``None`` when the client is already being deleted.
+    """
+
+    return start_locked_job(
+        CLIENT_DELETE_JOB,
+        _delete_lock(client_id),
+        CLIENT_DELETE_LOCK_SECONDS,
+        _delete_client_job,
+        client_id,
+        _delete_batch_size(),
+    )
+
+
 def delete_client(client_id: int) -> bool:
-    """Delete the specified client by id."""
+    """Delete the specified client by id along with its leads and campaigns.
+
+    Dependent rows are removed with set-based statements rather than loaded
+    through the ORM cascade. Clients with more than
+    ``CLIENT_DELETE_INLINE_LEADS`` leads should go through
+    :func:`start_client_deletion` instead.
+    """
 
     with get_session() as session:
-        client = session.get(Client, client_id)
-        if not client:
+        if session.get(Client, client_id) is None:
             flash("Client not found")
             return False
         try:
-            session.delete(client)
-            session.commit()
+            _purge_client(session, client_id, _delete_batch_size())
             return True
         except Exception as exc:  # pragma: no cover - logging side effects
             session.rollback()
             current_app.logger.error("Failed to delete client: %s", exc)
             flash("Failed to delete client")
             return False
+
+
+def save_lead_type_settings(
+    session, client_id: int, settings: list[dict]
+) -> None:
+    """Upsert notification settings for *client_id* in one statement.
+
+    Each entry needs ``lead_type_id``, ``sms_enabled``, ``email_enabled``
+    and ``template_id``. Legacy per-setting template fields are cleared.
+    The caller commits.
+    """
+
+    if not settings:
+        return
+    rows = [
+        {
+            "client_id": client_id,
+            "lead_type_id": setting["lead_type_id"],
+            "sms_enabled": setting["sms_enabled"],
+            "email_enabled": setting["email_enabled"],
+            "template_id": setting["template_id"],
+            "sms_template": "",
+            "email_subject": "",
+            "email_html": "",
+        }
+        for setting in settings
+    ]
+    stmt = dialect_insert(session, ClientLeadTypeSetting)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["client_id", "lead_type_id"],
+        set_={
+            column: stmt.excluded[column]
+            for column in (
+                "sms_enabled",
+                "email_enabled",
+                "template_id",
+                "sms_template",
+                "email_subject",
+                "email_html",
+            )
+        },
+    )
+    session.execute(stmt, rows)
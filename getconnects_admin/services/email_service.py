@@ -2,9 +2,11 @@ from __future__ import annotations
 
 """Helper for sending emails through the Gmail REST API."""
 
+import hashlib
 import logging
 import os
 import base64
+import time
 from email.message import EmailMessage
 
 from flask import current_app
@@ -16,6 +18,22 @@ except ImportError:  # pragma: no cover
     from models.gmail_credential import GmailCredential
 
 from .helpers import get_session
+from .instrumentation_service import external_call
+from .job_service import run_detached
+
+# Overridable so load tests can point the app at a local stub
+GOOGLE_OAUTH_URL = os.getenv(
+    "GOOGLE_OAUTH_URL", "https://oauth2.googleapis.com"
+).rstrip("/")
+GMAIL_API_URL = os.getenv(
+    "GMAIL_API_URL", "https://gmail.googleapis.com"
+).rstrip("/")
+GMAIL_TOKEN_URL = f"{GOOGLE_OAUTH_URL}/token"
+GMAIL_SEND_URL = f"{GMAIL_API_URL}/gmail/v1/users/me/messages/send"
+
+# Seconds a cached Gmail connection status is shown before revalidating
+GMAIL_STATUS_TTL = 60
+_STATUS_CACHE_KEY = "gmail_api_status"
 
 
 def _logger():
@@ -131,16 +149,18 @@ def _refresh_access_token(credentials: dict[str, str | None]) -> str:
         )
 
     try:
-        response = requests.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": credentials["client_id"],
-                "client_secret": credentials["client_secret"],
-                "refresh_token": credentials["refresh_token"],
-                "grant_type": "refresh_token",
-            },
-            timeout=10,
-        )
+        with external_call("gmail") as call:
+            response = requests.post(
+                GMAIL_TOKEN_URL,
+                data={
+                    "client_id": credentials["client_id"],
+                    "client_secret": credentials["client_secret"],
+                    "refresh_token": credentials["refresh_token"],
+                    "grant_type": "refresh_token",
+                },
+                timeout=10,
+            )
+            call.status = response.status_code
     except requests.RequestException as exc:  # pragma: no cover - network failure
         raise GmailCredentialSendError(f"Failed to refresh Gmail access token: {exc}") from exc
 
@@ -175,15 +195,17 @@ def _send_with_gmail_api(
     encoded_message = base64.urlsafe_b64encode(msg.as_bytes()).decode()
 
     try:
-        response = requests.post(
-            "https://gmail.googleapis.com/gmail/v1/users/me/messages/send",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-            },
-            json={"raw": encoded_message},
-            timeout=10,
-        )
+        with external_call("gmail") as call:
+            response = requests.post(
+                GMAIL_SEND_URL,
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/json",
+                },
+                json={"raw": encoded_message},
+                timeout=10,
+            )
+            call.status = response.status_code
     except requests.RequestException as exc:  # pragma: no cover - network failure
         raise GmailCredentialSendError(f"Failed to call Gmail API: {exc}") from exc
 
@@ -261,39 +283,138 @@ def send_email(to_email: str, subject: str, body: str, *, html: str | None = Non
 
     try:
         _send_with_gmail_api(msg, api_credentials)
+        record_gmail_api_status(
+            api_credentials, True, "Connected to the Gmail API."
+        )
         return True
     except GmailCredentialAuthenticationError as exc:
         _logger().error("Failed to authenticate with Gmail: %s", exc)
+        record_gmail_api_status(api_credentials, False, str(exc))
     except GmailCredentialSendError as exc:
         _logger().error("Failed to send email: %s", exc)
     return False
 
 
-def get_gmail_api_status(
-    credentials: GmailCredential | None = None,
-) -> dict[str, str] | None:
-    """Return the connection status for stored Gmail API credentials."""
+def _status_credentials(
+    creds: GmailCredential | None,
+) -> dict[str, str | None] | None:
+    """Return API credentials from *creds*, or ``None`` if incomplete."""
 
-    creds = credentials or _get_db_credentials()
     if not creds:
         return None
-
     api_credentials = {
         "client_id": creds.api_client_id,
         "client_secret": creds.api_client_secret,
         "refresh_token": creds.api_refresh_token,
         "user_email": creds.api_from_email or creds.from_email or creds.username,
     }
+    if not all(api_credentials.values()):
+        return None
+    return api_credentials
+
+
+def _status_fingerprint(api_credentials: dict[str, str | None]) -> str:
+    raw = "|".join(
+        str(api_credentials.get(key) or "")
+        for key in ("client_id", "refresh_token", "user_email")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def record_gmail_api_status(
+    api_credentials: dict[str, str | None], connected: bool, message: str
+) -> None:
+    """Cache a connection status learnt from a token refresh or a real send."""
+
+    from .. import cache
 
-    if not all(
-        (
-            api_credentials["client_id"],
-            api_credentials["client_secret"],
-            api_credentials["refresh_token"],
-            api_credentials["user_email"],
+    try:
+        cache.set(
+            _STATUS_CACHE_KEY,
+            {
+                "fingerprint": _status_fingerprint(api_credentials),
+                "connected": connected,
+                "message": message,
+                "checked_at": time.time(),
+            },
+            timeout=0,
         )
+    except RuntimeError:  # pragma: no cover - outside an application context
+        _logger().debug("Gmail status not cached: no application context")
+
+
+def invalidate_gmail_api_status() -> None:
+    from .. import cache
+
+    cache.delete(_STATUS_CACHE_KEY)
+
+
+def _cached_status(api_credentials: dict[str, str | None]) -> dict | None:
+    """Return the cached status if it belongs to *api_credentials*."""
+
+    from .. import cache
+
+    entry = cache.get(_STATUS_CACHE_KEY)
+    if entry and entry.get("fingerprint") == _status_fingerprint(
+        api_credentials
     ):
+        return entry
+    return None
+
+
+def _refresh_status(api_credentials: dict[str, str | None]) -> None:
+    status = _check_api_status(api_credentials)
+    record_gmail_api_status(
+        api_credentials, status["connected"], status["message"]
+    )
+
+
+def cached_gmail_api_status(
+    credentials: GmailCredential | None = None,
+) -> dict[str, str] | None:
+    """Return the Gmail API connection status without calling Google.
+
+    The last known status is served from the app cache; once it is older
+    than ``GMAIL_STATUS_TTL`` (or unknown for the current credentials) a
+    token refresh runs in the background to update it. Until a first result
+    exists the status is reported as ``connected=None`` ("checking").
+    Returns ``None`` when the API credentials are not configured.
+    """
+
+    api_credentials = _status_credentials(credentials or _get_db_credentials())
+    if api_credentials is None:
+        return None
+    entry = _cached_status(api_credentials)
+    ttl = current_app.config.get("GMAIL_STATUS_TTL", GMAIL_STATUS_TTL)
+    if entry is None or time.time() - entry["checked_at"] > ttl:
+        run_detached("gmail_api_status", _refresh_status, api_credentials)
+        # Inline runs (tests) have already stored a result
+        entry = _cached_status(api_credentials) or entry
+    if entry is None:
+        return {
+            "connected": None,
+            "message": "Checking the Gmail API connection...",
+        }
+    return {"connected": entry["connected"], "message": entry["message"]}
+
+
+def get_gmail_api_status(
+    credentials: GmailCredential | None = None,
+) -> dict[str, str] | None:
+    """Return the connection status for stored Gmail API credentials.
+
+    This refreshes an OAuth token against Google on every call; pages should
+    use :func:`cached_gmail_api_status` instead.
+    """
+
+    api_credentials = _status_credentials(credentials or _get_db_credentials())
+    if api_credentials is None:
         return None
+    return _check_api_status(api_credentials)
+
+
+def _check_api_status(api_credentials: dict[str, str | None]) -> dict:
+    """Refresh an access token to find out whether *api_credentials* work."""
 
     try:
         _refresh_access_token(api_credentials)
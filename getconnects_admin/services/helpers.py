@@ -22,3 +22,23 @@ def get_session() -> Iterator[SessionLocal]:
         yield session
     finally:
         session.close()
+
+
+def dialect_insert(session, model):
+    """Return an ``INSERT`` for *model* supporting ``ON CONFLICT`` clauses.
+
+    PostgreSQL and SQLite both implement ``on_conflict_do_nothing`` and
+    ``on_conflict_do_update``; the matching dialect construct is chosen from
+    the engine bound to *session*.
+    """
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - only PostgreSQL and SQLite are supported
+        raise RuntimeError(
+            f"Upserts are not supported for dialect {dialect!r}"
+        )
+    return insert(model)
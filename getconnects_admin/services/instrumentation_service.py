@@ -0,0 +1,241 @@
+"""Per-request SQL, template and outbound HTTP timing.
+
+:func:`init_app` hooks into the shared engine and the Flask request cycle.
+For every request it counts SQL statements and sums the time spent in the
+database, in template rendering and in calls made through
+:func:`external_call`. The totals are reported in a ``Server-Timing``
+response header, which browsers show in their network panel. The header is
+only sent to staff sessions, as it reveals how much work a request caused::
+
+    Server-Timing: db;dur=12.4;desc="7 queries", render;dur=3.1,
+                   http;dur=0.0;desc="0 calls", total;dur=18.9
+
+Statements slower than ``SLOW_QUERY_MS`` are logged with their normalised
+SQL and the route that issued them. ``QUERY_BUDGETS`` caps the number of
+statements per endpoint: requests over budget are logged, or fail with
+:class:`QueryBudgetExceeded` when ``QUERY_BUDGET_STRICT`` is set, as it is
+in the testing configuration.
+
+Queries issued while a template renders (lazy loads) count towards both
+``db`` and ``render``.
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from flask import (
+    before_render_template,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+    session,
+    template_rendered,
+)
+from sqlalchemy import event
+
+try:
+    from ..models import engine
+except ImportError:  # pragma: no cover
+    from models import engine
+from .auth_decorators import _refresh_if_stale
+from .metrics_service import observe_external, observe_request
+
+logger = logging.getLogger(__name__)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a request issues more statements than its budget allows."""
+
+
+@dataclass
+class RequestTiming:
+    start: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db: float = 0.0
+    render: float = 0.0
+    external: float = 0.0
+    external_calls: int = 0
+    _render_start: list[float] = field(default_factory=list)
+
+    def header(self) -> str:
+        total = time.perf_counter() - self.start
+        return ", ".join(
+            [
+                f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+                f"render;dur={self.render * 1000:.1f}",
+                f"http;dur={self.external * 1000:.1f}"
+                f';desc="{self.external_calls} calls"',
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+def current_timing() -> RequestTiming | None:
+    """Return the timing of the request being handled, if any."""
+
+    if not has_request_context():
+        return None
+    return g.get("request_timing")
+
+
+def normalize_sql(statement: str) -> str:
+    """Return *statement* with literals, bind markers and IN lists collapsed.
+
+    Statements differing only in their values normalise to the same text,
+    so slow-query logs can be grouped.
+    """
+
+    sql = _STRINGS.sub("?", statement)
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _LISTS.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _route() -> str:
+    if not has_request_context():
+        return "-"
+    rule = request.url_rule or request.path
+    return f"{request.method} {rule} ({request.endpoint})"
+
+
+@dataclass
+class ExternalCall:
+    service: str
+    status: int | None = None
+
+
+@contextmanager
+def external_call(service: str) -> Iterator[ExternalCall]:
+    """Time the wrapped outbound HTTP call for the request and the metrics.
+
+    The call counts as failed when the block raises or when the caller sets
+    ``status`` on the yielded object to an HTTP error status.
+    """
+
+    call = ExternalCall(service)
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield call
+        failed = call.status is not None and call.status >= 400
+    finally:
+        observe_external(service, time.perf_counter() - start, failed)
+        timing = current_timing()
+        if timing is not None:
+            timing.external += time.perf_counter() - start
+            timing.external_calls += 1
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    elapsed = time.perf_counter() - context._instrumentation_start
+    timing = current_timing()
+    if timing is not None:
+        timing.queries += 1
+        timing.db += elapsed
+    if has_app_context() and elapsed * 1000 >= current_app.config.get(
+        "SLOW_QUERY_MS", 250
+    ):
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s",
+            elapsed * 1000,
+            _route(),
+            normalize_sql(statement),
+        )
+
+
+def _before_render(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None:
+        timing._render_start.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    timing = current_timing()
+    if timing is not None and timing._render_start:
+        timing.render += time.perf_counter() - timing._render_start.pop()
+
+
+def _staff_session() -> bool:
+    if not (session.get("is_staff") or session.get("is_superuser")):
+        return False
+    # Flags may be stale on routes that do not check permissions
+    _refresh_if_stale()
+    return bool(session.get("is_staff") or session.get("is_superuser"))
+
+
+def _start_request() -> None:
+    g.request_timing = RequestTiming()
+
+
+def _finish_request(response):
+    timing = g.pop("request_timing", None)
+    if timing is None:
+        return response
+    observe_request(
+        request.endpoint,
+        request.method,
+        response.status_code,
+        time.perf_counter() - timing.start,
+    )
+    config = current_app.config
+    budget = config.get("QUERY_BUDGETS", {}).get(request.endpoint)
+    if budget is not None and timing.queries > budget:
+        message = (
+            f"{_route()} issued {timing.queries} queries, budget is {budget}"
+        )
+        if config.get("QUERY_BUDGET_STRICT"):
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded: %s", message)
+    if config.get("SERVER_TIMING", True) and _staff_session():
+        response.headers["Server-Timing"] = timing.header()
+    return response
+
+
+def init_app(app) -> None:
+    """Install the request hooks on *app*; the engine hooks once per process.
+
+    Call before other ``before_request`` handlers so requests they
+    short-circuit are still timed.
+    """
+
+    if not event.contains(
+        engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+__all__ = [
+    "ExternalCall",
+    "QueryBudgetExceeded",
+    "RequestTiming",
+    "current_timing",
+    "external_call",
+    "init_app",
+    "normalize_sql",
+]
@@ -0,0 +1,338 @@
+"""Background job execution, progress tracking and locking.
+
+Long-running work (JustCall syncs, bulk lead updates) is recorded in
+``background_jobs`` and executed on a small per-process thread pool so
+requests return immediately. Jobs that must not overlap across gunicorn
+workers or nodes take a lease in ``job_locks``; the lease expires on its own
+if the holder dies.
+
+With ``RUN_JOBS_INLINE`` set (the testing configuration) jobs run
+synchronously in the calling thread.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+try:
+    from ..models.background_job import BackgroundJob
+    from ..models.job_lock import JobLock
+except ImportError:  # pragma: no cover
+    from models.background_job import BackgroundJob
+    from models.job_lock import JobLock
+from .helpers import dialect_insert, get_session
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lock owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_detached_running: set[str] = set()
+
+
+class JobSkipped(Exception):
+    """Raised by a job that decided not to run (e.g. lock held elsewhere)."""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = current_app.config.get("JOB_WORKERS", 2)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="job"
+            )
+        return _executor
+
+
+def _set_job(job_id: int, **values) -> None:
+    with get_session() as session:
+        session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(**values)
+        )
+        session.commit()
+
+
+def _run(app, job_id: int, func: Callable, args: tuple, kwargs: dict) -> None:
+    with app.app_context():
+        _set_job(job_id, status="running", started_at=datetime.utcnow())
+        try:
+            result = func(job_id, *args, **kwargs)
+        except JobSkipped as exc:
+            _set_job(
+                job_id,
+                status="skipped",
+                error=str(exc),
+                finished_at=datetime.utcnow(),
+            )
+        except Exception as exc:
+            logger.exception("Background job %s failed", job_id)
+            _set_job(
+                job_id,
+                status="failed",
+                error=str(exc),
+                finished_at=datetime.utcnow(),
+            )
+        else:
+            _set_job(
+                job_id,
+                status="succeeded",
+                result=result,
+                finished_at=datetime.utcnow(),
+            )
+
+
+def start_job(
+    name: str, func: Callable, *args, total: int | None = None, **kwargs
+) -> int:
+    """Record a job called *name* and run ``func(job_id, *args, **kwargs)``.
+
+    The return value of *func* is stored as the job's JSON ``result``.
+    Returns the new job id.
+    """
+
+    with get_session() as session:
+        job = BackgroundJob(
+            name=name, status="pending", progress=0, total=total
+        )
+        session.add(job)
+        session.commit()
+        job_id = job.id
+    app = current_app._get_current_object()
+    if app.config.get("RUN_JOBS_INLINE"):
+        _run(app, job_id, func, args, kwargs)
+    else:
+        _get_executor().submit(_run, app, job_id, func, args, kwargs)
+    return job_id
+
+
+def _release_after(
+    job_id: int, lock_name: str, func: Callable, *args, **kwargs
+):
+    try:
+        return func(job_id, *args, **kwargs)
+    finally:
+        release_lock(lock_name)
+
+
+def start_locked_job(
+    name: str, lock_name: str, ttl: int, func: Callable, *args, **kwargs
+) -> int | None:
+    """Like :func:`start_job`, but only while holding the lease *lock_name*.
+
+    The lease is taken before the job row is written, so concurrent callers
+    create at most one job; it is released when the job ends or expires
+    after *ttl* seconds if its worker dies. Returns ``None`` without
+    recording anything when the lease is held elsewhere.
+    """
+
+    if not acquire_lock(lock_name, ttl):
+        return None
+    try:
+        return start_job(
+            name, _release_after, lock_name, func, *args, **kwargs
+        )
+    except Exception:
+        release_lock(lock_name)
+        raise
+
+
+def run_detached(key: str, func: Callable, *args) -> bool:
+    """Run ``func(*args)`` on a daemon thread unless *key* is already running.
+
+    Meant for short cache refreshes that are not worth a ``background_jobs``
+    row. Returns ``False`` when a run for *key* is still in flight.
+    """
+
+    app = current_app._get_current_object()
+    if app.config.get("RUN_JOBS_INLINE"):
+        func(*args)
+        return True
+    with _executor_lock:
+        if key in _detached_running:
+            return False
+        _detached_running.add(key)
+
+    def _target() -> None:
+        try:
+            with app.app_context():
+                func(*args)
+        except Exception:  # pragma: no cover - logged, next call retries
+            logger.exception("Detached task %s failed", key)
+        finally:
+            with _executor_lock:
+                _detached_running.discard(key)
+
+    threading.Thread(
+        target=_target, name=f"detached-{key}", daemon=True
+    ).start()
+    return True
+
+
+def update_job_progress(
+    job_id: int | None, progress: int, total: int | None = None
+) -> None:
+    """Record how far a running job has got."""
+
+    if job_id is None:
+        return
+    values = {"progress": progress}
+    if total is not None:
+        values["total"] = total
+    _set_job(job_id, **values)
+
+
+def _as_dict(job: BackgroundJob | None) -> dict | None:
+    if job is None:
+        return None
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def get_job(job_id: int) -> dict | None:
+    with get_session() as session:
+        return _as_dict(session.get(BackgroundJob, job_id))
+
+
+def latest_job(
+    name: str, finished: bool = False, skipped: bool = True
+) -> dict | None:
+    """Return the most recent job called *name*.
+
+    *finished* limits the search to jobs that ended; ``skipped=False``
+    ignores jobs that ended without doing anything.
+    """
+
+    with get_session() as session:
+        query = select(BackgroundJob).where(BackgroundJob.name == name)
+        if finished:
+            query = query.where(BackgroundJob.finished_at.isnot(None))
+        if not skipped:
+            query = query.where(BackgroundJob.status != "skipped")
+        job = session.execute(
+            query.order_by(BackgroundJob.id.desc()).limit(1)
+        ).scalar()
+        return _as_dict(job)
+
+
+def acquire_lock(name: str, ttl: int) -> bool:
+    """Take the lease *name* for *ttl* seconds if it is free or expired."""
+
+    now = datetime.utcnow()
+    with get_session() as session:
+        stmt = dialect_insert(session, JobLock).values(
+            name=name, owner=WORKER_ID, expires_at=now + timedelta(seconds=ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "owner": stmt.excluded.owner,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=JobLock.expires_at < now,
+        )
+        acquired = session.execute(stmt).rowcount == 1
+        session.commit()
+    return acquired
+
+
+def lock_held(name: str) -> bool:
+    """Return whether an unexpired lease *name* is held by any worker."""
+
+    with get_session() as session:
+        expires_at = session.execute(
+            select(JobLock.expires_at).where(JobLock.name == name)
+        ).scalar()
+    return expires_at is not None and expires_at > datetime.utcnow()
+
+
+def release_lock(name: str) -> None:
+    with get_session() as session:
+        session.execute(
+            delete(JobLock).where(
+                JobLock.name == name, JobLock.owner == WORKER_ID
+            )
+        )
+        session.commit()
+
+
+@contextmanager
+def job_lock(name: str, ttl: int) -> Iterator[bool]:
+    """Yield whether the lease *name* was acquired, releasing it afterwards."""
+
+    acquired = acquire_lock(name, ttl)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            release_lock(name)
+
+
+def schedule_periodic(
+    app, name: str, interval: int, func: Callable
+) -> threading.Thread:
+    """Start a daemon thread calling ``func()`` every *interval* seconds.
+
+    Every worker process runs its own scheduler; *func* is expected to take
+    a lease (:func:`acquire_lock`, :func:`start_locked_job`) so only one of
+    them does the work per interval.
+    """
+
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    func()
+                except (
+                    Exception
+                ):  # pragma: no cover - logged and retried next tick
+                    logger.exception("Scheduled job %s failed", name)
+
+    thread = threading.Thread(
+        target=_loop, name=f"schedule-{name}", daemon=True
+    )
+    thread.stop = stop
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "JobSkipped",
+    "WORKER_ID",
+    "acquire_lock",
+    "get_job",
+    "job_lock",
+    "latest_job",
+    "lock_held",
+    "release_lock",
+    "run_detached",
+    "schedule_periodic",
+    "start_job",
+    "start_locked_job",
+    "update_job_progress",
+]
@@ -9,31 +9,73 @@ be easily mocked during tests.
 from __future__ import annotations
 
 import base64
+import hashlib
+import json
 import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import requests
+from flask import current_app
+from sqlalchemy import select
 
 try:
     from ..models.campaign import Campaign
+    from ..models.justcall_credential import JustCallCredential
     from ..models.campaign_lead_type import CampaignLeadType
     from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
     from ..models.lead_type import LeadType
     from ..models.lead_type_group import LeadTypeGroup
 except ImportError:  # pragma: no cover
     from models.campaign import Campaign
+    from models.justcall_credential import JustCallCredential
     from models.campaign_lead_type import CampaignLeadType
     from models.campaign_lead_type_group import CampaignLeadTypeGroup
     from models.lead_type import LeadType
     from models.lead_type_group import LeadTypeGroup
-from .helpers import get_session
+from .helpers import dialect_insert, get_session
+from .instrumentation_service import external_call
+from .job_service import JobSkipped, acquire_lock, start_locked_job
+from .lead_type_service import mark_effective_lead_types_stale
 
 # Base URL for the JustCall Sales Dialer API
 JUSTCALL_API_BASE = "https://api.justcall.io/v2.1/sales_dialer"
+# Largest page size accepted by the campaigns endpoint
+CAMPAIGNS_PER_PAGE = 100
+# Parallel page requests when fetching campaigns
+FETCH_CONCURRENCY = 4
+
+CAMPAIGN_SYNC_JOB = "campaign_sync"
 
 logger = logging.getLogger(__name__)
 
 
+def _auth_headers(api_key: str, api_secret: str) -> dict:
+    encoded_key_secret = base64.b64encode(
+        f"{api_key}:{api_secret}".encode()
+    ).decode()
+    return {"Authorization": f"Basic {encoded_key_secret}"}
+
+
+def _fetch_campaign_page(headers: dict, page: int) -> dict:
+    with external_call("justcall"):
+        resp = requests.get(
+            f"{JUSTCALL_API_BASE}/campaigns",
+            headers=headers,
+            params={"page": page, "per_page": CAMPAIGNS_PER_PAGE},
+            timeout=10,
+        )
+        resp.raise_for_status()
+    return resp.json()
+
+
 def fetch_campaigns(api_key: str, api_secret: str) -> list[dict]:
-    """Fetch campaigns from the JustCall Sales Dialer API.
+    """Fetch all campaigns from the JustCall Sales Dialer API.
+
+    The first page tells us the total count, after which the remaining pages
+    are requested concurrently. Responses without a total fall back to
+    following ``next_page_link`` one page at a time.
 
     Parameters
     ----------
@@ -43,122 +85,306 @@ def fetch_campaigns(api_key: str, api_secret: str) -> list[dict]:
         JustCall API secret.
     """
 
-    encoded_key_secret = base64.b64encode(
-        f"{api_key}:{api_secret}".encode()
-    ).decode()
-    headers = {"Authorization": f"Basic {encoded_key_secret}"}
+    headers = _auth_headers(api_key, api_secret)
     try:
-        resp = requests.get(
-            f"{JUSTCALL_API_BASE}/campaigns", headers=headers, timeout=10
-        )
-        resp.raise_for_status()
+        first = _fetch_campaign_page(headers, 0)
+        campaigns = list(first.get("data", []))
+        total = first.get("total_count")
+        per_page = first.get("per_page") or CAMPAIGNS_PER_PAGE
+        if total is not None:
+            pages = range(1, math.ceil(int(total) / int(per_page)))
+            with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+                for body in pool.map(
+                    partial(_fetch_campaign_page, headers), pages
+                ):
+                    campaigns.extend(body.get("data", []))
+        else:
+            body, page = first, 0
+            while body.get("next_page_link") and body.get("data"):
+                page += 1
+                body = _fetch_campaign_page(headers, page)
+                campaigns.extend(body.get("data", []))
     except requests.exceptions.RequestException:
         logger.exception("Failed to fetch campaigns from JustCall API")
         return []
-    return resp.json().get("data", [])
+    return campaigns
+
 
+def campaign_hash(camp: dict) -> str:
+    """Return a stable digest of a campaign payload for change detection."""
 
-def sync_campaigns(campaigns: list[dict]) -> None:
+    canonical = json.dumps(
+        camp, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Ids per ``IN (...)`` lookup when preloading existing rows
+_PRELOAD_CHUNK = 500
+
+
+def _groups_for(camp: dict) -> list[tuple[str, str, list]]:
+    """Return ``(group_id, group_name, dispositions)`` for a campaign payload.
+
+    JustCall either embeds full disposition group objects or only references
+    a single group by id; both shapes are normalised here and duplicates are
+    dropped.
+    """
+
+    groups_info = camp.get("disposition_groups")
+    if groups_info is None:
+        group_info = camp.get("disposition_group") or camp.get(
+            "disposition_group_id"
+        )
+        groups_info = [group_info] if group_info else []
+
+    groups = []
+    seen = set()
+    for group_info in groups_info:
+        if isinstance(group_info, dict):
+            group_id = group_info.get("id")
+            name = group_info.get("name", "")
+            dispositions = group_info.get("dispositions", [])
+        else:
+            group_id = group_info
+            name = camp.get("disposition_group_name", "")
+            dispositions = []
+        if not group_id or str(group_id) in seen:
+            continue
+        seen.add(str(group_id))
+        groups.append((str(group_id), name, dispositions))
+    return groups
+
+
+def _preload(session, columns, key, ids) -> dict:
+    """Return existing rows for *ids* keyed by *key*, in chunked queries."""
+
+    ids = list(ids)
+    found = {}
+    for start in range(0, len(ids), _PRELOAD_CHUNK):
+        chunk = ids[start : start + _PRELOAD_CHUNK]
+        for row in session.execute(select(*columns).where(key.in_(chunk))):
+            found[row[0]] = tuple(row[1:])
+    return found
+
+
+def _insert_ignore(session, model, rows: list[dict]) -> None:
+    if rows:
+        session.execute(
+            dialect_insert(session, model).on_conflict_do_nothing(), rows
+        )
+
+
+def _upsert(session, model, rows: list[dict], columns: list[str]) -> None:
+    if not rows:
+        return
+    stmt = dialect_insert(session, model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={column: stmt.excluded[column] for column in columns},
+    )
+    session.execute(stmt, rows)
+
+
+def sync_campaigns(campaigns: list[dict]) -> dict[str, int]:
     """Synchronise campaign and lead type data into the database.
 
-    Existing campaigns, lead type groups and lead types are updated in
-    place; new objects are created as needed. The function is idempotent so
-    running it multiple times with the same data will not create
-    duplicates.
+    Existing campaigns are preloaded with a handful of ``IN`` queries and
+    campaigns whose payload hash matches the previous sync are skipped
+    outright. The rest are normalised in memory and applied with one
+    ``INSERT ... ON CONFLICT`` statement per table. Only new or changed
+    campaigns and groups are written; lead types and the mapping tables are
+    insert-only so existing notification settings are preserved. The
+    function is idempotent.
+
+    Returns counts of ``created``, ``updated`` and ``unchanged`` campaigns.
     """
 
+    payloads = {str(camp.get("id")): camp for camp in campaigns}
+    hashes = {
+        campaign_id: campaign_hash(camp)
+        for campaign_id, camp in payloads.items()
+    }
+
+    camp_rows: dict[str, dict] = {}
+    group_names: dict[str, str] = {}
+    disp_rows: dict[str, dict] = {}
+    group_links: set[tuple[str, str]] = set()
+    type_links: set[tuple[str, str]] = set()
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+
     with get_session() as session:
-        for camp in campaigns:
-            campaign_id = str(camp.get("id"))
-            campaign = session.get(Campaign, campaign_id)
-            if campaign is None:
-                campaign = Campaign(
-                    id=campaign_id,
-                    campaign_name=camp.get("name", ""),
-                    status=camp.get("status"),
-                )
-                session.add(campaign)
-                session.flush()
+        existing_camps = _preload(
+            session,
+            [
+                Campaign.id,
+                Campaign.campaign_name,
+                Campaign.status,
+                Campaign.sync_hash,
+            ],
+            Campaign.id,
+            payloads,
+        )
+
+        for campaign_id, camp in payloads.items():
+            current = existing_camps.get(campaign_id)
+            if current is not None and current[2] == hashes[campaign_id]:
+                # Identical payload to the last sync: nothing below can differ
+                counts["unchanged"] += 1
+                continue
+            row = {
+                "id": campaign_id,
+                "campaign_name": camp.get("name", ""),
+                "status": camp.get("status"),
+                "sync_hash": hashes[campaign_id],
+            }
+            if current is None:
+                counts["created"] += 1
+            elif current[:2] != (row["campaign_name"], row["status"]):
+                counts["updated"] += 1
             else:
-                campaign.campaign_name = camp.get("name", "")
-                campaign.status = camp.get("status")
-
-            groups_info = camp.get("disposition_groups")
-            if groups_info is None:
-                group_info = (
-                    camp.get("disposition_group")
-                    or camp.get("disposition_group_id")
-                )
-                groups_info = [group_info] if group_info else []
-
-            seen_groups = set()
-            for group_info in groups_info:
-                if isinstance(group_info, dict):
-                    group_id = group_info.get("id")
-                    if not group_id:
-                        continue
-                    group_id = str(group_id)
-                    if group_id in seen_groups:
-                        continue
-                    seen_groups.add(group_id)
-                    group_name = group_info.get("name", "")
-                    dispositions = group_info.get("dispositions", [])
-                else:
-                    if not group_info:
-                        continue
-                    group_id = str(group_info)
-                    if group_id in seen_groups:
-                        continue
-                    seen_groups.add(group_id)
-                    group_name = camp.get("disposition_group_name", "")
-                    dispositions = []
-
-                dg = session.get(LeadTypeGroup, group_id)
-                if dg is None:
-                    dg = LeadTypeGroup(id=group_id, name=group_name)
-                    session.add(dg)
-                elif group_name:
-                    dg.name = group_name
-
-                if not session.get(
-                    CampaignLeadTypeGroup, (campaign.id, dg.id)
-                ):
-                    session.add(
-                        CampaignLeadTypeGroup(
-                            campaign_id=campaign.id, lead_type_group_id=dg.id
-                        )
-                    )
+                counts["unchanged"] += 1
+            camp_rows[campaign_id] = row
 
+            for group_id, group_name, dispositions in _groups_for(camp):
+                if group_name or group_id not in group_names:
+                    group_names[group_id] = group_name
+                group_links.add((campaign_id, group_id))
                 seen_disps = set()
                 for disp in dispositions:
-
                     disp_id = disp.get("id")
-                    if not disp_id:
+                    if not disp_id or str(disp_id) in seen_disps:
                         continue
                     disp_id = str(disp_id)
-                    if disp_id in seen_disps:
-                        continue
                     seen_disps.add(disp_id)
+                    disp_rows.setdefault(
+                        disp_id,
+                        {
+                            "id": disp_id,
+                            "name": disp.get("name", ""),
+                            "group_id": group_id,
+                        },
+                    )
+                    type_links.add((campaign_id, disp_id))
+
+        existing_groups = _preload(
+            session,
+            [LeadTypeGroup.id, LeadTypeGroup.name],
+            LeadTypeGroup.id,
+            group_names,
+        )
+        existing_types = _preload(
+            session, [LeadType.id, LeadType.name], LeadType.id, disp_rows
+        )
 
-                    d = session.get(LeadType, disp_id)
-                    if d is None:
-                        d = LeadType(
-                            id=disp_id,
-                            name=disp.get("name", ""),
-                            group=dg,
-                        )
-                        session.add(d)
-
-                    if not session.get(
-                        CampaignLeadType, (campaign.id, d.id)
-                    ):
-                        session.add(
-                            CampaignLeadType(
-                                campaign_id=campaign.id,
-                                lead_type_id=d.id,
-                                lead_type_name=d.name,
-                                sms_enabled=False,
-                                email_enabled=False,
-                            )
-                        )
+        changed_groups = [
+            {"id": group_id, "name": name}
+            for group_id, name in group_names.items()
+            if group_id not in existing_groups
+            or (name and existing_groups[group_id] != (name,))
+        ]
+        new_types = [
+            row
+            for disp_id, row in disp_rows.items()
+            if disp_id not in existing_types
+        ]
+        # Existing lead types keep their stored name on new mappings
+        type_names = {
+            disp_id: row["name"] for disp_id, row in disp_rows.items()
+        }
+        type_names.update(
+            {disp_id: name for disp_id, (name,) in existing_types.items()}
+        )
+
+        _upsert(
+            session,
+            Campaign,
+            list(camp_rows.values()),
+            ["campaign_name", "status", "sync_hash"],
+        )
+        _upsert(session, LeadTypeGroup, changed_groups, ["name"])
+        _insert_ignore(session, LeadType, new_types)
+        _insert_ignore(
+            session,
+            CampaignLeadTypeGroup,
+            [
+                {"campaign_id": campaign_id, "lead_type_group_id": group_id}
+                for campaign_id, group_id in sorted(group_links)
+            ],
+        )
+        _insert_ignore(
+            session,
+            CampaignLeadType,
+            [
+                {
+                    "campaign_id": campaign_id,
+                    "lead_type_id": disp_id,
+                    "lead_type_name": type_names[disp_id],
+                    "sms_enabled": False,
+                    "email_enabled": False,
+                }
+                for campaign_id, disp_id in sorted(type_links)
+            ],
+        )
+        mark_effective_lead_types_stale(
+            session,
+            campaign_ids=camp_rows,
+            group_ids={row["group_id"] for row in new_types},
+        )
         session.commit()
+    logger.info("Synchronised campaigns: %s", counts)
+    return counts
+
+
+def _credentials() -> tuple[str, str] | None:
+    with get_session() as session:
+        creds = session.query(JustCallCredential).first()
+        return (creds.api_key, creds.api_secret) if creds else None
+
+
+def campaign_sync_configured() -> bool:
+    """Return whether JustCall credentials are stored."""
+
+    return _credentials() is not None
+
+
+def _run_campaign_sync(job_id: int) -> dict[str, int]:
+    """Job body: fetch every campaign and sync it."""
+
+    creds = _credentials()
+    if creds is None:
+        # Removed after the sync was queued
+        raise JobSkipped("No API credentials configured")
+    return sync_campaigns(fetch_campaigns(*creds))
+
+
+def start_campaign_sync() -> int | None:
+    """Queue a background campaign sync and return its job id.
+
+    The sync lease is taken before the job is recorded, so ``None`` is
+    returned, and nothing recorded, while another worker is syncing.
+    """
+
+    ttl = current_app.config.get("CAMPAIGN_SYNC_LOCK_SECONDS", 900)
+    return start_locked_job(
+        CAMPAIGN_SYNC_JOB, CAMPAIGN_SYNC_JOB, ttl, _run_campaign_sync
+    )
+
+
+def scheduled_campaign_sync() -> int | None:
+    """Start a sync from the periodic scheduler unless one is due elsewhere.
+
+    Every worker runs the scheduler. The first to take the interval's
+    lease starts the sync and the others' ticks are ignored; nothing is
+    recorded when no credentials are configured.
+    """
+
+    if not campaign_sync_configured():
+        return None
+    interval = current_app.config.get("CAMPAIGN_SYNC_INTERVAL", 0)
+    # Never released: it expires when the next interval is due, less a
+    # second so the same worker's next tick finds it free
+    tick = f"{CAMPAIGN_SYNC_JOB}:scheduled"
+    if not acquire_lock(tick, max(interval - 1, 1)):
+        return None
+    return start_campaign_sync()
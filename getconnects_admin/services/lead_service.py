@@ -6,6 +6,7 @@ from flask import current_app, flash
 
 from .sms_service import send_sms
 from .email_service import send_email
+from sqlalchemy import and_, case, delete, func, or_, select, update
 from sqlalchemy.inspection import inspect
 
 try:
@@ -25,6 +26,42 @@ except ImportError:  # pragma: no cover
     from models.lead_type import LeadType
     from models.notification_log import NotificationLog
 from .helpers import get_session
+from .job_service import start_job, update_job_progress
+from .metrics_service import record_lead_created
+from .notification_service import flush_notification_logs, record_notification
+
+LEAD_REASSIGNMENT_JOB = "lead_reassignment"
+BULK_DELETE_JOB = "lead_bulk_delete"
+BULK_UPDATE_JOB = "lead_bulk_update"
+
+# A lead belongs to its campaign's client. ``leads.client_id`` is a
+# denormalised copy that :func:`start_lead_reassignment` brings up to date
+# after a campaign changes owner, so reads derive the owner through the
+# campaign instead. Queries using this must outer join ``Campaign``.
+LEAD_CLIENT_ID = case(
+    (Campaign.id.is_(None), Lead.client_id), else_=Campaign.client_id
+)
+
+
+def lead_client_filter(session, client_id: int):
+    """Return a filter for the leads *client_id* owns.
+
+    Equivalent to ``LEAD_CLIENT_ID == client_id``, but no index can serve a
+    comparison with the ``CASE`` expression. The client's campaign ids are
+    looked up first and inlined: with an ``IN`` subquery under the ``OR``
+    neither SQLite nor PostgreSQL use an index, while an ``IN`` list lets
+    both combine the ``campaign_id`` and ``client_id`` indexes.
+    """
+
+    campaign_ids = list(
+        session.execute(
+            select(Campaign.id).where(Campaign.client_id == client_id)
+        ).scalars()
+    )
+    return or_(
+        Lead.campaign_id.in_(campaign_ids),
+        and_(Lead.campaign_id.is_(None), Lead.client_id == client_id),
+    )
 
 
 def _logger():
@@ -93,11 +130,19 @@ def _strip_html(html: str) -> str:
 
 
 def _query_leads(session, client_id=None, campaign_id=None, lead_type=None,
-                 start_date=None, end_date=None):
-    """Internal helper to build a filtered lead query."""
-    query = session.query(Lead)
+                 start_date=None, end_date=None, lead_ids=None):
+    """Internal helper to build a filtered lead query.
+
+    ``Campaign`` is outer joined so callers can select its columns and
+    :data:`LEAD_CLIENT_ID`.
+    """
+    query = session.query(Lead).outerjoin(
+        Campaign, Campaign.id == Lead.campaign_id
+    )
+    if lead_ids is not None:
+        query = query.filter(Lead.id.in_(lead_ids))
     if client_id:
-        query = query.filter(Lead.client_id == client_id)
+        query = query.filter(lead_client_filter(session, client_id))
     if campaign_id:
         query = query.filter(Lead.campaign_id == campaign_id)
     if lead_type:
@@ -109,6 +154,14 @@ def _query_leads(session, client_id=None, campaign_id=None, lead_type=None,
     return query
 
 
+def _with_names(query):
+    """Add campaign and client names to a :func:`_query_leads` query."""
+
+    return query.add_columns(
+        Campaign.campaign_name, Client.company_name
+    ).outerjoin(Client, Client.id == LEAD_CLIENT_ID)
+
+
 def list_leads(
     client_id: int | None = None,
     campaign_id: str | None = None,
@@ -136,8 +189,10 @@ def list_leads(
             end_date=end_date,
         )
 
+        rows = _with_names(query).all()
+
         results = []
-        for lead in query.all():
+        for lead, campaign_name, company_name in rows:
             results.append(
                 {
                     "id": lead.id,
@@ -147,13 +202,9 @@ def list_leads(
                     "email": lead.email,
                     "company": lead.company,
                     "secondary_phone": lead.secondary_phone,
-                    "client": (
-                        lead.client.company_name if lead.client else "None"
-                    ),
+                    "client": company_name or "None",
                     "campaign_id": lead.campaign_id,
-                    "campaign": (
-                        lead.campaign.campaign_name if lead.campaign else None
-                    ),
+                    "campaign": campaign_name,
                     "lead_type": lead.lead_type,
                     "caller_name": lead.caller_name,
                     "caller_number": lead.caller_number,
@@ -194,15 +245,16 @@ def list_leads_paginated(
             end_date=end_date,
         )
         total = query.count()
-        leads = (
-            query.order_by(Lead.id)
+        rows = (
+            _with_names(query)
+            .order_by(Lead.id)
             .offset((page - 1) * per_page)
             .limit(per_page)
             .all()
         )
 
         results = []
-        for lead in leads:
+        for lead, campaign_name, company_name in rows:
             results.append(
                 {
                     "id": lead.id,
@@ -212,9 +264,9 @@ def list_leads_paginated(
                     "email": lead.email,
                     "company": lead.company,
                     "secondary_phone": lead.secondary_phone,
-                    "client": lead.client.company_name if lead.client else "None",
+                    "client": company_name or "None",
                     "campaign_id": lead.campaign_id,
-                    "campaign": lead.campaign.campaign_name if lead.campaign else None,
+                    "campaign": campaign_name,
                     "lead_type": lead.lead_type,
                     "caller_name": lead.caller_name,
                     "caller_number": lead.caller_number,
@@ -239,6 +291,7 @@ def create_lead(
     caller_number: str | None = None,
     notes: str | None = None,
     flash_error: bool = True,
+    notification_logs: list[dict] | None = None,
 ) -> tuple[bool, str | None]:
     """Create a new :class:`Lead` record in the database.
 
@@ -249,6 +302,12 @@ def create_lead(
         failure.  Bulk operations may disable this to avoid spamming the
         user with repeated messages and instead handle reporting
         themselves.
+    notification_logs:
+        Optional buffer (see
+        :func:`~.notification_service.notification_log_buffer`) collecting
+        notification outcomes. When omitted the outcomes for this lead are
+        written with a single bulk insert before returning; when supplied
+        the caller is responsible for flushing the buffer.
     """
 
     with get_session() as session:
@@ -272,6 +331,26 @@ def create_lead(
                     lead.client_id = campaign.client_id
             session.add(lead)
             session.commit()
+            record_lead_created()
+
+            lead_id = lead.id
+            logs = notification_logs if notification_logs is not None else []
+
+            def _log(
+                channel: str,
+                status: str,
+                message: str | None,
+                body: str | None = None,
+            ) -> None:
+                record_notification(
+                    logs,
+                    lead.client_id,
+                    lead_id,
+                    channel,
+                    status,
+                    message,
+                    body,
+                )
 
             # Fetch client notification settings after commit and send alerts.
             try:
@@ -315,16 +394,7 @@ def create_lead(
                 if sms_enabled and client:
                     if not client.phone:
                         warn_msg = "Client phone missing—SMS not sent"
-                        session.add(
-                            NotificationLog(
-                                client_id=lead.client_id,
-                                lead_id=lead.id,
-                                channel="sms",
-                                status="skipped",
-                                message=warn_msg,
-                            )
-                        )
-                        session.commit()
+                        _log("sms", "skipped", warn_msg)
                         _logger().warning(warn_msg)
                         try:
                             flash(warn_msg, "warning")
@@ -339,34 +409,18 @@ def create_lead(
                             msg = f"New lead: {lead.name} {lead.phone}"
                         try:
                             if send_sms(client.phone, msg):
-                                session.add(
-                                    NotificationLog(
-                                        client_id=lead.client_id,
-                                        lead_id=lead.id,
-                                        channel="sms",
-                                        status="sent",
-                                        message=msg,
-                                    )
-                                )
-                                session.commit()
+                                _log("sms", "sent", msg, body=msg)
                                 _logger().info(
-                                    "SMS notification sent for lead %s", lead.id
+                                    "SMS notification sent for lead %s",
+                                    lead_id,
                                 )
                             else:
                                 warn_msg = (
-                                    f"SMS notification failed for lead {lead.id}. "
-                                    "Verify JustCall credentials. [ERR_SMS_CRED]"
-                                )
-                                session.add(
-                                    NotificationLog(
-                                        client_id=lead.client_id,
-                                        lead_id=lead.id,
-                                        channel="sms",
-                                        status="failed",
-                                        message=warn_msg,
-                                    )
+                                    "SMS notification failed for lead "
+                                    f"{lead_id}. Verify JustCall credentials."
+                                    " [ERR_SMS_CRED]"
                                 )
-                                session.commit()
+                                _log("sms", "failed", warn_msg)
                                 _logger().warning(warn_msg)
                                 try:
                                     flash(warn_msg, "warning")
@@ -375,35 +429,17 @@ def create_lead(
                                         "Unable to flash warning: no request context"
                                     )
                         except Exception as exc:  # pragma: no cover - logging side effects
-                            session.add(
-                                NotificationLog(
-                                    client_id=lead.client_id,
-                                    lead_id=lead.id,
-                                    channel="sms",
-                                    status="error",
-                                    message=str(exc),
-                                )
-                            )
-                            session.commit()
+                            _log("sms", "error", str(exc))
                             _logger().error(
                                 "Error sending SMS notification for lead %s: %s",
-                                lead.id,
+                                lead_id,
                                 exc,
                             )
 
                 if email_enabled and client:
                     if not client.contact_email:
                         warn_msg = "Client email missing—email not sent"
-                        session.add(
-                            NotificationLog(
-                                client_id=lead.client_id,
-                                lead_id=lead.id,
-                                channel="email",
-                                status="skipped",
-                                message=warn_msg,
-                            )
-                        )
-                        session.commit()
+                        _log("email", "skipped", warn_msg)
                         _logger().warning(warn_msg)
                         try:
                             flash(warn_msg, "warning")
@@ -437,34 +473,23 @@ def create_lead(
                                 body,
                                 html=body_html,
                             ):
-                                session.add(
-                                    NotificationLog(
-                                        client_id=lead.client_id,
-                                        lead_id=lead.id,
-                                        channel="email",
-                                        status="sent",
-                                        message=body_html or body,
-                                    )
+                                _log(
+                                    "email",
+                                    "sent",
+                                    body,
+                                    body=body_html or body,
                                 )
-                                session.commit()
                                 _logger().info(
-                                    "Email notification sent for lead %s", lead.id
+                                    "Email notification sent for lead %s",
+                                    lead_id,
                                 )
                             else:
                                 warn_msg = (
-                                    f"Email notification failed for lead {lead.id}. "
-                                    "Verify Gmail credentials. [ERR_EMAIL_CRED]"
-                                )
-                                session.add(
-                                    NotificationLog(
-                                        client_id=lead.client_id,
-                                        lead_id=lead.id,
-                                        channel="email",
-                                        status="failed",
-                                        message=warn_msg,
-                                    )
+                                    "Email notification failed for lead "
+                                    f"{lead_id}. Verify Gmail credentials."
+                                    " [ERR_EMAIL_CRED]"
                                 )
-                                session.commit()
+                                _log("email", "failed", warn_msg)
                                 _logger().warning(warn_msg)
                                 try:
                                     flash(warn_msg, "warning")
@@ -473,25 +498,31 @@ def create_lead(
                                         "Unable to flash warning: no request context"
                                     )
                         except Exception as exc:  # pragma: no cover - logging side effects
-                            session.add(
-                                NotificationLog(
-                                    client_id=lead.client_id,
-                                    lead_id=lead.id,
-                                    channel="email",
-                                    status="error",
-                                    message=str(exc),
-                                )
-                            )
-                            session.commit()
+                            _log("email", "error", str(exc))
                             _logger().error(
                                 "Error sending email notification for lead %s: %s",
-                                lead.id,
+                                lead_id,
                                 exc,
                             )
             except Exception as exc:  # pragma: no cover - logging side effects
                 _logger().error(
-                    "Notification processing failed for lead %s: %s", lead.id, exc
+                    "Notification processing failed for lead %s: %s",
+                    lead_id,
+                    exc,
                 )
+            finally:
+                if notification_logs is None:
+                    try:
+                        flush_notification_logs(session, logs)
+                    except (
+                        Exception
+                    ) as exc:  # pragma: no cover - logging side effects
+                        session.rollback()
+                        _logger().error(
+                            "Failed to record notifications for lead %s: %s",
+                            lead_id,
+                            exc,
+                        )
 
             return True, None
         except Exception as exc:  # pragma: no cover - logging side effects
@@ -565,8 +596,138 @@ def delete_lead(lead_id: int) -> bool:
             return False
 
 
+def _for_each_batch(
+    filters: dict, batch_size: int | None, apply, job_id=None
+) -> int:
+    """Call ``apply(session, ids)`` for id-ordered batches of matching leads.
+
+    *filters* takes the keyword arguments of :func:`_query_leads`. ``ids`` is
+    a subquery selecting the next batch (at most *batch_size* leads in one
+    id range), so statements stay set-based without shipping id lists.
+    Each batch commits separately. Returns the number of matching leads.
+    """
+
+    batch_size = batch_size or current_app.config.get(
+        "LEAD_BULK_BATCH_SIZE", 1000
+    )
+    with get_session() as session:
+        matching = (
+            _query_leads(session, **filters).with_entities(Lead.id).statement
+        )
+        total = session.execute(
+            select(func.count()).select_from(matching.subquery())
+        ).scalar()
+    update_job_progress(job_id, 0, total)
+
+    last_id, done = 0, 0
+    while done < total:
+        with get_session() as session:
+            remaining = matching.where(Lead.id > last_id)
+            # Upper id of this batch; None once fewer than batch_size remain
+            bound = session.execute(
+                remaining.order_by(Lead.id).offset(batch_size - 1).limit(1)
+            ).scalar()
+            ids = (
+                remaining
+                if bound is None
+                else remaining.where(Lead.id <= bound)
+            )
+            apply(session, ids)
+            session.commit()
+        if bound is None:
+            done = total
+        else:
+            last_id, done = bound, min(done + batch_size, total)
+        update_job_progress(job_id, done)
+    return total
+
+
+def delete_leads_matching(
+    filters: dict, batch_size: int | None = None, job_id: int | None = None
+) -> dict[str, int]:
+    """Delete every lead matching *filters* along with its notification logs.
+
+    Returns the number of ``leads`` and ``notification_logs`` rows removed.
+    """
+
+    counts = {"leads": 0, "notification_logs": 0}
+
+    def _delete(session, ids) -> None:
+        counts["notification_logs"] += session.execute(
+            delete(NotificationLog)
+            .where(NotificationLog.lead_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        counts["leads"] += session.execute(
+            delete(Lead)
+            .where(Lead.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    _for_each_batch(filters, batch_size, _delete, job_id)
+    return counts
+
+
+def update_leads_matching(
+    filters: dict,
+    campaign_id: str | None = None,
+    lead_type: str | None = None,
+    batch_size: int | None = None,
+    job_id: int | None = None,
+) -> dict[str, int]:
+    """Move leads matching *filters* to *campaign_id* and/or *lead_type*.
+
+    Reassigned leads take the new campaign's client. Returns the number of
+    ``leads`` updated.
+    """
+
+    values: dict = {}
+    if campaign_id:
+        values["campaign_id"] = campaign_id
+        values["client_id"] = (
+            select(Campaign.client_id)
+            .where(Campaign.id == campaign_id)
+            .scalar_subquery()
+        )
+    if lead_type:
+        values["lead_type"] = lead_type
+    if not values:
+        return {"leads": 0}
+    counts = {"leads": 0}
+
+    def _update(session, ids) -> None:
+        counts["leads"] += session.execute(
+            update(Lead)
+            .where(Lead.id.in_(ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    _for_each_batch(filters, batch_size, _update, job_id)
+    return counts
+
+
+def _bulk_lead_job(
+    job_id: int, action: str, filters: dict, values: dict
+) -> dict:
+    if action == "delete":
+        return delete_leads_matching(filters, job_id=job_id)
+    return update_leads_matching(filters, job_id=job_id, **values)
+
+
+def start_bulk_lead_job(action: str, filters: dict, **values) -> int:
+    """Queue a filter-based bulk ``"delete"`` or ``"update"`` of leads.
+
+    *values* are passed to :func:`update_leads_matching`. The job result
+    holds the affected row counts. Returns the job id.
+    """
+
+    name = BULK_DELETE_JOB if action == "delete" else BULK_UPDATE_JOB
+    return start_job(name, _bulk_lead_job, action, filters, values)
+
+
 def bulk_delete_leads(lead_ids: list[int]) -> int:
-    """Delete multiple leads in a single transaction.
+    """Delete the selected leads and their notification logs in batches.
 
     Returns the number of deleted records.
     """
@@ -574,17 +735,82 @@ def bulk_delete_leads(lead_ids: list[int]) -> int:
     if not lead_ids:
         return 0
 
+    try:
+        return delete_leads_matching({"lead_ids": lead_ids})["leads"]
+    except Exception as exc:  # pragma: no cover - logging side effects
+        _logger().error("Failed to bulk delete leads: %s", exc)
+        flash("Failed to delete leads")
+        return 0
+
+
+def _reassign_campaign_leads(
+    job_id: int, campaign_id: str, chunk_size: int
+) -> dict:
+    """Job body: copy the campaign's client onto its leads in id-range chunks.
+
+    Each chunk is a separate short transaction covering at most
+    *chunk_size* leads, so row locks are held briefly and concurrent
+    webhook inserts for the campaign are not blocked. The client is read
+    from the campaign inside every ``UPDATE``; if the owner changes again
+    while this runs, later chunks already apply the newest value.
+    """
+
+    owner = (
+        select(Campaign.client_id)
+        .where(Campaign.id == campaign_id)
+        .scalar_subquery()
+    )
     with get_session() as session:
-        try:
-            count = (
-                session.query(Lead)
-                .filter(Lead.id.in_(lead_ids))
-                .delete(synchronize_session=False)
+        total = session.execute(
+            select(func.count(Lead.id)).where(Lead.campaign_id == campaign_id)
+        ).scalar()
+    update_job_progress(job_id, 0, total)
+
+    last_id, done, updated = 0, 0, 0
+    while done < total:
+        with get_session() as session:
+            # Upper id of the next chunk; None once fewer than chunk_size
+            # remain
+            bound = session.execute(
+                select(Lead.id)
+                .where(Lead.campaign_id == campaign_id, Lead.id > last_id)
+                .order_by(Lead.id)
+                .offset(chunk_size - 1)
+                .limit(1)
+            ).scalar()
+            stmt = (
+                update(Lead)
+                .where(
+                    Lead.campaign_id == campaign_id,
+                    Lead.id > last_id,
+                    Lead.client_id.is_distinct_from(owner),
+                )
+                .values(client_id=owner)
+                .execution_options(synchronize_session=False)
             )
+            if bound is not None:
+                stmt = stmt.where(Lead.id <= bound)
+            updated += session.execute(stmt).rowcount
             session.commit()
-            return count
-        except Exception as exc:  # pragma: no cover - logging side effects
-            session.rollback()
-            _logger().error("Failed to bulk delete leads: %s", exc)
-            flash("Failed to delete leads")
-            return 0
+        if bound is None:
+            done = total
+        else:
+            last_id, done = bound, min(done + chunk_size, total)
+        update_job_progress(job_id, done)
+    return {"campaign_id": campaign_id, "updated": updated}
+
+
+def start_lead_reassignment(campaign_id: str) -> int:
+    """Queue a background job moving a campaign's leads to its current client.
+
+    Reads already see the new owner through :data:`LEAD_CLIENT_ID`; the job
+    only brings the stored ``leads.client_id`` in line. Returns the job id.
+    """
+
+    chunk_size = current_app.config.get("LEAD_REASSIGN_CHUNK_SIZE", 5000)
+    return start_job(
+        LEAD_REASSIGNMENT_JOB,
+        _reassign_campaign_leads,
+        campaign_id,
+        chunk_size,
+    )
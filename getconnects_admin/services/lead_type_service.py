@@ -0,0 +1,349 @@
+"""Maintenance of the materialised ``campaign_effective_lead_types`` table.
+
+A campaign accepts the lead types mapped to it in ``campaign_lead_types``
+plus every lead type of the groups linked in ``campaign_lead_type_groups``.
+Rather than merging the two in Python on every page view, the result is
+kept in ``campaign_effective_lead_types`` and read with one indexed query.
+
+ORM changes to mappings and lead types are picked up by session hooks,
+including bulk ``INSERT``/``UPDATE``/``DELETE`` statements executed through
+the session. Writers that know better (campaign sync, campaign management)
+can also mark the campaigns they touched with
+:func:`mark_effective_lead_types_stale`. Either way the affected campaigns
+are refreshed in the same transaction before it commits.
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import delete, event, exists, func, inspect, literal, select
+
+try:
+    from ..models import SessionLocal
+    from ..models.campaign import Campaign
+    from ..models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from ..models.campaign_lead_type import CampaignLeadType
+    from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
+    from ..models.lead_type import LeadType
+    from ..models.lead_type_group import LeadTypeGroup
+except ImportError:  # pragma: no cover
+    from models import SessionLocal
+    from models.campaign import Campaign
+    from models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from models.campaign_lead_type import CampaignLeadType
+    from models.campaign_lead_type_group import CampaignLeadTypeGroup
+    from models.lead_type import LeadType
+    from models.lead_type_group import LeadTypeGroup
+from .helpers import dialect_insert
+
+# Campaign ids per refresh statement
+_REFRESH_CHUNK = 500
+
+_PENDING = "effective_lead_types_pending"
+_PENDING_ALL = "effective_lead_types_pending_all"
+
+# Column identifying the rows a bulk statement on each model affects
+_BULK_KEYS = {
+    CampaignLeadType: "campaign_id",
+    CampaignLeadTypeGroup: "campaign_id",
+    LeadType: "id",
+}
+
+
+def _refresh_scope(session, campaign_ids: list[str] | None) -> None:
+    eff = CampaignEffectiveLeadType
+    clt_name = func.coalesce(CampaignLeadType.lead_type_name, LeadType.name)
+
+    def _scoped(query, column):
+        return (
+            query
+            if campaign_ids is None
+            else query.where(column.in_(campaign_ids))
+        )
+
+    session.execute(_scoped(delete(eff), eff.campaign_id))
+    direct = _scoped(
+        select(
+            CampaignLeadType.campaign_id,
+            CampaignLeadType.lead_type_id,
+            clt_name,
+            LeadType.group_id,
+            literal("campaign"),
+        )
+        .outerjoin(LeadType, LeadType.id == CampaignLeadType.lead_type_id)
+        .where(clt_name.isnot(None)),
+        CampaignLeadType.campaign_id,
+    )
+    from_groups = _scoped(
+        select(
+            CampaignLeadTypeGroup.campaign_id,
+            LeadType.id,
+            LeadType.name,
+            LeadType.group_id,
+            literal("group"),
+        )
+        .join(
+            LeadType,
+            LeadType.group_id == CampaignLeadTypeGroup.lead_type_group_id,
+        )
+        .where(
+            ~exists().where(
+                eff.campaign_id == CampaignLeadTypeGroup.campaign_id,
+                eff.lead_type_id == LeadType.id,
+            )
+        ),
+        CampaignLeadTypeGroup.campaign_id,
+    )
+    columns = [
+        "campaign_id",
+        "lead_type_id",
+        "lead_type_name",
+        "group_id",
+        "source",
+    ]
+    # A concurrent refresh of the same campaign may have inserted the rows
+    # its own DELETE could not see; both derive the same rows.
+    for query in (direct, from_groups):
+        session.execute(
+            dialect_insert(session, eff)
+            .from_select(columns, query)
+            .on_conflict_do_nothing()
+        )
+
+
+def refresh_effective_lead_types(
+    session, campaign_ids: Iterable[str] | None = None
+) -> None:
+    """Rebuild effective lead types for *campaign_ids* (``None``: all).
+
+    Runs set-based ``DELETE`` and ``INSERT ... SELECT`` statements in the
+    caller's transaction; the caller commits.
+    """
+
+    if campaign_ids is None:
+        _refresh_scope(session, None)
+        return
+    ids = sorted(set(campaign_ids))
+    for start in range(0, len(ids), _REFRESH_CHUNK):
+        _refresh_scope(session, ids[start : start + _REFRESH_CHUNK])
+
+
+def campaigns_for_lead_types(
+    session, group_ids: Iterable[str] = (), lead_type_ids: Iterable[str] = ()
+) -> set[str]:
+    """Return campaigns whose effective lead types depend on the given rows."""
+
+    group_ids, lead_type_ids = list(group_ids), list(lead_type_ids)
+    if not group_ids and not lead_type_ids:
+        return set()
+    query = (
+        select(CampaignLeadTypeGroup.campaign_id)
+        .where(CampaignLeadTypeGroup.lead_type_group_id.in_(group_ids))
+        .union(
+            select(CampaignLeadType.campaign_id).where(
+                CampaignLeadType.lead_type_id.in_(lead_type_ids)
+            )
+        )
+    )
+    return set(session.execute(query).scalars())
+
+
+def _effective_rows(session, campaign_filter) -> list[dict]:
+    eff = CampaignEffectiveLeadType
+    rows = session.execute(
+        select(
+            eff.campaign_id,
+            eff.lead_type_id,
+            eff.lead_type_name,
+            eff.group_id,
+            LeadTypeGroup.name,
+            eff.source,
+        )
+        .outerjoin(LeadTypeGroup, LeadTypeGroup.id == eff.group_id)
+        .where(campaign_filter)
+        .order_by(eff.campaign_id, eff.source, eff.lead_type_name)
+    )
+    return [
+        {
+            "campaign_id": campaign_id,
+            "id": lead_type_id,
+            "name": name,
+            "group_id": group_id,
+            "group_name": group_name,
+            "source": source,
+        }
+        for (
+            campaign_id,
+            lead_type_id,
+            name,
+            group_id,
+            group_name,
+            source,
+        ) in rows
+    ]
+
+
+def effective_lead_types(session, campaign_ids: Iterable[str]) -> list[dict]:
+    """Return effective lead types for *campaign_ids* with group names."""
+
+    return _effective_rows(
+        session, CampaignEffectiveLeadType.campaign_id.in_(list(campaign_ids))
+    )
+
+
+def client_lead_types(session, client_id: int) -> list[dict]:
+    """Return the distinct lead types offered by *client_id*'s campaigns.
+
+    A campaign's explicit mappings take precedence; campaigns that only
+    reference lead type groups contribute the lead types of those groups.
+    Runs a single query however many campaigns the client has.
+    """
+
+    rows = _effective_rows(
+        session,
+        CampaignEffectiveLeadType.campaign_id.in_(
+            select(Campaign.id).where(Campaign.client_id == client_id)
+        ),
+    )
+    direct = {
+        row["campaign_id"] for row in rows if row["source"] == "campaign"
+    }
+    lead_types = []
+    seen: set[str] = set()
+    for row in rows:
+        if row["source"] == "group" and row["campaign_id"] in direct:
+            continue
+        if row["id"] not in seen:
+            seen.add(row["id"])
+            lead_types.append(row)
+    return lead_types
+
+
+def mark_effective_lead_types_stale(
+    session,
+    campaign_ids: Iterable[str] = (),
+    group_ids: Iterable[str] = (),
+    lead_type_ids: Iterable[str] = (),
+) -> None:
+    """Queue a refresh of the affected campaigns when *session* commits.
+
+    Used by bulk statements that bypass the flush-based change tracking.
+    """
+
+    pending = session.info.setdefault(_PENDING, (set(), set(), set()))
+    pending[0].update(campaign_ids)
+    pending[1].update(group_ids)
+    pending[2].update(lead_type_ids)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_changes(session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (CampaignLeadType, CampaignLeadTypeGroup)):
+            mark_effective_lead_types_stale(
+                session, campaign_ids=[obj.campaign_id]
+            )
+        elif isinstance(obj, LeadType):
+            history = inspect(obj).attrs.group_id.history
+            mark_effective_lead_types_stale(
+                session,
+                group_ids=[g for g in (obj.group_id, *history.deleted) if g],
+                lead_type_ids=[obj.id],
+            )
+
+
+def _written_rows(state) -> list[dict]:
+    """Return the column values a bulk statement writes."""
+
+    params = state.parameters
+    if isinstance(params, list):
+        return params
+    if params:
+        return [params]
+    if state.is_delete:
+        return []
+    # Values given with .values(); INSERT ... SELECT and multi-row VALUES
+    # compile to bind names that match no column
+    compiled = state.statement.compile(
+        dialect=state.session.get_bind().dialect
+    )
+    return [compiled.params]
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_bulk(orm_execute_state) -> None:
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in _BULK_KEYS:
+        return
+    session = state.session
+    key = _BULK_KEYS[model]
+    rows = _written_rows(state)
+    keyed = all(key in row for row in rows)
+    if state.is_insert and not (rows and keyed):
+        session.info[_PENDING_ALL] = True
+        return
+    if not state.is_insert:
+        # Collect the rows about to change while their old values are visible
+        where = state.statement.whereclause
+        if where is None and rows and keyed:  # bulk UPDATE by primary key
+            where = getattr(model, key).in_({row[key] for row in rows})
+        columns = (
+            [LeadType.id, LeadType.group_id]
+            if model is LeadType
+            else [model.campaign_id]
+        )
+        query = (
+            select(*columns)
+            if where is None
+            else select(*columns).where(where)
+        )
+        rows = [*rows, *(row._asdict() for row in session.execute(query))]
+    if model is LeadType:
+        mark_effective_lead_types_stale(
+            session,
+            group_ids={row["group_id"] for row in rows if row.get("group_id")},
+            lead_type_ids={row["id"] for row in rows if row.get("id")},
+        )
+    else:
+        mark_effective_lead_types_stale(
+            session,
+            campaign_ids={
+                row["campaign_id"] for row in rows if row.get("campaign_id")
+            },
+        )
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _refresh_pending(session) -> None:
+    # before_commit fires ahead of the final flush, so flush pending objects
+    # first to collect their changes
+    session.flush()
+    pending = session.info.pop(_PENDING, None)
+    if session.info.pop(_PENDING_ALL, False):
+        # A bulk statement whose rows could not be determined
+        refresh_effective_lead_types(session)
+        return
+    if not pending:
+        return
+    campaign_ids, group_ids, lead_type_ids = pending
+    campaign_ids |= campaigns_for_lead_types(session, group_ids, lead_type_ids)
+    refresh_effective_lead_types(session, campaign_ids)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_pending(session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_PENDING_ALL, None)
+
+
+__all__ = [
+    "campaigns_for_lead_types",
+    "client_lead_types",
+    "effective_lead_types",
+    "mark_effective_lead_types_stale",
+    "refresh_effective_lead_types",
+]
@@ -0,0 +1,159 @@
+"""Prometheus metrics for requests, the database pool and lead intake.
+
+Metrics are plain :mod:`prometheus_client` counters, gauges and histograms
+updated in memory where the work already happens: the request hooks of
+:mod:`.instrumentation_service`, engine pool events, :func:`external_call`
+and the lead, notification and webhook code paths. Nothing is queried or
+computed until ``/metrics`` is scraped.
+
+Under gunicorn every worker keeps its own values. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (``gunicorn.conf.py`` does this) the
+values live in memory-mapped files in that directory and :func:`render`
+sums them across workers, so any worker can answer a scrape. The variable
+must be set before this module is first imported.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+try:
+    from ..models import engine
+except ImportError:  # pragma: no cover
+    from models import engine
+
+REQUEST_LATENCY = Histogram(
+    "getconnects_http_request_duration_seconds",
+    "Time spent handling a request, by endpoint",
+    ["endpoint", "method"],
+)
+REQUESTS = Counter(
+    "getconnects_http_requests_total",
+    "Requests handled, by endpoint and status",
+    ["endpoint", "method", "status"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "getconnects_db_pool_checkout_wait_seconds",
+    "Time to obtain a database connection from the pool, including "
+    "opening one",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+POOL_IN_USE = Gauge(
+    "getconnects_db_pool_connections_in_use",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+EXTERNAL_LATENCY = Histogram(
+    "getconnects_external_request_duration_seconds",
+    "Outbound API call latency, by service",
+    ["service"],
+)
+EXTERNAL_ERRORS = Counter(
+    "getconnects_external_request_errors_total",
+    "Outbound API calls that raised or returned an error status, by service",
+    ["service"],
+)
+WEBHOOK_PAYLOADS = Counter(
+    "getconnects_webhook_payloads_total",
+    "JustCall webhook payloads, by outcome (received, deduplicated, failed)",
+    ["outcome"],
+)
+LEADS_CREATED = Counter("getconnects_leads_created_total", "Leads created")
+NOTIFICATIONS = Counter(
+    "getconnects_notifications_total",
+    "Recorded notification outcomes, by channel and status",
+    ["channel", "status"],
+)
+
+
+def observe_request(
+    endpoint: str | None, method: str, status: int, seconds: float
+) -> None:
+    # Unmatched URLs share one label so scanners cannot inflate cardinality
+    endpoint = endpoint or "unmatched"
+    REQUEST_LATENCY.labels(endpoint, method).observe(seconds)
+    REQUESTS.labels(endpoint, method, str(status)).inc()
+
+
+def observe_external(service: str, seconds: float, failed: bool) -> None:
+    EXTERNAL_LATENCY.labels(service).observe(seconds)
+    if failed:
+        EXTERNAL_ERRORS.labels(service).inc()
+
+
+def record_webhook_payload(outcome: str) -> None:
+    WEBHOOK_PAYLOADS.labels(outcome).inc()
+
+
+def record_lead_created() -> None:
+    LEADS_CREATED.inc()
+
+
+def record_notifications(rows: list[dict]) -> None:
+    for row in rows:
+        NOTIFICATIONS.labels(row["channel"], row["status"]).inc()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_IN_USE.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_IN_USE.dec()
+
+
+def _time_checkouts(pool) -> None:
+    # The pool has no event before a checkout starts, so time the call that
+    # ``Engine.raw_connection`` makes
+    connect = pool.connect
+
+    def _connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool.connect = _connect
+
+
+def init_app(app) -> None:
+    """Install the pool hooks once per process."""
+
+    if not event.contains(engine, "checkout", _on_checkout):
+        event.listen(engine, "checkout", _on_checkout)
+        event.listen(engine, "checkin", _on_checkin)
+        _time_checkouts(engine.pool)
+
+
+def render() -> tuple[bytes, str]:
+    """Return the exposition text and its content type."""
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+__all__ = [
+    "init_app",
+    "observe_external",
+    "observe_request",
+    "record_lead_created",
+    "record_notifications",
+    "record_webhook_payload",
+    "render",
+]
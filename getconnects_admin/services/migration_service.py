@@ -0,0 +1,311 @@
+"""Versioned, idempotent schema migrations.
+
+Each :class:`Migration` has a version, a description and an
+``upgrade(conn)`` callable that only issues ``IF [NOT] EXISTS`` DDL, so a
+migration that was interrupted (or whose objects already exist because the
+database was created from the models or ``schema.sql``) can simply be run
+again. Applied versions are recorded in ``schema_migrations``.
+
+On PostgreSQL, migrations marked non-transactional run on an autocommit
+connection so :func:`create_indexes` can build indexes ``CONCURRENTLY``
+without blocking writes to the table. Other databases run every migration
+in a transaction.
+
+:func:`apply_migrations` runs the outstanding migrations in order, each in
+its own transaction. The recorded versions are the schema stamp of
+:mod:`.schema_service`, so every worker re-inspects the database once it
+sees them.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from flask import current_app
+from sqlalchemy import MetaData, insert, inspect, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, Table
+
+try:
+    from ..models import engine
+    from ..models.background_job import BackgroundJob
+    from ..models.campaign import Campaign
+    from ..models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from ..models.job_lock import JobLock
+    from ..models.lead import Lead
+    from ..models.notification_body import NotificationBody
+    from ..models.notification_log import NotificationLog
+    from ..models.schema_migration import SchemaMigration
+    from ..models.user import User
+except ImportError:  # pragma: no cover
+    from models import engine
+    from models.background_job import BackgroundJob
+    from models.campaign import Campaign
+    from models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from models.job_lock import JobLock
+    from models.lead import Lead
+    from models.notification_body import NotificationBody
+    from models.notification_log import NotificationLog
+    from models.schema_migration import SchemaMigration
+    from models.user import User
+from .lead_type_service import refresh_effective_lead_types
+from .schema_service import bump_schema_version
+
+
+def _logger():
+    try:
+        return current_app.logger
+    except Exception:  # pragma: no cover - fallback when outside app context
+        return logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    description: str
+    upgrade: Callable
+    # False for migrations that must not hold a transaction on PostgreSQL
+    transactional: bool = True
+
+
+def _concurrent(conn) -> bool:
+    return (
+        conn.dialect.name == "postgresql"
+        and conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+    )
+
+
+def _invalid_indexes(conn, names: tuple[str, ...]) -> list[str]:
+    # Left behind by an interrupted CREATE INDEX CONCURRENTLY
+    return list(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_class c"
+                " JOIN pg_index i ON i.indexrelid = c.oid"
+                " WHERE c.relname = ANY(:names) AND NOT i.indisvalid"
+            ),
+            {"names": list(names)},
+        ).scalars()
+    )
+
+
+def create_index_ddl(
+    table: Table, name: str, concurrently: bool = False
+) -> CreateIndex:
+    """Return ``CREATE INDEX IF NOT EXISTS`` for index *name* on *table*."""
+
+    if concurrently:
+        # Set the option on a copy so create_all keeps plain CREATE INDEX
+        table = table.to_metadata(MetaData())
+    index = next(index for index in table.indexes if index.name == name)
+    if concurrently:
+        index.dialect_options["postgresql"]["concurrently"] = True
+    return CreateIndex(index, if_not_exists=True)
+
+
+def create_indexes(conn, table: Table, names: tuple[str, ...]) -> None:
+    """Create the indexes called *names* as declared on *table*.
+
+    On a PostgreSQL autocommit connection the indexes are built
+    ``CONCURRENTLY``, after dropping invalid leftovers of an earlier attempt.
+    """
+
+    concurrently = _concurrent(conn)
+    if concurrently:
+        drop_indexes(conn, tuple(_invalid_indexes(conn, names)))
+    for name in names:
+        conn.execute(create_index_ddl(table, name, concurrently))
+
+
+def drop_indexes(conn, names: tuple[str, ...]) -> None:
+    keyword = "DROP INDEX CONCURRENTLY" if _concurrent(conn) else "DROP INDEX"
+    for name in names:
+        conn.execute(text(f"{keyword} IF EXISTS {name}"))
+
+
+def add_column(conn, table: Table, name: str) -> None:
+    """Add the column *name* as declared on *table* unless it exists."""
+
+    if name in {
+        column["name"] for column in inspect(conn).get_columns(table.name)
+    }:
+        return
+    column = table.c[name]
+    ddl = f"{column.name} {column.type.compile(conn.dialect)}"
+    default = (
+        column.server_default.arg
+        if column.server_default is not None
+        else None
+    )
+    if isinstance(default, str):
+        ddl += f" DEFAULT {default}"
+    elif default is not None and conn.dialect.name != "sqlite":
+        # SQLite cannot add a column with a non-constant default such as now()
+        ddl += f" DEFAULT {default.compile(dialect=conn.dialect)}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name}({target.name})"
+    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def create_tables(conn, *tables: Table) -> None:
+    """Create *tables*, with their declared indexes, unless they exist."""
+
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+
+LEAD_INDEXES = (
+    "ix_leads_client_id_created_at",
+    "ix_leads_campaign_id_created_at",
+    "ix_leads_lead_type",
+    "ix_leads_created_at",
+)
+
+
+def _lead_indexes(conn) -> None:
+    create_indexes(conn, Lead.__table__, LEAD_INDEXES)
+    # Superseded by the composite indexes, which lead with the same columns
+    drop_indexes(conn, ("ix_leads_client_id", "ix_leads_campaign_id"))
+
+
+def _user_auth_version(conn) -> None:
+    add_column(conn, User.__table__, "auth_version")
+
+
+def _notification_log_timestamps(conn) -> None:
+    table = NotificationLog.__table__
+    add_column(conn, table, "created_at")
+    create_indexes(
+        conn,
+        table,
+        (
+            "ix_notification_logs_client_id_created_at",
+            "ix_notification_logs_status_channel",
+        ),
+    )
+
+
+def _notification_bodies(conn) -> None:
+    create_tables(conn, NotificationBody.__table__)
+    add_column(conn, NotificationLog.__table__, "body_hash")
+    create_indexes(
+        conn, NotificationLog.__table__, ("ix_notification_logs_body_hash",)
+    )
+
+
+def _background_jobs(conn) -> None:
+    add_column(conn, Campaign.__table__, "sync_hash")
+    create_tables(conn, BackgroundJob.__table__, JobLock.__table__)
+
+
+def _effective_lead_types(conn) -> None:
+    create_tables(conn, CampaignEffectiveLeadType.__table__)
+    # A plain session on the migration's connection: the rebuild joins its
+    # transaction and the application's session hooks stay out of it
+    session = Session(bind=conn)
+    try:
+        refresh_effective_lead_types(session)
+        session.flush()
+    finally:
+        session.close()
+
+
+MIGRATIONS = (
+    Migration(
+        "0001",
+        "Composite indexes for lead filters and stats",
+        _lead_indexes,
+        transactional=False,
+    ),
+    Migration("0002", "Authorisation stamp on users", _user_auth_version),
+    Migration(
+        "0003",
+        "Timestamps and indexes on notification logs",
+        _notification_log_timestamps,
+        transactional=False,
+    ),
+    Migration(
+        "0004",
+        "Shared notification bodies",
+        _notification_bodies,
+        transactional=False,
+    ),
+    Migration(
+        "0005", "Background jobs and campaign sync hashes", _background_jobs
+    ),
+    Migration(
+        "0006", "Materialised campaign lead types", _effective_lead_types
+    ),
+)
+
+
+def applied_versions(bind=None) -> set[str]:
+    bind = bind if bind is not None else engine
+    if not inspect(bind).has_table(SchemaMigration.__tablename__):
+        return set()
+    with bind.connect() as conn:
+        return set(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def pending_migrations(bind=None) -> list[Migration]:
+    applied = applied_versions(bind)
+    return [
+        migration
+        for migration in MIGRATIONS
+        if migration.version not in applied
+    ]
+
+
+def apply_migrations(bind=None) -> list[Migration]:
+    """Apply outstanding migrations to *bind* (the app engine by default).
+
+    Returns the migrations that were applied.
+    """
+
+    bind = bind if bind is not None else engine
+    SchemaMigration.__table__.create(bind, checkfirst=True)
+    pending = pending_migrations(bind)
+    record = insert(SchemaMigration)
+    for migration in pending:
+        values = {
+            "version": migration.version,
+            "description": migration.description,
+        }
+        if migration.transactional or bind.dialect.name != "postgresql":
+            with bind.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(record.values(**values))
+        else:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            with bind.connect() as conn:
+                migration.upgrade(
+                    conn.execution_options(isolation_level="AUTOCOMMIT")
+                )
+            with bind.begin() as conn:
+                conn.execute(record.values(**values))
+        _logger().info(
+            "Applied migration %s: %s",
+            migration.version,
+            migration.description,
+        )
+    if pending:
+        bump_schema_version(bind)
+    return pending
+
+
+__all__ = [
+    "LEAD_INDEXES",
+    "MIGRATIONS",
+    "Migration",
+    "add_column",
+    "applied_versions",
+    "apply_migrations",
+    "create_index_ddl",
+    "create_indexes",
+    "create_tables",
+    "drop_indexes",
+    "pending_migrations",
+]
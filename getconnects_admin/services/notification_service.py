@@ -0,0 +1,307 @@
+"""Persistence helpers for notification outcomes.
+
+Notification results are collected in plain lists of column dictionaries and
+written with a single bulk ``INSERT`` instead of one ORM commit per channel.
+Callers processing several leads in one request (webhooks, CSV imports) can
+share a buffer so the whole batch is flushed at once.
+
+Rendered message bodies are stored zlib-compressed in ``notification_bodies``
+keyed by their SHA-256 digest; logs only keep a short preview plus the hash.
+"""
+
+import hashlib
+import logging
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import current_app
+from sqlalchemy import func, insert, select
+
+try:
+    from ..models.client import Client
+    from ..models.lead import Lead
+    from ..models.notification_body import NotificationBody
+    from ..models.notification_log import NotificationLog
+except ImportError:  # pragma: no cover
+    from models.client import Client
+    from models.lead import Lead
+    from models.notification_body import NotificationBody
+    from models.notification_log import NotificationLog
+from .helpers import dialect_insert, get_session
+from .metrics_service import record_notifications
+
+# Page size bounds for the notification log browser and JSON API
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Number of characters of a message kept inline on the log row
+MESSAGE_PREVIEW_LENGTH = 120
+
+
+def _logger():
+    try:
+        return current_app.logger
+    except Exception:  # pragma: no cover - fallback when outside app context
+        return logging.getLogger(__name__)
+
+
+def hash_body(text: str) -> str:
+    """Return the content address used for *text*."""
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_body(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+
+def decompress_body(content: bytes) -> str:
+    return zlib.decompress(content).decode("utf-8")
+
+
+def record_notification(
+    buffer: list[dict],
+    client_id: int | None,
+    lead_id: int | None,
+    channel: str,
+    status: str,
+    message: str | None,
+    body: str | None = None,
+) -> None:
+    """Append a notification outcome to *buffer* for a later bulk insert.
+
+    *message* is kept on the log row and should be short (diagnostics or a
+    preview); it is truncated when a full *body* is supplied. *body* is the
+    rendered content actually delivered and is stored content-addressed.
+    """
+
+    if body is not None and message:
+        message = message[:MESSAGE_PREVIEW_LENGTH]
+    buffer.append(
+        {
+            "client_id": client_id,
+            "lead_id": lead_id,
+            "channel": channel,
+            "status": status,
+            "message": message,
+            "body": body,
+        }
+    )
+
+
+def store_bodies(session, bodies: list[str]) -> dict[str, str]:
+    """Persist *bodies* and map text to hash.
+
+    New bodies are inserted with ``ON CONFLICT DO NOTHING``, so shared rows
+    that already exist are not rewritten. Every referenced row is then read
+    back ``FOR KEY SHARE``: the lock keeps
+    :func:`~.retention_service.purge_orphan_bodies` from deleting it until
+    the logs pointing at it are committed, while other writers reusing the
+    same body are not blocked. Bodies purged between the two statements are
+    written again instead of failing the logs' foreign key.
+    """
+
+    by_hash = {hash_body(text): text for text in bodies}
+    missing = set(by_hash)
+    while missing:
+        session.execute(
+            dialect_insert(session, NotificationBody).on_conflict_do_nothing(
+                index_elements=["hash"]
+            ),
+            [
+                {
+                    "hash": digest,
+                    "content": compress_body(by_hash[digest]),
+                    "size": len(by_hash[digest].encode("utf-8")),
+                }
+                for digest in sorted(missing)
+            ],
+        )
+        missing -= set(
+            session.execute(
+                select(NotificationBody.hash)
+                .where(NotificationBody.hash.in_(missing))
+                .with_for_update(read=True, key_share=True)
+            ).scalars()
+        )
+    return {text: digest for digest, text in by_hash.items()}
+
+
+def flush_notification_logs(session, buffer: list[dict]) -> int:
+    """Insert all buffered outcomes using *session* and clear *buffer*.
+
+    Returns the number of rows written. Bodies and logs are written with one
+    statement each and committed together regardless of how many outcomes
+    were recorded.
+    """
+
+    if not buffer:
+        return 0
+    hashes = store_bodies(
+        session,
+        [entry["body"] for entry in buffer if entry.get("body") is not None],
+    )
+    rows = []
+    for entry in buffer:
+        row = dict(entry)
+        body = row.pop("body", None)
+        row["body_hash"] = hashes.get(body) if body is not None else None
+        rows.append(row)
+    session.execute(insert(NotificationLog), rows)
+    session.commit()
+    record_notifications(rows)
+    buffer.clear()
+    return len(rows)
+
+
+def get_notification_body(log_id: int) -> str | None:
+    """Return the full message for a log, loading its body on demand.
+
+    Older rows written before bodies were split out keep the whole message
+    inline, so that is returned when no body is referenced.
+    """
+
+    with get_session() as session:
+        row = session.execute(
+            select(NotificationLog.message, NotificationBody.content)
+            .outerjoin(
+                NotificationBody,
+                NotificationBody.hash == NotificationLog.body_hash,
+            )
+            .where(NotificationLog.id == log_id)
+        ).first()
+        if row is None:
+            return None
+        message, content = row
+        return decompress_body(content) if content is not None else message
+
+
+@contextmanager
+def notification_log_buffer() -> Iterator[list[dict]]:
+    """Yield a buffer shared across several ``create_lead`` calls.
+
+    Buffered outcomes are flushed in one statement when the block exits,
+    including when it exits early through ``return`` or an exception.
+    """
+
+    buffer: list[dict] = []
+    try:
+        yield buffer
+    finally:
+        if buffer:
+            with get_session() as session:
+                try:
+                    flush_notification_logs(session, buffer)
+                except (
+                    Exception
+                ) as exc:  # pragma: no cover - logging side effects
+                    session.rollback()
+                    _logger().error(
+                        "Failed to write notification logs: %s", exc
+                    )
+
+
+def clamp_page_size(limit: int | None) -> int:
+    """Return *limit* bounded to ``1..MAX_PAGE_SIZE``."""
+
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def list_notification_logs(
+    limit: int = DEFAULT_PAGE_SIZE,
+    before_id: int | None = None,
+    since_id: int | None = None,
+    status: str | None = None,
+    channel: str | None = None,
+    client_id: int | None = None,
+    start_date=None,
+    end_date=None,
+) -> tuple[list[dict], int | None]:
+    """Return one page of notification logs, newest first.
+
+    Pagination uses the log id as a cursor: pass the returned cursor as
+    *before_id* to fetch the next (older) page. *since_id* instead returns
+    only entries newer than the given id, which lets the UI poll for new
+    activity without refetching what it already shows. Client and lead
+    names are selected through outer joins rather than loading the related
+    objects, and only a message preview is selected; full bodies are
+    fetched with :func:`get_notification_body`.
+
+    Returns ``(rows, next_before_id)`` where ``next_before_id`` is ``None``
+    once the last page has been reached.
+    """
+
+    limit = clamp_page_size(limit)
+    with get_session() as session:
+        query = (
+            session.query(
+                NotificationLog.id,
+                NotificationLog.client_id,
+                NotificationLog.lead_id,
+                NotificationLog.channel,
+                NotificationLog.status,
+                func.substr(
+                    NotificationLog.message, 1, MESSAGE_PREVIEW_LENGTH
+                ).label("message"),
+                NotificationLog.body_hash.isnot(None).label("has_body"),
+                NotificationLog.created_at,
+                Client.company_name.label("client_name"),
+                Lead.name.label("lead_name"),
+            )
+            .outerjoin(Client, Client.id == NotificationLog.client_id)
+            .outerjoin(Lead, Lead.id == NotificationLog.lead_id)
+        )
+        if status:
+            query = query.filter(NotificationLog.status == status)
+        if channel:
+            query = query.filter(NotificationLog.channel == channel)
+        if client_id:
+            query = query.filter(NotificationLog.client_id == client_id)
+        if start_date:
+            query = query.filter(NotificationLog.created_at >= start_date)
+        if end_date:
+            query = query.filter(NotificationLog.created_at <= end_date)
+
+        if since_id is not None:
+            # Oldest unseen entries first so repeated polls never skip rows,
+            # then flip to newest-first for display.
+            rows = (
+                query.filter(NotificationLog.id > since_id)
+                .order_by(NotificationLog.id.asc())
+                .limit(limit)
+                .all()
+            )
+            rows.reverse()
+            next_before_id = None
+        else:
+            if before_id is not None:
+                query = query.filter(NotificationLog.id < before_id)
+            rows = (
+                query.order_by(NotificationLog.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+            next_before_id = rows[limit - 1].id if len(rows) > limit else None
+            rows = rows[:limit]
+
+        return [dict(row._mapping) for row in rows], next_before_id
+
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "MESSAGE_PREVIEW_LENGTH",
+    "clamp_page_size",
+    "compress_body",
+    "decompress_body",
+    "get_notification_body",
+    "hash_body",
+    "store_bodies",
+    "list_notification_logs",
+    "record_notification",
+    "flush_notification_logs",
+    "notification_log_buffer",
+]
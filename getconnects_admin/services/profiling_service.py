@@ -0,0 +1,252 @@
+"""On-demand profiling of single requests.
+
+A superuser adds ``?__profile=1`` to a URL or sends an ``X-Profile: 1``
+header and that one request runs under :mod:`cProfile` while a background
+thread samples its call stack. Two files are written:
+
+* ``<id>.pstats`` for :mod:`pstats`, snakeviz or gprof2dot;
+* ``<id>.folded`` with collapsed stacks (``a;b;c 12``) for flamegraph.pl or
+  speedscope.
+
+A ``<id>.json`` file describes the request. ``PROFILE_DIR`` keeps the newest
+``PROFILE_KEEP`` profiles and deletes older ones, and the settings area
+lists them. Other requests pay one header and one query-string lookup.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, g, request, session
+
+from .auth_decorators import _refresh_if_stale
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ARG = "__profile"
+PROFILE_KINDS = ("pstats", "folded")
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{12}-\d+$")
+
+
+class StackSampler(threading.Thread):
+    """Count the call stacks of thread *thread_id* every *interval* seconds."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                names.append(
+                    f"{code.co_name} ({filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+class RequestProfile:
+    def __init__(self, interval: float):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.start = time.perf_counter()
+
+    def begin(self) -> None:
+        self.sampler.start()
+        self.profiler.enable()
+
+    def end(self) -> float:
+        self.profiler.disable()
+        self.sampler.stop()
+        return time.perf_counter() - self.start
+
+
+def profile_requested() -> bool:
+    """Return whether the current request asks to be profiled.
+
+    Only ``1`` and ``true`` enable profiling; ``?__profile=0`` does not.
+    """
+
+    values = (
+        request.headers.get(PROFILE_HEADER),
+        request.args.get(PROFILE_ARG),
+    )
+    return any(
+        (value or "").strip().lower() in {"1", "true"} for value in values
+    )
+
+
+def save_profile(
+    directory: str, keep: int, profile: RequestProfile, meta: dict
+) -> str:
+    """Write *profile* to *directory* and return its id.
+
+    Profiles beyond the newest *keep* are removed.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+    base = os.path.join(directory, profile_id)
+    profile.profiler.dump_stats(f"{base}.pstats")
+    with open(f"{base}.folded", "w") as fh:
+        fh.write(profile.sampler.collapsed())
+    with open(f"{base}.json", "w") as fh:
+        json.dump(
+            {
+                **meta,
+                "id": profile_id,
+                "samples": sum(profile.sampler.stacks.values()),
+            },
+            fh,
+        )
+    for old in _profile_ids(directory)[keep:]:
+        for ext in ("json", *PROFILE_KINDS):
+            try:
+                os.remove(os.path.join(directory, f"{old}.{ext}"))
+            except FileNotFoundError:  # removed by another worker
+                pass
+    return profile_id
+
+
+def _profile_ids(directory: str) -> list[str]:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (
+            name[:-5]
+            for name in names
+            if name.endswith(".json") and _PROFILE_ID.match(name[:-5])
+        ),
+        reverse=True,
+    )
+
+
+def list_profiles(directory: str) -> list[dict]:
+    """Return the metadata of stored profiles, newest first."""
+
+    profiles = []
+    for profile_id in _profile_ids(directory):
+        try:
+            with open(os.path.join(directory, f"{profile_id}.json")) as fh:
+                profiles.append(json.load(fh))
+        except (OSError, ValueError):  # pruned or half written
+            continue
+    return profiles
+
+
+def profile_path(directory: str, profile_id: str, kind: str) -> str | None:
+    """Return the path of a stored profile file, or ``None`` if invalid."""
+
+    if kind not in PROFILE_KINDS or not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(directory, f"{profile_id}.{kind}")
+    return path if os.path.exists(path) else None
+
+
+def _start_profile() -> None:
+    if not profile_requested():
+        return
+    # Runs before require_login, so the flag may not have been re-checked yet
+    _refresh_if_stale()
+    if not session.get("is_superuser"):
+        return
+    profile = RequestProfile(
+        current_app.config.get("PROFILE_SAMPLE_INTERVAL", 0.005)
+    )
+    try:
+        profile.begin()
+    except ValueError:  # another profiler is already active
+        profile.sampler.stop()
+        return
+    g.request_profile = profile
+
+
+def _finish_profile(response, error: str | None = None) -> str | None:
+    profile = g.pop("request_profile", None)
+    if profile is None:
+        return None
+    duration = profile.end()
+    config = current_app.config
+    meta = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": response.status_code if response is not None else 500,
+        "duration_ms": round(duration * 1000, 1),
+        "user": session.get("uid"),
+        "error": error,
+    }
+    try:
+        return save_profile(
+            config["PROFILE_DIR"], config["PROFILE_KEEP"], profile, meta
+        )
+    except OSError as exc:
+        logger.error("Failed to save request profile: %s", exc)
+        return None
+
+
+def _after_request(response):
+    profile_id = _finish_profile(response)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _teardown_request(exc) -> None:
+    # Only still active when the request failed before after_request ran
+    if exc is not None:
+        _finish_profile(None, error=repr(exc))
+
+
+def init_app(app) -> None:
+    """Install the profiling hooks.
+
+    Call before registering other ``before_request`` handlers.
+    """
+
+    app.before_request(_start_profile)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+__all__ = [
+    "PROFILE_ARG",
+    "PROFILE_HEADER",
+    "PROFILE_KINDS",
+    "RequestProfile",
+    "StackSampler",
+    "init_app",
+    "list_profiles",
+    "profile_path",
+    "profile_requested",
+    "save_profile",
+]
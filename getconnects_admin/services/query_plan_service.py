@@ -0,0 +1,310 @@
+"""Query plan regression checks for the app's canonical queries.
+
+:data:`QUERIES` registers the statements behind the lead listing, stats,
+campaign and search code paths, built with the same helpers the services
+use. :func:`explain_queries` runs each of them under
+``EXPLAIN (ANALYZE, FORMAT JSON)`` on PostgreSQL or ``EXPLAIN QUERY PLAN``
+on SQLite and reduces the plan to the tables read with a full scan and, on
+PostgreSQL, the planner's total cost.
+
+Reports are compared with a JSON baseline holding one section per dialect.
+A query regresses when it full-scans a table its baseline did not, or when
+its cost grows by more than the allowed ratio. Plans depend on data
+volume, so baselines should be recorded against a seeded dataset (see
+:mod:`.seed_service`) of the same size the check later runs against.
+"""
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Query
+
+try:
+    from ..models import Base
+    from ..models.campaign import Campaign
+    from ..models.lead import Lead
+except ImportError:  # pragma: no cover
+    from models import Base
+    from models.campaign import Campaign
+    from models.lead import Lead
+from .campaign_service import _campaign_groups
+from .helpers import get_session
+from .lead_service import _query_leads, _with_names
+from .stats_service import _leads_by_campaign, _leads_since
+
+
+@dataclass(frozen=True)
+class PlanParams:
+    """Representative filter values taken from the dataset."""
+
+    client_id: int | None
+    campaign_id: str | None
+    lead_type: str | None
+    since: datetime
+
+
+@dataclass(frozen=True)
+class PlanReport:
+    name: str
+    scans: tuple[str, ...]
+    cost: float | None
+    plan: object = field(default=None, compare=False, repr=False)
+
+    def as_baseline(self) -> dict:
+        return {"scans": list(self.scans), "cost": self.cost}
+
+
+# Registered queries: name -> builder(session, params) returning a Query
+# or Select
+QUERIES: dict[str, Callable] = {}
+
+
+def register(name: str):
+    def _decorator(builder: Callable) -> Callable:
+        QUERIES[name] = builder
+        return builder
+
+    return _decorator
+
+
+def _page(query):
+    return _with_names(query).order_by(Lead.id).limit(20)
+
+
+def _count(query):
+    # Mirrors ``Query.count()`` as used by the paginated listing
+    return select(func.count()).select_from(query.statement.subquery())
+
+
+@register("leads.page")
+def _leads_page(session, params):
+    return _page(_query_leads(session))
+
+
+@register("leads.page_by_client")
+def _leads_page_by_client(session, params):
+    return _page(_query_leads(session, client_id=params.client_id))
+
+
+@register("leads.count_by_client")
+def _leads_count_by_client(session, params):
+    return _count(_query_leads(session, client_id=params.client_id))
+
+
+@register("leads.page_by_campaign")
+def _leads_page_by_campaign(session, params):
+    return _page(
+        _query_leads(
+            session, campaign_id=params.campaign_id, start_date=params.since
+        )
+    )
+
+
+@register("leads.count_by_lead_type")
+def _leads_count_by_lead_type(session, params):
+    return _count(
+        _query_leads(
+            session, lead_type=params.lead_type, start_date=params.since
+        )
+    )
+
+
+@register("stats.leads_since")
+def _stats_leads_since(session, params):
+    return _leads_since(session, params.since)
+
+
+@register("stats.leads_by_campaign")
+def _stats_leads_by_campaign(session, params):
+    return _leads_by_campaign(session)
+
+
+@register("campaigns.lead_type_groups")
+def _campaigns_lead_type_groups(session, params):
+    return _campaign_groups(session, params.campaign_id)
+
+
+@register("search.leads")
+def _search_leads(session, params):
+    # ``/api/search`` filters the full listing in Python
+    return _with_names(_query_leads(session))
+
+
+def plan_params(session) -> PlanParams:
+    """Pick the busiest campaign, its client and the most common lead type."""
+
+    busiest = session.execute(
+        select(Campaign.id, Campaign.client_id)
+        .join(Lead, Lead.campaign_id == Campaign.id)
+        .group_by(Campaign.id, Campaign.client_id)
+        .order_by(func.count(Lead.id).desc())
+        .limit(1)
+    ).first()
+    lead_type = session.execute(
+        select(Lead.lead_type)
+        .where(Lead.lead_type.isnot(None))
+        .group_by(Lead.lead_type)
+        .order_by(func.count(Lead.id).desc())
+        .limit(1)
+    ).scalar()
+    campaign_id, client_id = busiest if busiest else (None, None)
+    return PlanParams(
+        client_id=client_id,
+        campaign_id=campaign_id,
+        lead_type=lead_type,
+        since=datetime.utcnow() - timedelta(days=7),
+    )
+
+
+def _sql(connection, statement) -> str:
+    """Compile *statement* for *connection*'s dialect with its values inlined.
+
+    The statement is never executed; ``EXPLAIN ANALYZE`` runs it once.
+    """
+
+    if isinstance(statement, Query):
+        statement = statement.statement
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    return str(compiled)
+
+
+def _pg_scans(node: dict) -> list[str]:
+    scans = (
+        [node["Relation Name"]] if node.get("Node Type") == "Seq Scan" else []
+    )
+    for child in node.get("Plans", ()):
+        scans.extend(_pg_scans(child))
+    return scans
+
+
+def _sqlite_scans(details: list[str]) -> list[str]:
+    # "SCAN leads" reads the table; "SCAN leads USING INDEX ..." and
+    # "SEARCH ..." go through an index
+    scans = []
+    for detail in details:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and "USING" not in words:
+            if words[1] in Base.metadata.tables:
+                scans.append(words[1])
+    return scans
+
+
+def explain(session, name: str, statement) -> PlanReport:
+    connection = session.connection()
+    sql = _sql(connection, statement)
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql(
+            "EXPLAIN (ANALYZE, FORMAT JSON) " + sql
+        ).scalar()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+        root = plan["Plan"]
+        return PlanReport(
+            name, tuple(sorted(set(_pg_scans(root)))), root["Total Cost"], plan
+        )
+    # sqlite3 caches prepared statements by their text and a cached EXPLAIN
+    # keeps reporting the plan from before a schema change
+    nonce = f" -- {uuid.uuid4().hex}"
+    details = [
+        row[-1]
+        for row in connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + sql + nonce
+        )
+    ]
+    return PlanReport(
+        name, tuple(sorted(set(_sqlite_scans(details)))), None, details
+    )
+
+
+def analyze(session) -> None:
+    """Refresh planner statistics after seeding."""
+
+    session.execute(text("ANALYZE"))
+    session.commit()
+
+
+def explain_queries(
+    names: list[str] | None = None,
+) -> tuple[str, list[PlanReport]]:
+    """Explain the registered queries; returns the dialect name and reports."""
+
+    with get_session() as session:
+        params = plan_params(session)
+        dialect = session.connection().dialect.name
+        reports = [
+            explain(session, name, QUERIES[name](session, params))
+            for name in (names or QUERIES)
+        ]
+        session.rollback()
+    return dialect, reports
+
+
+def compare_plans(
+    reports: list[PlanReport], baseline: dict, cost_threshold: float
+) -> list[str]:
+    """Return a description of every regression against *baseline*.
+
+    *baseline* maps query names to ``{"scans": [...], "cost": ...}``;
+    queries without a baseline entry are not checked.
+    """
+
+    regressions = []
+    for report in reports:
+        expected = baseline.get(report.name)
+        if expected is None:
+            continue
+        new_scans = sorted(set(report.scans) - set(expected.get("scans", ())))
+        if new_scans:
+            regressions.append(
+                f"{report.name}: full scan of {', '.join(new_scans)}"
+            )
+        base_cost = expected.get("cost")
+        if (
+            base_cost
+            and report.cost is not None
+            and report.cost > base_cost * (1 + cost_threshold)
+        ):
+            regressions.append(
+                f"{report.name}: cost {report.cost:.1f} exceeds baseline "
+                f"{base_cost:.1f}"
+            )
+    return regressions
+
+
+def load_baseline(path: str | Path, dialect: str) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get(dialect, {})
+
+
+def save_baseline(
+    path: str | Path, dialect: str, reports: list[PlanReport]
+) -> None:
+    """Replace the *dialect* section of the baseline file with *reports*."""
+
+    path = Path(path)
+    data = json.loads(path.read_text()) if path.exists() else {}
+    data[dialect] = {report.name: report.as_baseline() for report in reports}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+__all__ = [
+    "PlanParams",
+    "PlanReport",
+    "QUERIES",
+    "analyze",
+    "compare_plans",
+    "explain",
+    "explain_queries",
+    "load_baseline",
+    "plan_params",
+    "register",
+    "save_baseline",
+]
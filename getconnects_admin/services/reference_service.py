@@ -0,0 +1,245 @@
+"""Shared reference data for the lead forms.
+
+The leads page, lead updates and CSV imports all need the same lookup
+data: campaigns with their client, lead type names and the lead types each
+campaign allows. It is assembled once into an immutable :class:`ReferenceData`
+snapshot and shared by every request in the process.
+
+Snapshots are tagged with a stamp kept in the shared cache. Session hooks
+bump the stamp whenever a commit touches campaigns, clients, lead types,
+groups or their mappings, so every worker sharing the cache rebuilds once
+on its next lookup. The default cache is per process, so snapshots are also
+rebuilt once they are ``REFERENCE_DATA_TTL`` seconds old; changes made by
+another worker are picked up within that interval. The serialised JSON is
+kept alongside the snapshot and served with an ETag derived from its
+content.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from flask import has_app_context
+from sqlalchemy import event, select
+
+try:
+    from ..models import SessionLocal
+    from ..models.campaign import Campaign
+    from ..models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from ..models.campaign_lead_type import CampaignLeadType
+    from ..models.campaign_lead_type_group import CampaignLeadTypeGroup
+    from ..models.client import Client
+    from ..models.lead_type import LeadType
+    from ..models.lead_type_group import LeadTypeGroup
+except ImportError:  # pragma: no cover
+    from models import SessionLocal
+    from models.campaign import Campaign
+    from models.campaign_effective_lead_type import CampaignEffectiveLeadType
+    from models.campaign_lead_type import CampaignLeadType
+    from models.campaign_lead_type_group import CampaignLeadTypeGroup
+    from models.client import Client
+    from models.lead_type import LeadType
+    from models.lead_type_group import LeadTypeGroup
+from .helpers import get_session
+
+_VERSION_KEY = "reference_data_version"
+_CHANGED = "reference_data_changed"
+
+# Seconds a snapshot is served before it is rebuilt regardless of the stamp
+REFERENCE_DATA_TTL = 30
+
+# Writes to these models invalidate the snapshot
+REFERENCE_MODELS = (
+    Campaign,
+    CampaignEffectiveLeadType,
+    CampaignLeadType,
+    CampaignLeadTypeGroup,
+    Client,
+    LeadType,
+    LeadTypeGroup,
+)
+
+_snapshot: "ReferenceData | None" = None
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Immutable lookup data for the lead forms."""
+
+    version: int
+    built_at: float
+    etag: str
+    payload: bytes
+    campaigns: tuple
+    clients: tuple
+    lead_types: tuple[str, ...]
+    campaign_lead_types: MappingProxyType
+
+    @property
+    def campaign_choices(self) -> list[tuple[str, str]]:
+        return [(c["id"], c["name"]) for c in self.campaigns]
+
+    @property
+    def lead_type_choices(self) -> list[tuple[str, str]]:
+        return [(name, name) for name in self.lead_types]
+
+
+def reference_version() -> int:
+    """Return the current reference data stamp (``0`` until first bumped)."""
+
+    from .. import cache
+
+    return cache.get(_VERSION_KEY) or 0
+
+
+def bump_reference_version() -> None:
+    """Make every process rebuild the reference data on its next lookup."""
+
+    global _snapshot
+    _snapshot = None
+    if has_app_context():
+        from .. import cache
+
+        cache.set(_VERSION_KEY, time.time_ns(), timeout=0)
+
+
+def _campaign_lead_types(session) -> dict[str, list[str]]:
+    """Return lead type names allowed per campaign, direct mappings first."""
+
+    type_map: dict[str, list[str]] = {}
+    eff = CampaignEffectiveLeadType
+    rows = session.execute(
+        select(eff.campaign_id, eff.lead_type_name).order_by(
+            eff.campaign_id, eff.source, eff.lead_type_name
+        )
+    )
+    for campaign_id, name in rows:
+        existing = type_map.setdefault(campaign_id, [])
+        if name not in existing:
+            existing.append(name)
+    return type_map
+
+
+def _build(version: int) -> ReferenceData:
+    with get_session() as session:
+        campaign_rows = session.execute(
+            select(
+                Campaign.id,
+                Campaign.campaign_name,
+                Campaign.client_id,
+                Client.company_name,
+            ).outerjoin(Client, Client.id == Campaign.client_id)
+        ).all()
+        client_rows = session.execute(
+            select(Client.id, Client.company_name)
+        ).all()
+        lead_types = tuple(session.execute(select(LeadType.name)).scalars())
+        type_map = _campaign_lead_types(session)
+
+    campaigns = [
+        {
+            "id": campaign_id,
+            "name": name,
+            "client": company or "None",
+            "client_id": client_id,
+            "lead_types": type_map.get(campaign_id, []),
+        }
+        for campaign_id, name, client_id, company in campaign_rows
+    ]
+    clients = [
+        {"id": client_id, "name": name} for client_id, name in client_rows
+    ]
+    payload = json.dumps(
+        {
+            "campaigns": campaigns,
+            "clients": clients,
+            "lead_types": list(lead_types),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    return ReferenceData(
+        version=version,
+        built_at=time.monotonic(),
+        etag=hashlib.sha256(payload).hexdigest()[:32],
+        payload=payload,
+        campaigns=tuple(MappingProxyType(c) for c in campaigns),
+        clients=tuple(MappingProxyType(c) for c in clients),
+        lead_types=lead_types,
+        campaign_lead_types=MappingProxyType(
+            {
+                campaign_id: tuple(names)
+                for campaign_id, names in type_map.items()
+            }
+        ),
+    )
+
+
+def _current(snapshot: ReferenceData | None, version: int) -> bool:
+    return (
+        snapshot is not None
+        and snapshot.version == version
+        and time.monotonic() - snapshot.built_at < REFERENCE_DATA_TTL
+    )
+
+
+def get_reference_data(refresh: bool = False) -> ReferenceData:
+    """Return the current snapshot, rebuilt if the stamp moved or it expired.
+
+    *refresh* forces a rebuild, for callers that found a value missing which
+    another worker may have just added.
+    """
+
+    global _snapshot
+    version = reference_version()
+    snapshot = _snapshot
+    if not refresh and _current(snapshot, version):
+        return snapshot
+    with _lock:
+        if refresh or not _current(_snapshot, version):
+            _snapshot = _build(version)
+        snapshot = _snapshot
+    return snapshot
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_flush(session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, REFERENCE_MODELS):
+            session.info[_CHANGED] = True
+            return
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_bulk(orm_execute_state) -> None:
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, REFERENCE_MODELS):
+        state.session.info[_CHANGED] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_on_commit(session) -> None:
+    if session.info.pop(_CHANGED, False):
+        bump_reference_version()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_on_rollback(session) -> None:
+    session.info.pop(_CHANGED, None)
+
+
+__all__ = [
+    "REFERENCE_DATA_TTL",
+    "REFERENCE_MODELS",
+    "ReferenceData",
+    "bump_reference_version",
+    "get_reference_data",
+    "reference_version",
+]
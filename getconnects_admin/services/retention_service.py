@@ -0,0 +1,289 @@
+"""Retention and archival of high-volume log tables.
+
+Rows older than a configurable age are streamed out of ``notification_logs``
+and ``justcall_webhook_payloads`` in id-ordered chunks and written to gzip
+compressed NDJSON files. Only once an archive file has been fully written and
+closed are the archived rows deleted, in bounded batches so no single
+statement holds locks for long.
+"""
+
+import gzip
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+try:
+    from ..models.justcall_webhook_payload import JustCallWebhookPayload
+    from ..models.notification_body import NotificationBody
+    from ..models.notification_log import NotificationLog
+except ImportError:  # pragma: no cover
+    from models.justcall_webhook_payload import JustCallWebhookPayload
+    from models.notification_body import NotificationBody
+    from models.notification_log import NotificationLog
+from .helpers import get_session
+from .notification_service import decompress_body
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class RetentionResult:
+    """Outcome of applying retention to one table."""
+
+    table: str
+    cutoff: datetime
+    rows: int = 0
+    bytes: int = 0
+    archive_path: str | None = None
+    deleted: int = 0
+    dry_run: bool = False
+    extra: dict = field(default_factory=dict)
+
+
+def _logger():
+    try:
+        return current_app.logger
+    except Exception:  # pragma: no cover - fallback when outside app context
+        return logging.getLogger(__name__)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _notification_rows(
+    session, cutoff: datetime, batch_size: int
+) -> Iterator[list[dict]]:
+    """Yield expired notification logs, with bodies inlined, in id order."""
+
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(
+                NotificationLog.id,
+                NotificationLog.client_id,
+                NotificationLog.lead_id,
+                NotificationLog.channel,
+                NotificationLog.status,
+                NotificationLog.message,
+                NotificationLog.body_hash,
+                NotificationLog.created_at,
+                NotificationBody.content,
+            )
+            .outerjoin(
+                NotificationBody,
+                NotificationBody.hash == NotificationLog.body_hash,
+            )
+            .where(
+                NotificationLog.created_at < cutoff,
+                NotificationLog.id > last_id,
+            )
+            .order_by(NotificationLog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        chunk = []
+        for row in rows:
+            data = dict(row._mapping)
+            content = data.pop("content")
+            data["body"] = (
+                decompress_body(content) if content is not None else None
+            )
+            chunk.append(data)
+        yield chunk
+        last_id = rows[-1].id
+
+
+def _payload_rows(
+    session, cutoff: datetime, batch_size: int
+) -> Iterator[list[dict]]:
+    """Yield expired webhook payloads in id order."""
+
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(
+                JustCallWebhookPayload.id,
+                JustCallWebhookPayload.token_id,
+                JustCallWebhookPayload.payload,
+                JustCallWebhookPayload.created_at,
+            )
+            .where(
+                JustCallWebhookPayload.created_at < cutoff,
+                JustCallWebhookPayload.id > last_id,
+            )
+            .order_by(JustCallWebhookPayload.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield [dict(row._mapping) for row in rows]
+        last_id = rows[-1].id
+
+
+# table name -> (model, chunk reader)
+RETENTION_TABLES = {
+    "notification_logs": (NotificationLog, _notification_rows),
+    "justcall_webhook_payloads": (JustCallWebhookPayload, _payload_rows),
+}
+
+
+def _delete_batches(
+    session, model, cutoff: datetime, max_id: int, batch_size: int
+) -> int:
+    """Delete archived rows ``batch_size`` at a time, committing after each."""
+
+    deleted = 0
+    while True:
+        ids = select(model.id).where(
+            model.created_at < cutoff, model.id <= max_id
+        ).order_by(model.id).limit(batch_size)
+        result = session.execute(
+            delete(model)
+            .where(model.id.in_(ids.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        if not result.rowcount:
+            return deleted
+        deleted += result.rowcount
+
+
+def purge_orphan_bodies(session, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Remove stored notification bodies no longer referenced by any log.
+
+    Candidates are selected ``FOR UPDATE SKIP LOCKED`` on PostgreSQL, so
+    bodies that :func:`~.notification_service.store_bodies` is reusing in an
+    uncommitted transaction are skipped rather than deleted under it.
+    """
+
+    referenced = select(NotificationLog.id).where(
+        NotificationLog.body_hash == NotificationBody.hash
+    )
+    deleted = 0
+    while True:
+        hashes = (
+            select(NotificationBody.hash)
+            .where(~referenced.exists())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = session.execute(
+            delete(NotificationBody)
+            .where(NotificationBody.hash.in_(hashes.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        if not result.rowcount:
+            return deleted
+        deleted += result.rowcount
+
+
+def apply_retention(
+    table: str,
+    days: int,
+    archive_dir: str,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: datetime | None = None,
+) -> RetentionResult:
+    """Archive and delete rows of *table* older than *days*.
+
+    In *dry_run* mode rows are streamed and serialised exactly as they would
+    be archived, but nothing is written or deleted; ``bytes`` then reports the
+    uncompressed NDJSON size that would be reclaimed.
+    """
+
+    model, reader = RETENTION_TABLES[table]
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    result = RetentionResult(table=table, cutoff=cutoff, dry_run=dry_run)
+
+    with get_session() as session:
+        archive = None
+        path = None
+        max_id = 0
+        try:
+            for chunk in reader(session, cutoff, batch_size):
+                lines = "".join(
+                    json.dumps(row, default=_json_default) + "\n"
+                    for row in chunk
+                ).encode("utf-8")
+                result.rows += len(chunk)
+                result.bytes += len(lines)
+                max_id = chunk[-1]["id"]
+                if dry_run:
+                    continue
+                if archive is None:
+                    os.makedirs(archive_dir, exist_ok=True)
+                    stamp = (now or datetime.utcnow()).strftime(
+                        "%Y%m%dT%H%M%S"
+                    )
+                    # Never overwrite an archive whose rows are already deleted
+                    suffix = uuid.uuid4().hex[:8]
+                    path = os.path.join(
+                        archive_dir, f"{table}-{stamp}-{suffix}.ndjson.gz"
+                    )
+                    archive = gzip.open(path, "xb")
+                archive.write(lines)
+        finally:
+            if archive is not None:
+                archive.close()
+        session.rollback()
+
+        if dry_run or not result.rows:
+            return result
+
+        result.archive_path = path
+        result.deleted = _delete_batches(
+            session, model, cutoff, max_id, batch_size
+        )
+        if model is NotificationLog:
+            result.extra["bodies_deleted"] = purge_orphan_bodies(
+                session, batch_size
+            )
+        _logger().info(
+            "Archived %s rows from %s to %s", result.deleted, table, path
+        )
+    return result
+
+
+def apply_retention_policies(
+    config, dry_run: bool = False, now: datetime | None = None
+) -> list[RetentionResult]:
+    """Apply the configured retention to every supported table."""
+
+    days = {
+        "notification_logs": config["NOTIFICATION_LOG_RETENTION_DAYS"],
+        "justcall_webhook_payloads": config["WEBHOOK_PAYLOAD_RETENTION_DAYS"],
+    }
+    return [
+        apply_retention(
+            table,
+            days[table],
+            config["RETENTION_ARCHIVE_DIR"],
+            dry_run=dry_run,
+            batch_size=config["RETENTION_BATCH_SIZE"],
+            now=now,
+        )
+        for table in RETENTION_TABLES
+    ]
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "RETENTION_TABLES",
+    "RetentionResult",
+    "apply_retention",
+    "apply_retention_policies",
+    "purge_orphan_bodies",
+]
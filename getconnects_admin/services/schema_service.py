@@ -0,0 +1,176 @@
+"""Process-wide registry of database schema capabilities.
+
+Some code paths stay compatible with databases that have not been migrated
+yet (for example ``notification_templates`` without ``email_text``).
+Inspecting the catalog on every request to find out is a round trip per
+page view, so the table and column layout is read once per process and
+engine and answered from memory afterwards.
+
+The snapshot is tagged with a schema stamp derived from the applied
+versions in ``schema_migrations``, which every process reads at most once
+per ``SCHEMA_VERSION_TTL`` seconds. A ``flask migrate`` run in any process
+therefore makes every worker re-inspect the database within that interval;
+:func:`bump_schema_version` makes the calling process do so at once.
+"""
+
+import logging
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+try:
+    from ..models import engine
+    from ..models.schema_migration import SchemaMigration
+except ImportError:  # pragma: no cover
+    from models import engine
+    from models.schema_migration import SchemaMigration
+
+# Seconds a process trusts the schema stamp before reading it again
+SCHEMA_VERSION_TTL = 30
+
+# Named capabilities mapped to the ``(table, column)`` they depend on
+FEATURES = {
+    "notification_template_email_text": (
+        "notification_templates",
+        "email_text",
+    ),
+}
+
+_snapshots: dict[str, "SchemaCapabilities"] = {}
+# bind URL -> (monotonic time read, stamp)
+_versions: dict[str, tuple[float, str]] = {}
+_lock = threading.Lock()
+
+
+def _logger():
+    try:
+        return current_app.logger
+    except Exception:  # pragma: no cover - fallback when outside app context
+        return logging.getLogger(__name__)
+
+
+class SchemaCapabilities:
+    """Immutable view of the tables and columns present in a database."""
+
+    __slots__ = ("version", "tables")
+
+    def __init__(
+        self, version: str, tables: dict[str, frozenset[str]]
+    ) -> None:
+        self.version = version
+        self.tables = tables
+
+    def has_table(self, table: str) -> bool:
+        return table in self.tables
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.tables.get(table, ())
+
+    def supports(self, feature: str) -> bool:
+        return self.has_column(*FEATURES[feature])
+
+
+def _read_version(bind) -> str:
+    with bind.connect() as conn:
+        count, latest = conn.execute(
+            select(func.count(), func.max(SchemaMigration.version))
+        ).one()
+    return f"{count}:{latest or ''}"
+
+
+def schema_version(bind=None) -> str:
+    """Return the schema stamp of *bind* (the app engine by default).
+
+    The stamp changes whenever a migration is recorded in
+    ``schema_migrations``; it is empty for databases without that table.
+    """
+
+    bind = bind if bind is not None else engine
+    key = str(bind.url)
+    cached = _versions.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < SCHEMA_VERSION_TTL:
+        return cached[1]
+    try:
+        version = _read_version(bind)
+    except SQLAlchemyError:
+        version = ""
+    _versions[key] = (now, version)
+    return version
+
+
+def bump_schema_version(bind=None) -> None:
+    """Make this process re-read the stamp and re-inspect *bind* (or all).
+
+    Other processes follow within ``SCHEMA_VERSION_TTL`` seconds.
+    """
+
+    with _lock:
+        if bind is None:
+            _versions.clear()
+            _snapshots.clear()
+        else:
+            _versions.pop(str(bind.url), None)
+            _snapshots.pop(str(bind.url), None)
+
+
+def _inspect(bind, version: str) -> SchemaCapabilities:
+    inspector = sa_inspect(bind)
+    tables = {
+        table: frozenset(
+            column["name"] for column in inspector.get_columns(table)
+        )
+        for table in inspector.get_table_names()
+    }
+    return SchemaCapabilities(version, tables)
+
+
+def schema_capabilities(bind=None) -> SchemaCapabilities:
+    """Return the capability snapshot for *bind* (the app engine by default).
+
+    The catalog is only queried the first time a bind is seen and after the
+    schema stamp changes. Inspection failures are logged and reported as an
+    empty schema without being cached, so the next call retries.
+    """
+
+    bind = bind if bind is not None else engine
+    key = str(bind.url)
+    version = schema_version(bind)
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        try:
+            snapshot = _inspect(bind, version)
+        except Exception:
+            _logger().exception("Failed to inspect database schema")
+            return SchemaCapabilities(version, {})
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def refresh_schema_capabilities(bind=None) -> SchemaCapabilities:
+    """Drop the cached snapshot for *bind* in this process and re-inspect."""
+
+    bind = bind if bind is not None else engine
+    with _lock:
+        _snapshots.pop(str(bind.url), None)
+    return schema_capabilities(bind)
+
+
+__all__ = [
+    "FEATURES",
+    "SCHEMA_VERSION_TTL",
+    "SchemaCapabilities",
+    "bump_schema_version",
+    "refresh_schema_capabilities",
+    "schema_capabilities",
+    "schema_version",
+]
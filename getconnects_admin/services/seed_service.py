@@ -0,0 +1,208 @@
+"""Deterministic synthetic data for query plan checks and benchmarks.
+
+:func:`seed_dataset` fills a scratch database with clients, campaigns, lead
+types, leads and notification logs drawn from a seeded random generator, so
+two runs with the same arguments produce the same distribution. Leads and
+logs are written with bulk ``INSERT`` statements in batches and committed
+per batch, which keeps memory flat for datasets of millions of rows.
+
+:func:`justcall_campaigns` and :func:`justcall_webhook_payload` generate
+JustCall API and webhook bodies in the shape the integration receives.
+
+Never point this at a production database.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+try:
+    from ..models.campaign import Campaign
+    from ..models.client import Client
+    from ..models.lead import Lead
+    from ..models.lead_type import LeadType
+    from ..models.notification_log import NotificationLog
+except ImportError:  # pragma: no cover
+    from models.campaign import Campaign
+    from models.client import Client
+    from models.lead import Lead
+    from models.lead_type import LeadType
+    from models.notification_log import NotificationLog
+
+_CHANNELS = ("sms", "email")
+_STATUSES = ("sent", "sent", "sent", "failed", "skipped")
+
+
+def seed_dataset(
+    session,
+    clients: int = 5,
+    campaigns_per_client: int = 4,
+    lead_types: int = 10,
+    leads: int = 10_000,
+    notification_logs: int = 0,
+    days: int = 90,
+    seed: int = 0,
+    batch_size: int = 5000,
+) -> dict[str, int]:
+    """Insert a synthetic dataset and return the number of rows per table.
+
+    Leads are spread over campaigns with a skewed distribution (a few
+    campaigns receive most leads) and over the last *days* days.
+    *notification_logs* logs are attached to random leads of the dataset.
+    Object ids are prefixed with ``seed<seed>-`` so datasets with different
+    seeds can coexist.
+    """
+
+    rng = random.Random(seed)
+    prefix = f"seed{seed}-"
+    now = datetime.utcnow()
+
+    client_rows = [
+        Client(
+            company_name=f"{prefix}Client {i}",
+            contact_name=f"Contact {i}",
+            contact_email=f"client{i}@example.com",
+            phone=f"555{i:07d}",
+        )
+        for i in range(clients)
+    ]
+    session.add_all(client_rows)
+    session.flush()
+    type_names = [f"{prefix}Type {i}" for i in range(lead_types)]
+    session.add_all(
+        [
+            LeadType(id=f"{prefix}lt{i}", name=name)
+            for i, name in enumerate(type_names)
+        ]
+    )
+    campaigns = [
+        (f"{prefix}c{client.id}-{i}", client.id)
+        for client in client_rows
+        for i in range(campaigns_per_client)
+    ]
+    session.add_all(
+        [
+            Campaign(
+                id=campaign_id,
+                campaign_name=campaign_id,
+                status="active",
+                client_id=client_id,
+            )
+            for campaign_id, client_id in campaigns
+        ]
+    )
+    session.commit()
+
+    # Zipf-like weights: the first campaigns and lead types dominate
+    campaign_weights = [1 / (i + 1) for i in range(len(campaigns))]
+    type_weights = [1 / (i + 1) for i in range(len(type_names))]
+    logs_written = 0
+    for start in range(0, leads, batch_size):
+        count = min(batch_size, leads - start)
+        picked = (
+            rng.choices(campaigns, campaign_weights, k=count)
+            if campaigns
+            else []
+        )
+        types = (
+            rng.choices(type_names, type_weights, k=count)
+            if type_names
+            else []
+        )
+        rows = []
+        for n in range(count):
+            campaign_id, client_id = picked[n] if picked else (None, None)
+            rows.append(
+                {
+                    "name": f"Lead {start + n}",
+                    "phone": f"+1555{rng.randrange(10**7):07d}",
+                    "email": f"lead{start + n}@example.com",
+                    "lead_type": types[n] if types else None,
+                    "campaign_id": campaign_id,
+                    "client_id": client_id,
+                    "created_at": now
+                    - timedelta(seconds=rng.randrange(days * 86400)),
+                }
+            )
+        lead_ids = session.execute(
+            insert(Lead).returning(Lead.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        # Spread the logs evenly over the lead batches
+        log_count = notification_logs * (start + count) // leads - logs_written
+        log_rows = []
+        for _ in range(log_count):
+            n = rng.randrange(count)
+            log_rows.append(
+                {
+                    "client_id": rows[n]["client_id"],
+                    "lead_id": lead_ids[n],
+                    "channel": rng.choice(_CHANNELS),
+                    "status": rng.choice(_STATUSES),
+                    "message": "Synthetic notification",
+                    "created_at": rows[n]["created_at"],
+                }
+            )
+        if log_rows:
+            session.execute(insert(NotificationLog), log_rows)
+        logs_written += log_count
+        session.commit()
+
+    return {
+        "clients": clients,
+        "campaigns": len(campaigns),
+        "lead_types": lead_types,
+        "leads": leads,
+        "notification_logs": logs_written,
+    }
+
+
+def justcall_campaigns(count: int, groups: int = 50) -> list[dict]:
+    """Return *count* campaigns as returned by the JustCall campaigns API."""
+
+    return [
+        {
+            "id": f"c{i}",
+            "name": f"Campaign {i}",
+            "status": "active",
+            "disposition_groups": [
+                {
+                    "id": f"g{i % groups}",
+                    "name": f"Group {i % groups}",
+                    "dispositions": [
+                        {"id": f"d{i % groups}-1", "name": "Interested"},
+                        {"id": f"d{i % groups}-2", "name": "Call Back"},
+                    ],
+                }
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def justcall_webhook_payload(
+    index: int,
+    campaign_name: str | None = None,
+    disposition: str = "Interested",
+) -> list[dict]:
+    """Return a JustCall lead webhook body, unique for each *index*."""
+
+    data = {
+        "client_number": f"61400{index:06d}",
+        "client_name": f"Webhook Lead {index}",
+        "caller_name": "Load Agent",
+        "caller_number": "61482000000",
+        "disposition": disposition,
+        "email": f"webhook{index}@example.com",
+        "custom_fields": {
+            "Company": f"Company {index}",
+            "Notes": "Synthetic webhook lead",
+        },
+    }
+    if campaign_name:
+        data["campaign_name"] = campaign_name
+    return [{"data": data}]
+
+
+__all__ = ["justcall_campaigns", "justcall_webhook_payload", "seed_dataset"]
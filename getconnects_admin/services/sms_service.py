@@ -2,8 +2,10 @@ from __future__ import annotations
 
 """Helper for sending SMS messages via the JustCall API."""
 
+import hashlib
 import logging
 import os
+import time
 
 import requests
 from flask import current_app
@@ -14,9 +16,19 @@ except ImportError:  # pragma: no cover
     from models.justcall_credential import JustCallCredential
 
 from .helpers import get_session
+from .instrumentation_service import external_call
+from .job_service import run_detached
 
-JUSTCALL_SMS_URL = "https://api.justcall.io/v2.1/texts/new"
-JUSTCALL_NUMBERS_URL = "https://api.justcall.io/v2.1/phone-numbers"
+# Overridable so load tests can point the app at a local stub
+JUSTCALL_API_URL = os.getenv(
+    "JUSTCALL_API_URL", "https://api.justcall.io"
+).rstrip("/")
+JUSTCALL_SMS_URL = f"{JUSTCALL_API_URL}/v2.1/texts/new"
+JUSTCALL_NUMBERS_URL = f"{JUSTCALL_API_URL}/v2.1/phone-numbers"
+
+# Seconds a fetched number inventory is served without revalidation
+NUMBERS_TTL = 300
+_NUMBERS_CACHE_KEY = "justcall_numbers"
 
 
 def _logger():
@@ -58,88 +70,163 @@ def send_sms(to_number: str, message: str, from_number: str | None = None) -> bo
         payload["justcall_number"] = from_number
 
     try:  # pragma: no cover - network call
-        resp = requests.post(
-            JUSTCALL_SMS_URL,
-            json=payload,
-            auth=(api_key, api_secret),
-            timeout=10,
-        )
-        resp.raise_for_status()
+        with external_call("justcall"):
+            resp = requests.post(
+                JUSTCALL_SMS_URL,
+                json=payload,
+                auth=(api_key, api_secret),
+                timeout=10,
+            )
+            resp.raise_for_status()
         return True
     except Exception as exc:  # pragma: no cover - network errors
         _logger().error("Failed to send SMS: %s", exc)
         return False
 
 
-def fetch_sms_numbers() -> list[str]:
-    """Return all JustCall numbers available for sending SMS.
-
-    The function queries the JustCall API using stored credentials or
-    environment variables. It returns a simple list of phone numbers in
-    E.164 format. Any errors are logged and result in an empty list.
-    """
-
+def _credentials() -> tuple[str, str] | None:
     with get_session() as session:
         creds = session.query(JustCallCredential).first()
     if creds:
-        api_key, api_secret = creds.api_key, creds.api_secret
-    else:
-        api_key = os.getenv("JUSTCALL_API_KEY")
-        api_secret = os.getenv("JUSTCALL_API_SECRET")
-        if not api_key or not api_secret:
-            _logger().error("JustCall credentials not configured")
-            return []
+        return creds.api_key, creds.api_secret
+    api_key = os.getenv("JUSTCALL_API_KEY")
+    api_secret = os.getenv("JUSTCALL_API_SECRET")
+    if not api_key or not api_secret:
+        return None
+    return api_key, api_secret
 
-    try:  # pragma: no cover - network call
+
+def _to_e164(number: str) -> str:
+    """Return *number* normalised to E.164 format."""
+    digits = "".join(ch for ch in str(number) if ch.isdigit())
+    if not digits:
+        return ""
+    return "+" + digits
+
+
+def _request_numbers(api_key: str, api_secret: str) -> list[str]:
+    """Fetch and normalise the number inventory, raising on API errors."""
+
+    with external_call("justcall"):
         resp = requests.get(
             JUSTCALL_NUMBERS_URL, auth=(api_key, api_secret), timeout=10
         )
         resp.raise_for_status()
-        data = resp.json()
-        numbers: list[str] = []
+    data = resp.json()
+    numbers: list[str] = []
 
-        if isinstance(data, list):
-            raw_numbers = data
-        else:
-            raw_numbers = data.get("numbers")
-            if raw_numbers is None:
-                inner = data.get("data", {})
-                if isinstance(inner, dict):
-                    raw_numbers = inner.get("numbers") or inner.get("data", {}).get("numbers")
-                elif isinstance(inner, list):
-                    raw_numbers = inner
-                else:
-                    raw_numbers = []
-
-        def _to_e164(number: str) -> str:
-            """Return *number* normalised to E.164 format."""
-            digits = "".join(ch for ch in str(number) if ch.isdigit())
-            if not digits:
-                return ""
-            return "+" + digits
-
-        for item in raw_numbers:
-            num = None
-            if isinstance(item, dict):
-                friendly = item.get("friendly_number")
-                if friendly and "+" in friendly:
-                    num = _to_e164(friendly)
-                if not num:
-                    for key in (
-                        "justcall_number",
-                        "phone_number",
-                        "number",
-                        "friendly_number",
-                    ):
-                        val = item.get(key)
-                        if val:
-                            num = _to_e164(val)
-                            break
+    if isinstance(data, list):
+        raw_numbers = data
+    else:
+        raw_numbers = data.get("numbers")
+        if raw_numbers is None:
+            inner = data.get("data", {})
+            if isinstance(inner, dict):
+                raw_numbers = inner.get("numbers") or inner.get(
+                    "data", {}
+                ).get("numbers")
+            elif isinstance(inner, list):
+                raw_numbers = inner
             else:
-                num = _to_e164(item)
-            if num:
-                numbers.append(num)
-        return numbers
+                raw_numbers = []
+
+    for item in raw_numbers:
+        num = None
+        if isinstance(item, dict):
+            friendly = item.get("friendly_number")
+            if friendly and "+" in friendly:
+                num = _to_e164(friendly)
+            if not num:
+                for key in (
+                    "justcall_number",
+                    "phone_number",
+                    "number",
+                    "friendly_number",
+                ):
+                    val = item.get(key)
+                    if val:
+                        num = _to_e164(val)
+                        break
+        else:
+            num = _to_e164(item)
+        if num:
+            numbers.append(num)
+    return numbers
+
+
+def fetch_sms_numbers() -> list[str]:
+    """Return all JustCall numbers available for sending SMS.
+
+    The function queries the JustCall API using stored credentials or
+    environment variables. It returns a simple list of phone numbers in
+    E.164 format. Any errors are logged and result in an empty list.
+
+    This always calls JustCall; pages should use :func:`get_sms_numbers`.
+    """
+
+    creds = _credentials()
+    if creds is None:
+        _logger().error("JustCall credentials not configured")
+        return []
+    try:  # pragma: no cover - network call
+        return _request_numbers(*creds)
     except Exception as exc:  # pragma: no cover - network errors
         _logger().error("Failed to fetch JustCall numbers: %s", exc)
         return []
+
+
+def _fingerprint(creds: tuple[str, str]) -> str:
+    return hashlib.sha256(":".join(creds).encode()).hexdigest()[:16]
+
+
+def _refresh_numbers(creds: tuple[str, str]) -> list[str] | None:
+    """Cache the numbers for *creds*; ``None`` if JustCall failed."""
+
+    from .. import cache
+
+    try:
+        numbers = _request_numbers(*creds)
+    except Exception as exc:  # pragma: no cover - network errors
+        _logger().error("Failed to fetch JustCall numbers: %s", exc)
+        return None
+    cache.set(
+        _NUMBERS_CACHE_KEY,
+        {
+            "fingerprint": _fingerprint(creds),
+            "numbers": numbers,
+            "fetched_at": time.time(),
+        },
+        timeout=0,
+    )
+    return numbers
+
+
+def get_sms_numbers() -> list[str]:
+    """Return the JustCall sending numbers, served from a TTL cache.
+
+    Fresh entries are returned directly. Entries older than ``NUMBERS_TTL``
+    are still returned but trigger a background refresh
+    (stale-while-revalidate). Only a cold cache, or one filled with other
+    credentials, waits for JustCall.
+    """
+
+    from .. import cache
+
+    creds = _credentials()
+    if creds is None:
+        return []
+    entry = cache.get(_NUMBERS_CACHE_KEY)
+    if not entry or entry.get("fingerprint") != _fingerprint(creds):
+        return _refresh_numbers(creds) or []
+    ttl = current_app.config.get("JUSTCALL_NUMBERS_TTL", NUMBERS_TTL)
+    if time.time() - entry["fetched_at"] > ttl:
+        run_detached("justcall_numbers", _refresh_numbers, creds)
+    return entry["numbers"]
+
+
+def invalidate_sms_numbers() -> None:
+    """Drop the cached inventory, e.g. after JustCall credentials change."""
+
+    from .. import cache
+
+    cache.delete(_NUMBERS_CACHE_KEY)
@@ -14,6 +14,18 @@ except ImportError:  # pragma: no cover
 from .helpers import get_session
 
 
+def _leads_since(session, since: datetime.datetime):
+    return session.query(func.count(Lead.id)).filter(Lead.created_at >= since)
+
+
+def _leads_by_campaign(session):
+    return (
+        session.query(Campaign.campaign_name, func.count(Lead.id))
+        .outerjoin(Lead, Lead.campaign_id == Campaign.id)
+        .group_by(Campaign.id)
+    )
+
+
 def get_stats() -> dict:
     """Aggregate basic counts used on the dashboard."""
 
@@ -25,12 +37,7 @@ def get_stats() -> dict:
 
         # Calculate leads created within the last week
         week_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
-        leads_week = (
-            session.query(func.count(Lead.id))
-            .filter(Lead.created_at >= week_ago)
-            .scalar()
-            or 0
-        )
+        leads_week = _leads_since(session, week_ago).scalar() or 0
 
         return {
             "clients": total_clients,
@@ -48,12 +55,7 @@ def get_leads_by_campaign() -> list[dict]:
     """
 
     with get_session() as session:
-        results = (
-            session.query(Campaign.campaign_name, func.count(Lead.id))
-            .outerjoin(Lead, Lead.campaign_id == Campaign.id)
-            .group_by(Campaign.id)
-            .all()
-        )
+        results = _leads_by_campaign(session).all()
         return [
             {"campaign": name, "leads": count} for name, count in results
         ]
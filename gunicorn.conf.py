@@ -0,0 +1,28 @@
+"""Gunicorn settings, loaded automatically from the working directory.
+
+Workers share Prometheus metrics through memory-mapped files in
+``PROMETHEUS_MULTIPROC_DIR`` so ``/metrics`` reports totals for the whole
+server whichever worker answers the scrape.
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "getconnects-metrics"),
+)
+
+
+def on_starting(server):
+    # Values left by a previous server would be added to the new totals
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
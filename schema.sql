@@ -9,7 +9,8 @@ CREATE TABLE IF NOT EXISTS users (
     first_name VARCHAR,
     last_name VARCHAR,
     is_superuser BOOLEAN NOT NULL DEFAULT FALSE,
-    is_staff BOOLEAN NOT NULL DEFAULT FALSE
+    is_staff BOOLEAN NOT NULL DEFAULT FALSE,
+    auth_version BIGINT NOT NULL DEFAULT 0
 );
 
 CREATE INDEX IF NOT EXISTS ix_users_id ON users(id);
@@ -30,7 +31,8 @@ CREATE TABLE IF NOT EXISTS campaigns (
     id VARCHAR PRIMARY KEY,
     campaign_name VARCHAR NOT NULL,
     status VARCHAR,
-    client_id INTEGER REFERENCES clients(id)
+    client_id INTEGER REFERENCES clients(id),
+    sync_hash VARCHAR(64)
 );
 
 CREATE INDEX IF NOT EXISTS ix_campaigns_id ON campaigns(id);
@@ -85,6 +87,20 @@ CREATE TABLE IF NOT EXISTS campaign_lead_types (
     PRIMARY KEY (campaign_id, lead_type_id)
 );
 
+-- Materialised union of campaign_lead_types and group lead types, kept up to
+-- date by the application (services/lead_type_service.py)
+CREATE TABLE IF NOT EXISTS campaign_effective_lead_types (
+    campaign_id VARCHAR REFERENCES campaigns(id),
+    lead_type_id VARCHAR,
+    lead_type_name VARCHAR NOT NULL,
+    group_id VARCHAR,
+    source VARCHAR NOT NULL,
+    PRIMARY KEY (campaign_id, lead_type_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_campaign_effective_lead_types_name
+    ON campaign_effective_lead_types(campaign_id, lead_type_name);
+
 -- Lead and Notification Tables
 CREATE TABLE IF NOT EXISTS leads (
     id SERIAL PRIMARY KEY,
@@ -105,8 +121,20 @@ CREATE TABLE IF NOT EXISTS leads (
 );
 
 CREATE INDEX IF NOT EXISTS ix_leads_id ON leads(id);
-CREATE INDEX IF NOT EXISTS ix_leads_client_id ON leads(client_id);
-CREATE INDEX IF NOT EXISTS ix_leads_campaign_id ON leads(campaign_id);
+CREATE INDEX IF NOT EXISTS ix_leads_client_id_created_at ON leads(client_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_leads_campaign_id_created_at ON leads(campaign_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_leads_lead_type ON leads(lead_type);
+CREATE INDEX IF NOT EXISTS ix_leads_created_at ON leads(created_at);
+DROP INDEX IF EXISTS ix_leads_client_id;
+DROP INDEX IF EXISTS ix_leads_campaign_id;
+
+-- Delivered message bodies, zlib-compressed and shared by content hash
+CREATE TABLE IF NOT EXISTS notification_bodies (
+    hash VARCHAR(64) PRIMARY KEY,
+    content BYTEA NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 
 CREATE TABLE IF NOT EXISTS notification_logs (
     id SERIAL PRIMARY KEY,
@@ -114,12 +142,17 @@ CREATE TABLE IF NOT EXISTS notification_logs (
     lead_id INTEGER REFERENCES leads(id),
     channel VARCHAR,
     status VARCHAR,
-    message VARCHAR
+    message VARCHAR,
+    body_hash VARCHAR(64) REFERENCES notification_bodies(hash),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX IF NOT EXISTS ix_notification_logs_id ON notification_logs(id);
 CREATE INDEX IF NOT EXISTS ix_notification_logs_client_id ON notification_logs(client_id);
 CREATE INDEX IF NOT EXISTS ix_notification_logs_lead_id ON notification_logs(lead_id);
+CREATE INDEX IF NOT EXISTS ix_notification_logs_client_id_created_at ON notification_logs(client_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_notification_logs_status_channel ON notification_logs(status, channel);
+CREATE INDEX IF NOT EXISTS ix_notification_logs_body_hash ON notification_logs(body_hash);
 
 -- Integration Tables
 CREATE TABLE IF NOT EXISTS justcall_credentials (
@@ -167,6 +200,45 @@ CREATE TABLE IF NOT EXISTS page_permissions (
 
 CREATE INDEX IF NOT EXISTS ix_page_permissions_user_id ON page_permissions(user_id);
 
+-- Background Job Tables
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    status VARCHAR NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_background_jobs_name ON background_jobs(name);
+
+CREATE TABLE IF NOT EXISTS job_locks (
+    name VARCHAR PRIMARY KEY,
+    owner VARCHAR NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Versions applied by ``flask migrate``; this file already includes them
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR PRIMARY KEY,
+    description VARCHAR,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version, description)
+VALUES
+    ('0001', 'Composite indexes for lead filters and stats'),
+    ('0002', 'Authorisation stamp on users'),
+    ('0003', 'Timestamps and indexes on notification logs'),
+    ('0004', 'Shared notification bodies'),
+    ('0005', 'Background jobs and campaign sync hashes'),
+    ('0006', 'Materialised campaign lead types')
+ON CONFLICT DO NOTHING;
+
 -- Enable Row Level Security (RLS) for Supabase
 -- Note: This is optional and can be configured separately in Supabase dashboard
 -- Uncomment if you want to enable RLS for all tables
@@ -1,31 +1,32 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Use a temporary SQLite database to compare models with migrations
+# Apply every migration to a temporary SQLite database built from the models,
+# run them all again as an interrupted deploy would, and check that nothing
+# is left pending
 TMP_DB=$(mktemp)
+trap 'rm -f "$TMP_DB"' EXIT
 export DATABASE_URL="sqlite:///$TMP_DB"
+export FLASK_APP=wsgi.py FLASK_CONFIG=testing
+export FLASK_SECRET_KEY="${FLASK_SECRET_KEY:-migration-check}"
 
-# Apply existing migrations
-alembic upgrade head >/dev/null
+python -c "
+from getconnects_admin.models import Base, engine
+Base.metadata.create_all(bind=engine)
+"
+flask migrate
+python -c "
+from sqlalchemy import text
+from getconnects_admin.models import engine
+with engine.begin() as conn:
+    conn.execute(text('DELETE FROM schema_migrations'))
+"
+flask migrate
 
-# Capture output from an autogeneration run
-output=$(alembic revision --autogenerate -m "_migration_check" 2>&1 || true)
-
-# Check generated revision for real changes
-new_file=$(git status --porcelain migrations/versions/*.py 2>/dev/null | awk '/^\?\?/ {print $2}')
-if [ -n "$new_file" ]; then
-  if grep -q "pass" "$new_file"; then
-    rm -f "$new_file"
-  else
-    cat "$new_file"
-    rm -f "$new_file"
-    echo "$output"
-    echo "\nERROR: Pending migrations detected. Run 'alembic revision --autogenerate' and commit the result." >&2
-    exit 1
-  fi
+output=$(flask migrate --dry-run)
+if [ "$output" != "Schema is up to date" ]; then
+  echo "$output"
+  echo "ERROR: migrations were recorded but are still pending." >&2
+  exit 1
 fi
-
-# Remove temporary database
-rm -f "$TMP_DB"
-
 echo "$output"
@@ -26,13 +26,18 @@ for mod in [
     "lead_type",
     "campaign_lead_type",
     "campaign_lead_type_group",
+    "campaign_effective_lead_type",
     "client_lead_type_setting",
     "notification_template",
     "notification_log",
+    "notification_body",
+    "background_job",
+    "job_lock",
     "justcall_credential",
     "justcall_webhook",
     "justcall_webhook_payload",
     "gmail_credential",
+    "schema_migration",
 ]:
     sys.modules.setdefault(f"models.{mod}", getattr(getconnects_admin.models, mod))
 sys.modules.setdefault("services", getconnects_admin.services)
@@ -47,6 +52,18 @@ for mod in [
     "auth_decorators",
     "email_service",
     "sms_service",
+    "notification_service",
+    "retention_service",
+    "job_service",
+    "schema_service",
+    "reference_service",
+    "lead_type_service",
+    "migration_service",
+    "seed_service",
+    "query_plan_service",
+    "instrumentation_service",
+    "metrics_service",
+    "profiling_service",
 ]:
     sys.modules.setdefault(f"services.{mod}", getattr(getconnects_admin.services, mod))
 
@@ -54,6 +71,8 @@ for mod in [
 @pytest.fixture(scope="session")
 def app_module():
     import getconnects_admin
+    from services.auth_decorators import remember_permissions_version
+
     app = getconnects_admin.create_app("testing")
     app.config["TESTING"] = True
 
@@ -65,6 +84,10 @@ def app_module():
             sess.setdefault("uid", "test")
             sess.setdefault("permissions", ["/"])
             sess.setdefault("is_staff", True)
+        # As a login would, remember the stamp the default session was
+        # built with
+        with app.app_context():
+            remember_permissions_version("test", 0)
         return client
 
     app.test_client = _client
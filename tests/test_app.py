@@ -121,8 +121,15 @@ def test_get_stats(app_module, session):
 
 
 def test_verify_supabase_token(app_module, monkeypatch):
+    import jwt
+
+    # Without a JWT secret the token is checked remotely via get_user
+    monkeypatch.delenv("SUPABASE_JWT_SECRET", raising=False)
+    good = jwt.encode({"sub": "123"}, "k" * 32, algorithm="HS256")
+    bad = jwt.encode({"sub": "456"}, "k" * 32, algorithm="HS256")
+
     def fake_get_user(token):
-        if token == "good":
+        if token == good:
             user = SimpleNamespace(id="123", email="a@example.com")
             return SimpleNamespace(user=user)
         raise Exception("bad token")
@@ -130,8 +137,12 @@ def test_verify_supabase_token(app_module, monkeypatch):
     fake_client = SimpleNamespace(auth=SimpleNamespace(get_user=fake_get_user))
     import services.auth_service as auth_service
     monkeypatch.setattr(auth_service, "_get_supabase_client", lambda: fake_client)
-    assert app_module.verify_supabase_token("good") == {"sub": "123", "email": "a@example.com"}
-    assert app_module.verify_supabase_token("bad") is None
+    assert app_module.verify_supabase_token(good) == {
+        "sub": "123",
+        "email": "a@example.com",
+    }
+    assert app_module.verify_supabase_token(bad) is None
+    assert app_module.verify_supabase_token("not-a-jwt") is None
 
 
 def test_dashboard_route(app_module, session):
@@ -0,0 +1,148 @@
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from services import auth_service
+
+SECRET = "super-secret-jwt-token-with-32-chars"
+
+# Kept before the autouse fixture replaces it, for tests of the client itself
+_real_get_supabase_client = auth_service._get_supabase_client
+
+
+@pytest.fixture(autouse=True)
+def _no_remote(monkeypatch):
+    def _fail():
+        raise AssertionError("remote verification should not be used")
+
+    monkeypatch.setattr(auth_service, "_get_supabase_client", _fail)
+    monkeypatch.setattr(auth_service, "_jwks_clients", {})
+    monkeypatch.delenv("SUPABASE_JWKS_URL", raising=False)
+    monkeypatch.setenv("SUPABASE_URL", "https://project.supabase.co")
+
+
+def _claims(**overrides):
+    claims = {
+        "sub": "user-1",
+        "email": "user@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+    }
+    claims.update(overrides)
+    return claims
+
+
+def test_verify_hs256_token_locally(monkeypatch):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    assert auth_service.verify_supabase_token(token) == {
+        "sub": "user-1",
+        "email": "user@example.com",
+    }
+
+    expired = jwt.encode(
+        _claims(exp=int(time.time()) - 3600), SECRET, algorithm="HS256"
+    )
+    assert auth_service.verify_supabase_token(expired) is None
+
+    wrong_aud = jwt.encode(_claims(aud="anon"), SECRET, algorithm="HS256")
+    assert auth_service.verify_supabase_token(wrong_aud) is None
+
+    forged = jwt.encode(_claims(), "x" * 32, algorithm="HS256")
+    assert auth_service.verify_supabase_token(forged) is None
+
+
+def test_verify_jwks_refreshes_on_unknown_kid(monkeypatch):
+    old_key = ec.generate_private_key(ec.SECP256R1())
+    new_key = ec.generate_private_key(ec.SECP256R1())
+
+    def _jwk(key, kid):
+        data = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(key.public_key()))
+        data.update(kid=kid, alg="ES256", use="sig")
+        return data
+
+    published = [[_jwk(old_key, "old")]]
+    fetches = []
+
+    def _fetch(self):
+        fetches.append(self.uri)
+        return {"keys": published[-1]}
+
+    monkeypatch.setattr(jwt.PyJWKClient, "fetch_data", _fetch)
+
+    token = jwt.encode(
+        _claims(), old_key, algorithm="ES256", headers={"kid": "old"}
+    )
+    assert auth_service.verify_supabase_token(token)["sub"] == "user-1"
+    assert auth_service.verify_supabase_token(token)["sub"] == "user-1"
+    assert fetches == [
+        "https://project.supabase.co/auth/v1/.well-known/jwks.json"
+    ]
+
+    # Key rotation: a token with a new kid triggers one refetch of the JWKS
+    published.append([_jwk(old_key, "old"), _jwk(new_key, "new")])
+    rotated = jwt.encode(
+        _claims(), new_key, algorithm="ES256", headers={"kid": "new"}
+    )
+    assert auth_service.verify_supabase_token(rotated)["sub"] == "user-1"
+    assert len(fetches) == 2
+
+    unknown = jwt.encode(
+        _claims(), new_key, algorithm="ES256", headers={"kid": "nope"}
+    )
+    assert auth_service.verify_supabase_token(unknown) is None
+
+
+def test_remote_fallback_only_without_key_material(monkeypatch):
+    monkeypatch.delenv("SUPABASE_JWT_SECRET", raising=False)
+    calls = []
+
+    class _Auth:
+        def get_user(self, token):
+            calls.append(token)
+            user = type(
+                "User", (), {"id": "remote-user", "email": "r@example.com"}
+            )
+            return type("Resp", (), {"user": user})
+
+    monkeypatch.setattr(
+        auth_service,
+        "_get_supabase_client",
+        lambda: type("C", (), {"auth": _Auth()}),
+    )
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+
+    assert auth_service.verify_supabase_token(token)["sub"] == "remote-user"
+    assert calls == [token]
+
+    monkeypatch.setenv("SUPABASE_REMOTE_VERIFY", "false")
+    assert auth_service.verify_supabase_token(token) is None
+    assert len(calls) == 1
+
+
+def test_supabase_client_memoised_until_config_changes(monkeypatch):
+    monkeypatch.setattr(
+        auth_service, "_get_supabase_client", _real_get_supabase_client
+    )
+    created = []
+    monkeypatch.setattr(
+        auth_service,
+        "create_client",
+        lambda url, key: created.append((url, key)) or object(),
+    )
+    monkeypatch.setattr(auth_service, "_client", None)
+    monkeypatch.setattr(auth_service, "_client_config", None)
+    monkeypatch.setenv("SUPABASE_URL", "https://one.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "key-1")
+
+    first = auth_service._get_supabase_client()
+    assert auth_service._get_supabase_client() is first
+    assert created == [("https://one.supabase.co", "key-1")]
+
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "key-2")
+    assert auth_service._get_supabase_client() is not first
+    assert created[-1] == ("https://one.supabase.co", "key-2")
@@ -0,0 +1,37 @@
+import json
+
+from benchmarks.suite import SCENARIOS, percentile, run_benchmarks
+from services.seed_service import seed_dataset
+
+
+def test_benchmark_suite_reports_every_scenario(app_module, session):
+    dataset = seed_dataset(
+        session,
+        clients=2,
+        campaigns_per_client=2,
+        lead_types=2,
+        leads=50,
+        notification_logs=80,
+    )
+    assert dataset["notification_logs"] == 80
+
+    result = run_benchmarks(
+        app_module.app, iterations=2, dataset=dataset, sync_campaign_count=5
+    )
+
+    assert result["database"] == "sqlite"
+    assert set(result["results"]) == set(SCENARIOS)
+    for name, stats in result["results"].items():
+        assert stats["iterations"] == 2, name
+        assert stats["p50_ms"] <= stats["p99_ms"]
+        assert stats["queries_per_op"] > 0, name
+    # Notifications for the created leads went to the stubs, not the providers
+    assert result["stubs"]["sms"]["requests"] > 0
+    json.dumps(result)
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
@@ -0,0 +1,154 @@
+from models.campaign import Campaign
+from models.client import Client
+from models.lead import Lead
+from models.notification_log import NotificationLog
+from services.job_service import latest_job
+from services.lead_service import (
+    BULK_DELETE_JOB,
+    BULK_UPDATE_JOB,
+    delete_leads_matching,
+    update_leads_matching,
+)
+
+
+def _seed(session, leads):
+    acme = Client(
+        company_name="Acme",
+        contact_name="A",
+        contact_email="a@x.com",
+        phone="1",
+    )
+    beta = Client(
+        company_name="Beta",
+        contact_name="B",
+        contact_email="b@x.com",
+        phone="2",
+    )
+    session.add_all([acme, beta])
+    session.flush()
+    session.add_all(
+        [
+            Campaign(id="c1", campaign_name="One", client_id=acme.id),
+            Campaign(id="c2", campaign_name="Two", client_id=beta.id),
+        ]
+    )
+    session.flush()
+    for i in range(leads):
+        # Interleave leads outside the filter to make the id ranges sparse
+        hot = Lead(
+            name=f"H{i}", campaign_id="c1", client_id=acme.id, lead_type="Hot"
+        )
+        cold = Lead(
+            name=f"C{i}", campaign_id="c1", client_id=acme.id, lead_type="Cold"
+        )
+        session.add_all([hot, cold])
+        session.flush()
+        session.add_all(
+            [
+                NotificationLog(
+                    client_id=acme.id, lead_id=hot.id, channel="email"
+                ),
+                NotificationLog(
+                    client_id=acme.id, lead_id=cold.id, channel="email"
+                ),
+            ]
+        )
+    session.commit()
+    return acme.id, beta.id
+
+
+def test_delete_matching_removes_leads_and_logs_in_batches(
+    app_module, session
+):
+    _seed(session, 5)
+    with app_module.app.app_context():
+        counts = delete_leads_matching({"lead_type": "Hot"}, batch_size=2)
+
+    assert counts == {"leads": 5, "notification_logs": 5}
+    assert {lead.lead_type for lead in session.query(Lead)} == {"Cold"}
+    assert session.query(NotificationLog).count() == 5
+
+
+def test_update_matching_moves_leads_to_campaign_client(app_module, session):
+    acme_id, beta_id = _seed(session, 3)
+    with app_module.app.app_context():
+        counts = update_leads_matching(
+            {"campaign_id": "c1", "lead_type": "Cold"},
+            campaign_id="c2",
+            lead_type="Warm",
+            batch_size=2,
+        )
+
+    assert counts == {"leads": 3}
+    moved = session.query(Lead).filter_by(campaign_id="c2").all()
+    assert {(lead.client_id, lead.lead_type) for lead in moved} == {
+        (beta_id, "Warm")
+    }
+    assert (
+        session.query(Lead)
+        .filter_by(client_id=acme_id, lead_type="Hot")
+        .count()
+        == 3
+    )
+
+
+def test_filter_scope_routes_run_as_jobs(app_module, session, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "LEAD_BULK_BATCH_SIZE", 2)
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    _seed(session, 3)
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    resp = test_client.post(
+        "/leads/bulk-update",
+        data={"scope": "filter", "lead_type": "Cold", "new_campaign_id": "c2"},
+    )
+    assert resp.status_code == 302
+    job = latest_job(BULK_UPDATE_JOB)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"leads": 3}
+
+    resp = test_client.post(
+        "/leads/bulk-delete", data={"scope": "filter", "campaign_id": "c2"}
+    )
+    assert resp.status_code == 302
+    job = latest_job(BULK_DELETE_JOB)
+    assert (job["progress"], job["total"]) == (3, 3)
+    assert job["result"] == {"leads": 3, "notification_logs": 3}
+    assert session.query(Lead).filter_by(lead_type="Cold").count() == 0
+    assert session.query(Lead).count() == 3
+
+
+def test_bulk_update_rejects_unknown_campaign(app_module, session):
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    _seed(session, 1)
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    resp = test_client.post(
+        "/leads/bulk-update",
+        data={"scope": "filter", "new_campaign_id": "missing"},
+    )
+    assert resp.status_code == 400
+
+
+def test_filter_scope_requires_a_filter(app_module, session):
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    _seed(session, 2)
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    resp = test_client.post(
+        "/leads/bulk-delete", data={"scope": "filter", "campaign_id": ""}
+    )
+    assert resp.status_code == 302
+    resp = test_client.post(
+        "/leads/bulk-update", data={"scope": "filter", "new_campaign_id": "c2"}
+    )
+    assert resp.status_code == 302
+    assert latest_job(BULK_DELETE_JOB) is None
+    assert latest_job(BULK_UPDATE_JOB) is None
+    assert session.query(Lead).count() == 4
@@ -22,3 +22,161 @@ def test_delete_client_removes_campaign_groups(session):
     assert session.query(Client).count() == 0
     assert session.query(Campaign).count() == 0
     assert session.query(CampaignLeadTypeGroup).count() == 0
+
+
+def _seed_large_client(session):
+    from models.campaign_lead_type import CampaignLeadType
+    from models.client_lead_type_setting import ClientLeadTypeSetting
+    from models.lead import Lead
+    from models.lead_type import LeadType
+    from models.notification_log import NotificationLog
+
+    client = Client(
+        company_name='Acme',
+        contact_name='John',
+        contact_email='john@example.com',
+        phone='123',
+    )
+    other = Client(
+        company_name='Other',
+        contact_name='Jane',
+        contact_email='jane@example.com',
+        phone='456',
+    )
+    lead_type = LeadType(id='lt1', name='Lead1')
+    session.add_all([client, other, lead_type])
+    session.flush()
+    session.add_all([
+        Campaign(id='c1', campaign_name='Camp', client_id=client.id),
+        CampaignLeadType(campaign_id='c1', lead_type_id='lt1'),
+        ClientLeadTypeSetting(client_id=client.id, lead_type_id='lt1'),
+    ])
+    session.flush()
+    for i in range(5):
+        lead = Lead(name=f'L{i}', campaign_id='c1', client_id=client.id)
+        kept = Lead(name=f'K{i}', client_id=other.id)
+        session.add_all([lead, kept])
+        session.flush()
+        session.add(NotificationLog(client_id=client.id, lead_id=lead.id))
+        session.add(NotificationLog(client_id=client.id))
+    session.commit()
+    return client.id, other.id
+
+
+def test_delete_client_uses_bulk_statements(session):
+    from models.lead import Lead
+    from models.notification_log import NotificationLog
+    from sqlalchemy import event
+
+    client_id, other_id = _seed_large_client(session)
+    selects = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        if (
+            statement.lstrip().upper().startswith('SELECT')
+            and 'FROM leads' in statement
+        ):
+            selects.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, 'before_cursor_execute', _track)
+    try:
+        assert delete_client(client_id)
+    finally:
+        event.remove(engine, 'before_cursor_execute', _track)
+
+    # Lead rows are never loaded into the ORM
+    assert not any('leads.name' in statement for statement in selects)
+    session.expire_all()
+    assert session.query(Client).filter_by(id=client_id).count() == 0
+    assert session.query(Campaign).count() == 0
+    assert session.query(NotificationLog).count() == 0
+    assert {lead.client_id for lead in session.query(Lead)} == {other_id}
+
+
+def test_large_client_is_deleted_by_background_job(
+    app_module, session, monkeypatch
+):
+    from services.client_service import CLIENT_DELETE_JOB
+    from services.job_service import latest_job
+
+    monkeypatch.setitem(app_module.app.config, 'CLIENT_DELETE_INLINE_LEADS', 2)
+    monkeypatch.setitem(app_module.app.config, 'CLIENT_DELETE_BATCH_SIZE', 2)
+    app_module.app.config['WTF_CSRF_ENABLED'] = False
+    client_id, _ = _seed_large_client(session)
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess['uid'] = 'test'
+
+    resp = test_client.post(f'/clients/{client_id}/delete')
+    assert resp.status_code == 302
+
+    job = latest_job(CLIENT_DELETE_JOB)
+    assert job['status'] == 'succeeded'
+    assert (job['progress'], job['total']) == (5, 5)
+    assert job['result'] == {
+        'client_id': client_id,
+        'leads': 5,
+        'notification_logs': 10,
+    }
+    session.expire_all()
+    assert session.get(Client, client_id) is None
+
+
+def test_delete_client_keeps_leads_of_reassigned_campaigns(session):
+    from models.lead import Lead
+    from services.client_service import count_client_leads
+
+    client_id, other_id = _seed_large_client(session)
+    # c2 moved to the other client; its leads' client_id is not updated yet
+    session.add(Campaign(id='c2', campaign_name='Moved', client_id=other_id))
+    session.flush()
+    session.add(Lead(name='Stale', campaign_id='c2', client_id=client_id))
+    session.add(Lead(name='Loose', client_id=client_id))
+    session.commit()
+
+    assert count_client_leads(client_id) == 6
+    assert count_client_leads(other_id) == 6
+    assert delete_client(client_id)
+
+    session.expire_all()
+    stale = session.query(Lead).filter_by(name='Stale').one()
+    assert (stale.campaign_id, stale.client_id) == ('c2', other_id)
+    assert session.query(Lead).filter_by(name='Loose').count() == 0
+    assert count_client_leads(other_id) == 6
+
+
+def test_second_deletion_is_refused_while_one_runs(
+    app_module, session, monkeypatch
+):
+    from services.client_service import (
+        CLIENT_DELETE_JOB,
+        client_deletion_running,
+        start_client_deletion,
+    )
+    from services.job_service import acquire_lock, latest_job, release_lock
+
+    monkeypatch.setitem(app_module.app.config, 'CLIENT_DELETE_INLINE_LEADS', 2)
+    app_module.app.config['WTF_CSRF_ENABLED'] = False
+    client_id, _ = _seed_large_client(session)
+    lock = f'{CLIENT_DELETE_JOB}:{client_id}'
+    # Another worker is part-way through deleting the client
+    assert acquire_lock(lock, 60)
+    try:
+        with app_module.app.app_context():
+            assert client_deletion_running(client_id)
+            assert start_client_deletion(client_id) is None
+        test_client = app_module.app.test_client()
+        resp = test_client.post(f'/clients/{client_id}/delete')
+        assert resp.status_code == 302
+        assert latest_job(CLIENT_DELETE_JOB) is None
+        session.expire_all()
+        assert session.get(Client, client_id) is not None
+    finally:
+        release_lock(lock)
+
+    with app_module.app.app_context():
+        assert start_client_deletion(client_id) is not None
+        assert not client_deletion_running(client_id)
+    session.expire_all()
+    assert session.get(Client, client_id) is None
@@ -0,0 +1,127 @@
+from sqlalchemy import literal, select
+
+from models.campaign import Campaign
+from models.campaign_effective_lead_type import CampaignEffectiveLeadType
+from models.campaign_lead_type import CampaignLeadType
+from models.lead_type import LeadType
+from models.lead_type_group import LeadTypeGroup
+from services.justcall_service import sync_campaigns
+
+
+def _effective(session, campaign_id):
+    session.expire_all()
+    return sorted(
+        (row.lead_type_name, row.source)
+        for row in session.query(CampaignEffectiveLeadType).filter_by(
+            campaign_id=campaign_id
+        )
+    )
+
+
+def test_sync_campaigns_materialises_effective_lead_types(app_module, session):
+    sync_campaigns(
+        [
+            {
+                "id": "c1",
+                "name": "One",
+                "disposition_groups": [
+                    {
+                        "id": "g1",
+                        "name": "G",
+                        "dispositions": [{"id": "d1", "name": "Sale"}],
+                    }
+                ],
+            }
+        ]
+    )
+    assert _effective(session, "c1") == [("Sale", "campaign")]
+
+
+def test_mapping_and_group_changes_refresh_effective_lead_types(
+    app_module, session
+):
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    group = LeadTypeGroup(id="g1", name="Group1")
+    session.add_all(
+        [
+            group,
+            Campaign(id="c1", campaign_name="One"),
+            LeadType(id="t1", name="Sale"),
+            LeadType(id="t2", name="Callback", group_id="g1"),
+        ]
+    )
+    session.flush()
+    session.add(CampaignLeadType(campaign_id="c1", lead_type_id="t1"))
+    session.commit()
+    assert _effective(session, "c1") == [("Sale", "campaign")]
+
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+    test_client.post("/campaigns/c1", data={"group_ids": ["g1"]})
+    assert _effective(session, "c1") == [
+        ("Callback", "group"),
+        ("Sale", "campaign"),
+    ]
+
+    # New dispositions in a linked group reach the campaign
+    test_client.post(
+        "/lead-types/g1/manage", data={"dispositions": "Voicemail"}
+    )
+    assert ("Voicemail", "group") in _effective(session, "c1")
+
+    test_client.post("/campaigns/c1", data={"group_ids": []})
+    assert _effective(session, "c1") == [("Sale", "campaign")]
+
+
+def test_bulk_statements_refresh_effective_lead_types(app_module, session):
+    from sqlalchemy import delete, insert, update
+
+    from models.campaign_lead_type_group import CampaignLeadTypeGroup
+
+    session.add_all(
+        [
+            LeadTypeGroup(id="g1", name="Group1"),
+            LeadTypeGroup(id="g2", name="Group2"),
+            Campaign(id="c1", campaign_name="One"),
+            Campaign(id="c2", campaign_name="Two"),
+            LeadType(id="t1", name="Sale"),
+        ]
+    )
+    session.flush()
+    session.add(CampaignLeadType(campaign_id="c2", lead_type_id="t1"))
+    session.commit()
+
+    session.execute(
+        insert(CampaignLeadTypeGroup),
+        [{"campaign_id": "c1", "lead_type_group_id": "g1"}],
+    )
+    session.execute(
+        insert(LeadType).values(id="t2", name="Callback", group_id="g1")
+    )
+    session.commit()
+    assert _effective(session, "c1") == [("Callback", "group")]
+
+    # Moving a lead type out of a group refreshes campaigns of the old group
+    session.execute(
+        update(LeadType).where(LeadType.id == "t2").values(group_id="g2")
+    )
+    session.commit()
+    assert _effective(session, "c1") == []
+
+    session.execute(
+        update(LeadType).where(LeadType.id == "t1").values(name="Won")
+    )
+    session.execute(delete(CampaignLeadTypeGroup))
+    session.commit()
+    assert _effective(session, "c2") == [("Won", "campaign")]
+
+    # Rows an INSERT ... SELECT writes are unknown, so everything is rebuilt
+    session.execute(
+        insert(CampaignLeadTypeGroup).from_select(
+            ["campaign_id", "lead_type_group_id"],
+            select(Campaign.id, literal("g2")).where(Campaign.id == "c1"),
+        )
+    )
+    session.commit()
+    assert _effective(session, "c1") == [("Callback", "group")]
@@ -153,3 +153,48 @@ def test_get_gmail_api_status_error(app_module, session, monkeypatch):
     status = email_service.get_gmail_api_status(creds)
     assert status["connected"] is False
     assert "Unable to refresh" in status["message"] or "Failed to reach Gmail" in status["message"]
+
+
+def test_cached_gmail_api_status_avoids_outbound_calls(
+    app_module, session, monkeypatch
+):
+    creds = GmailCredential(
+        username="sender@example.com",
+        password="",
+        api_client_id="cid",
+        api_client_secret="secret",
+        api_refresh_token="refresh",
+        api_from_email="sender@example.com",
+    )
+    session.add(creds)
+    session.commit()
+    calls = []
+
+    def counting_refresh(credentials):
+        calls.append(credentials["client_id"])
+        return "token123"
+
+    monkeypatch.setattr(
+        email_service, "_refresh_access_token", counting_refresh
+    )
+
+    with app_module.app.app_context():
+        email_service.invalidate_gmail_api_status()
+        assert (
+            email_service.cached_gmail_api_status(creds)["connected"] is True
+        )
+        assert (
+            email_service.cached_gmail_api_status(creds)["connected"] is True
+        )
+        assert calls == ["cid"]
+
+        # A real send rejected by Gmail updates the cached status directly
+        email_service.record_gmail_api_status(
+            email_service._status_credentials(creds), False, "Token revoked"
+        )
+        assert email_service.cached_gmail_api_status(creds) == {
+            "connected": False,
+            "message": "Token revoked",
+        }
+        assert calls == ["cid"]
+        email_service.invalidate_gmail_api_status()
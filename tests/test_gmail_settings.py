@@ -13,7 +13,7 @@ def test_gmail_api_credentials_encrypted(app_module, session, monkeypatch):
         lambda *args, **kwargs: None,
     )
     monkeypatch.setattr(
-        "getconnects_admin.routes.settings.get_gmail_api_status",
+        "getconnects_admin.routes.settings.cached_gmail_api_status",
         lambda *args, **kwargs: None,
     )
 
@@ -65,7 +65,7 @@ def test_gmail_settings_status_display(app_module, session, monkeypatch):
         return status_cycle.pop(0)
 
     monkeypatch.setattr(
-        "getconnects_admin.routes.settings.get_gmail_api_status",
+        "getconnects_admin.routes.settings.cached_gmail_api_status",
         lambda *args, **kwargs: fake_status(),
     )
 
@@ -105,7 +105,7 @@ def test_gmail_api_validation_failures(
         _raise,
     )
     monkeypatch.setattr(
-        "getconnects_admin.routes.settings.get_gmail_api_status",
+        "getconnects_admin.routes.settings.cached_gmail_api_status",
         lambda *args, **kwargs: None,
     )
 
@@ -0,0 +1,100 @@
+import logging
+
+import pytest
+from flask import g
+
+from services import sms_service
+from services.instrumentation_service import (
+    QueryBudgetExceeded,
+    RequestTiming,
+    normalize_sql,
+)
+
+
+def _timings(header):
+    parts = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        parts[name] = dict(param.split("=", 1) for param in params)
+    return parts
+
+
+def test_server_timing_reports_db_and_render(app_module, session):
+    client = app_module.app.test_client()
+    resp = client.get("/leads")
+    assert resp.status_code == 200
+
+    timings = _timings(resp.headers["Server-Timing"])
+    assert set(timings) == {"db", "render", "http", "total"}
+    assert timings["db"]["desc"] != '"0 queries"'
+    assert float(timings["render"]["dur"]) > 0
+    assert timings["http"]["desc"] == '"0 calls"'
+
+
+def test_server_timing_is_only_sent_to_staff(app_module, session):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["is_staff"] = False
+    resp = client.get("/leads")
+    assert resp.status_code == 200
+    assert "Server-Timing" not in resp.headers
+
+    with client.session_transaction() as sess:
+        sess.clear()
+    assert "Server-Timing" not in client.get("/login").headers
+
+
+def test_query_budget_fails_in_strict_mode_and_warns_otherwise(
+    app_module, session, monkeypatch, caplog
+):
+    app = app_module.app
+    monkeypatch.setitem(app.config, "QUERY_BUDGETS", {"pages.leads_page": 1})
+    client = app.test_client()
+    with pytest.raises(QueryBudgetExceeded, match="pages.leads_page"):
+        client.get("/leads")
+
+    monkeypatch.setitem(app.config, "QUERY_BUDGET_STRICT", False)
+    with caplog.at_level(logging.WARNING):
+        assert client.get("/leads").status_code == 200
+    assert (
+        "Query budget exceeded: GET /leads (pages.leads_page)" in caplog.text
+    )
+
+
+def test_slow_queries_are_logged_with_route(
+    app_module, session, monkeypatch, caplog
+):
+    monkeypatch.setitem(app_module.app.config, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING):
+        app_module.app.test_client().get("/leads")
+    assert "from GET /leads (pages.leads_page): SELECT" in caplog.text
+
+
+def test_external_calls_are_attributed_to_the_request(
+    app_module, session, monkeypatch
+):
+    class _Resp:
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setenv("JUSTCALL_API_KEY", "key")
+    monkeypatch.setenv("JUSTCALL_API_SECRET", "secret")
+    monkeypatch.setattr(sms_service.requests, "post", lambda *a, **k: _Resp())
+    with app_module.app.test_request_context():
+        g.request_timing = RequestTiming()
+        assert sms_service.send_sms("+15550000000", "hi")
+        assert g.request_timing.external_calls == 1
+        assert g.request_timing.queries == 1
+
+
+def test_normalize_sql_collapses_values():
+    assert (
+        normalize_sql(
+            "SELECT * FROM leads\n WHERE id IN (?, ?, ?)"
+            " AND name = 'O''Brien' LIMIT 20"
+        )
+        == "SELECT * FROM leads WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+    assert normalize_sql(
+        "SELECT x::text FROM t WHERE a = %(a_1)s AND b = $2"
+    ) == "SELECT x::text FROM t WHERE a = ? AND b = ?"
@@ -1,6 +1,7 @@
 from requests.exceptions import RequestException
 
 from services.justcall_service import fetch_campaigns, sync_campaigns
+from models.background_job import BackgroundJob
 from models.campaign import Campaign
 from models.campaign_lead_type import CampaignLeadType
 from models.campaign_lead_type_group import CampaignLeadTypeGroup
@@ -132,3 +133,205 @@ def test_fetch_campaigns_request_exception(monkeypatch, caplog):
         for record in caplog.records
     )
 
+
+def _large_account(count):
+    return [
+        {
+            "id": f"c{i}",
+            "name": f"Campaign {i}",
+            "status": "active",
+            "disposition_groups": [
+                {
+                    "id": f"g{i % 50}",
+                    "name": f"Group {i % 50}",
+                    "dispositions": [
+                        {"id": f"d{i % 50}-1", "name": "Interested"},
+                        {"id": f"d{i % 50}-2", "name": "Call Back"},
+                    ],
+                }
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def test_sync_campaigns_bulk_5k_fixture(app_module, session):
+    from sqlalchemy import event
+
+    data = _large_account(5000)
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _count)
+    try:
+        first = sync_campaigns(data)
+        first_statements = len(statements)
+        data[0]["name"] = "Renamed"
+        second = sync_campaigns(data)
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _count)
+
+    assert first == {"created": 5000, "updated": 0, "unchanged": 0}
+    assert second == {"created": 0, "updated": 1, "unchanged": 4999}
+    # Round trips grow with preload chunks and insert batches, not per row
+    assert first_statements < 100
+    assert session.query(Campaign).count() == 5000
+    assert session.get(Campaign, "c0").campaign_name == "Renamed"
+    assert session.query(LeadTypeGroup).count() == 50
+    assert session.query(LeadType).count() == 100
+    assert session.query(CampaignLeadType).count() == 10000
+
+
+class _FakeResponse:
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+def test_fetch_campaigns_requests_every_page(monkeypatch):
+    pages = []
+
+    def mock_get(url, headers, params, timeout):
+        page = params["page"]
+        pages.append(page)
+        start = page * 100
+        data = [{"id": f"c{i}"} for i in range(start, min(start + 100, 250))]
+        return _FakeResponse(
+            {"data": data, "total_count": 250, "per_page": 100}
+        )
+
+    monkeypatch.setattr("services.justcall_service.requests.get", mock_get)
+
+    campaigns = fetch_campaigns("api-key", "api-secret")
+
+    assert sorted(pages) == [0, 1, 2]
+    assert len(campaigns) == 250
+    assert campaigns[-1]["id"] == "c249"
+
+
+def test_fetch_campaigns_follows_next_page_link(monkeypatch):
+    def mock_get(url, headers, params, timeout):
+        page = params["page"]
+        return _FakeResponse(
+            {
+                "data": [{"id": f"c{page}"}],
+                "next_page_link": "next" if page < 2 else None,
+            }
+        )
+
+    monkeypatch.setattr("services.justcall_service.requests.get", mock_get)
+
+    assert [c["id"] for c in fetch_campaigns("k", "s")] == ["c0", "c1", "c2"]
+
+
+def test_sync_campaigns_skips_unchanged_payloads(app_module, session):
+    from sqlalchemy import event
+
+    data = sample_data()
+    assert sync_campaigns(data) == {"created": 1, "updated": 0, "unchanged": 0}
+
+    writes = []
+
+    def _capture(conn, cursor, statement, *args):
+        if statement.startswith("INSERT"):
+            writes.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _capture)
+    try:
+        assert sync_campaigns(data) == {
+            "created": 0,
+            "updated": 0,
+            "unchanged": 1,
+        }
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _capture)
+    assert writes == []
+    assert session.get(Campaign, "c1").sync_hash
+
+
+def test_campaign_sync_runs_as_background_job(
+    app_module, session, monkeypatch
+):
+    from models.justcall_credential import JustCallCredential
+    from services.job_service import acquire_lock, release_lock, start_job
+    from services.justcall_service import _run_campaign_sync
+
+    session.add(JustCallCredential(api_key="k", api_secret="s"))
+    session.commit()
+    monkeypatch.setattr(
+        "services.justcall_service.fetch_campaigns",
+        lambda key, secret: sample_data(),
+    )
+    client = app_module.app.test_client()
+
+    resp = client.get("/campaigns")
+    assert b"Never synced" in resp.data
+
+    client.post("/campaigns/sync")
+    assert session.query(Campaign).count() == 1
+    resp = client.get("/campaigns")
+    assert b"succeeded" in resp.data
+    assert b"1 created" in resp.data
+
+    # Only one worker may sync at a time; the others record nothing
+    assert acquire_lock("campaign_sync", 60)
+    assert not acquire_lock("campaign_sync", 60)
+    try:
+        resp = client.post("/campaigns/sync", follow_redirects=True)
+        assert b"already running" in resp.data
+        assert session.query(BackgroundJob).count() == 1
+    finally:
+        release_lock("campaign_sync")
+    assert acquire_lock("campaign_sync", 60)
+    release_lock("campaign_sync")
+
+    # A sync that found its credentials gone does not hide the last result
+    session.query(JustCallCredential).delete()
+    session.commit()
+    with app_module.app.app_context():
+        start_job("campaign_sync", _run_campaign_sync)
+    resp = client.get("/campaigns")
+    assert b"succeeded" in resp.data
+    assert b"skipped" not in resp.data
+
+
+def test_campaign_sync_needs_credentials(app_module, session):
+    from services.justcall_service import scheduled_campaign_sync
+
+    client = app_module.app.test_client()
+    resp = client.post("/campaigns/sync", follow_redirects=True)
+    assert b"Add JustCall API credentials" in resp.data
+    assert b"Campaign sync started" not in resp.data
+    with app_module.app.app_context():
+        assert scheduled_campaign_sync() is None
+    assert session.query(BackgroundJob).count() == 0
+
+
+def test_scheduled_sync_runs_once_per_interval(
+    app_module, session, monkeypatch
+):
+    from models.justcall_credential import JustCallCredential
+    from services.justcall_service import scheduled_campaign_sync
+
+    session.add(JustCallCredential(api_key="k", api_secret="s"))
+    session.commit()
+    monkeypatch.setattr(
+        "services.justcall_service.fetch_campaigns",
+        lambda key, secret: sample_data(),
+    )
+    monkeypatch.setitem(app_module.app.config, "CAMPAIGN_SYNC_INTERVAL", 600)
+
+    # Every worker's scheduler ticks; only the first starts a sync
+    with app_module.app.app_context():
+        assert scheduled_campaign_sync() is not None
+        assert scheduled_campaign_sync() is None
+        assert scheduled_campaign_sync() is None
+    jobs = session.query(BackgroundJob).all()
+    assert [job.status for job in jobs] == ["succeeded"]
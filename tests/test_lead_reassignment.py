@@ -0,0 +1,100 @@
+from models.campaign import Campaign
+from models.client import Client
+from models.lead import Lead
+from services.job_service import latest_job
+from services.lead_service import (
+    LEAD_REASSIGNMENT_JOB,
+    list_leads,
+    list_leads_paginated,
+)
+
+
+def _seed(session, leads):
+    old = Client(
+        company_name="Old",
+        contact_name="A",
+        contact_email="a@x.com",
+        phone="1",
+    )
+    new = Client(
+        company_name="New",
+        contact_name="B",
+        contact_email="b@x.com",
+        phone="2",
+    )
+    session.add_all([old, new])
+    session.flush()
+    session.add_all(
+        [
+            Campaign(id="c1", campaign_name="One", client_id=old.id),
+            Campaign(id="c2", campaign_name="Two", client_id=old.id),
+        ]
+    )
+    session.flush()
+    for i in range(leads):
+        # Interleave another campaign's leads to make the id ranges sparse
+        session.add(Lead(name=f"L{i}", campaign_id="c1", client_id=old.id))
+        session.add(Lead(name=f"O{i}", campaign_id="c2", client_id=old.id))
+    session.commit()
+    return old.id, new.id
+
+
+def test_reads_follow_campaign_owner_before_reassignment(app_module, session):
+    old_id, new_id = _seed(session, 3)
+    session.get(Campaign, "c1").client_id = new_id
+    # Leads without a campaign keep their stored client
+    session.add(Lead(name="Direct", client_id=new_id))
+    session.commit()
+
+    # Stored copies are untouched until the job runs
+    assert (
+        session.query(Lead)
+        .filter_by(campaign_id="c1", client_id=new_id)
+        .count()
+        == 0
+    )
+    assert {lead["name"] for lead in list_leads(client_id=new_id)} == {
+        "L0",
+        "L1",
+        "L2",
+        "Direct",
+    }
+    rows, total = list_leads_paginated(client_id=old_id)
+    assert total == 3
+    assert {row["client"] for row in rows} == {"Old"}
+
+
+def test_owner_change_reassigns_leads_in_chunks(
+    app_module, session, monkeypatch
+):
+    monkeypatch.setitem(app_module.app.config, "LEAD_REASSIGN_CHUNK_SIZE", 2)
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    old_id, new_id = _seed(session, 5)
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    resp = test_client.post("/campaigns/c1", data={"client_id": str(new_id)})
+    assert resp.status_code == 302
+
+    job = latest_job(LEAD_REASSIGNMENT_JOB)
+    assert job["status"] == "succeeded"
+    assert (job["progress"], job["total"]) == (5, 5)
+    assert job["result"] == {"campaign_id": "c1", "updated": 5}
+    session.expire_all()
+    assert (
+        session.query(Lead)
+        .filter_by(campaign_id="c1", client_id=new_id)
+        .count()
+        == 5
+    )
+    assert (
+        session.query(Lead)
+        .filter_by(campaign_id="c2", client_id=old_id)
+        .count()
+        == 5
+    )
+
+    # Saving without an owner change does not queue another job
+    test_client.post("/campaigns/c1", data={"client_id": str(new_id)})
+    assert latest_job(LEAD_REASSIGNMENT_JOB)["id"] == job["id"]
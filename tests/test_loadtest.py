@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import requests
+
+from benchmarks.loadtest import StubAPI, drive, unique_payload
+from services.seed_service import justcall_webhook_payload
+
+
+def test_stub_injects_errors_and_serves_tokens():
+    with StubAPI("gmail", error_rate=1.0) as failing, StubAPI("gmail") as ok:
+        assert (
+            requests.post(
+                f"{failing.url}/gmail/v1/users/me/messages/send", json={}
+            ).status_code
+            == 500
+        )
+        resp = requests.post(
+            f"{ok.url}/token", data={"grant_type": "refresh_token"}
+        )
+        assert resp.json()["access_token"] == "stub-token"
+    assert failing.stats() == {"requests": 1, "errors": 1, "peak_in_flight": 1}
+
+
+def test_replayed_payloads_are_never_duplicates():
+    body = justcall_webhook_payload(1)
+    first, second = unique_payload(body, 0), unique_payload(body, 1)
+    assert first != second
+    assert "loadtest_seq" not in body[0]["data"]
+
+
+def test_drive_counts_statuses_and_exceptions():
+    def send(i):
+        if i % 2:
+            raise requests.ConnectionError()
+        return 204
+
+    result = drive(send, rate=200, duration=0.05)
+    assert result["sent"] == 10
+    assert result["statuses"] == {"204": 5, "ConnectionError": 5}
+    assert len(result["latencies"]) == 10
+
+
+def test_loadtest_end_to_end(tmp_path):
+    # A file database: in-memory SQLite is private to each server thread
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'load.db'}")
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.loadtest",
+            "--rate",
+            "10",
+            "--duration",
+            "0.5",
+            "--threads",
+            "2",
+            "--sms-latency",
+            "0",
+            "--gmail-latency",
+            "0",
+            "--jitter",
+            "0",
+        ],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    report = json.loads(proc.stdout)
+    assert report["requests"]["statuses"] == {"204": 5}
+    assert report["leads"]["created"] == 5
+    assert report["notifications"]["outcomes"] == {
+        "sms:sent": 5,
+        "email:sent": 5,
+    }
+    assert report["db_pool"]["size"] == 5
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
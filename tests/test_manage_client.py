@@ -0,0 +1,120 @@
+from sqlalchemy import event
+
+from models.campaign import Campaign
+from models.campaign_lead_type import CampaignLeadType
+from models.campaign_lead_type_group import CampaignLeadTypeGroup
+from models.client import Client
+from models.client_lead_type_setting import ClientLeadTypeSetting
+from models.lead_type import LeadType
+from models.lead_type_group import LeadTypeGroup
+
+
+def _seed(session, campaigns):
+    client = Client(
+        company_name="Acme",
+        contact_name="A",
+        contact_email="a@x.com",
+        phone="1",
+    )
+    session.add_all([client, LeadTypeGroup(id="g1", name="Group1")])
+    session.flush()
+    for i in range(campaigns):
+        session.add_all(
+            [
+                Campaign(
+                    id=f"c{i}", campaign_name=f"Camp {i}", client_id=client.id
+                ),
+                LeadType(id=f"t{i}", name=f"Type {i}", group_id="g1"),
+            ]
+        )
+        session.flush()
+        if i % 2:
+            session.add(
+                CampaignLeadTypeGroup(
+                    campaign_id=f"c{i}", lead_type_group_id="g1"
+                )
+            )
+        else:
+            session.add(
+                CampaignLeadType(campaign_id=f"c{i}", lead_type_id=f"t{i}")
+            )
+    session.commit()
+    return client.id
+
+
+def _count_queries(app_module, func):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _count)
+    try:
+        result = func()
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _count)
+    return result, len(statements)
+
+
+def test_manage_client_query_count_is_constant(app_module, session):
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    counts = []
+    for campaigns in (2, 20):
+        session.rollback()
+        app_module.Base.metadata.drop_all(bind=app_module.engine)
+        app_module.Base.metadata.create_all(bind=app_module.engine)
+        client_id = _seed(session, campaigns)
+        resp, queries = _count_queries(
+            app_module, lambda: test_client.get(f"/clients/{client_id}/manage")
+        )
+        assert resp.status_code == 200
+        assert f"Type {campaigns - 1}".encode() in resp.data
+        counts.append(queries)
+    assert counts[0] == counts[1]
+    assert counts[1] <= 4
+
+
+def test_manage_client_saves_settings_in_bulk(app_module, session):
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    client_id = _seed(session, 4)
+    session.add(
+        ClientLeadTypeSetting(
+            client_id=client_id, lead_type_id="t0", sms_enabled=True
+        )
+    )
+    session.commit()
+    test_client = app_module.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess["uid"] = "test"
+
+    form = {
+        "company_name": "Acme",
+        "contact_name": "A",
+        "contact_email": "a@x.com",
+        "phone": "1",
+        "email_t0": "on",
+        "sms_t3": "on",
+    }
+    resp, queries = _count_queries(
+        app_module,
+        lambda: test_client.post(f"/clients/{client_id}/manage", data=form),
+    )
+    assert resp.status_code == 302
+
+    session.expire_all()
+    settings = {
+        s.lead_type_id: (s.sms_enabled, s.email_enabled)
+        for s in session.query(ClientLeadTypeSetting).filter_by(
+            client_id=client_id
+        )
+    }
+    assert settings == {
+        "t0": (False, True),
+        "t1": (False, False),
+        "t2": (False, False),
+        "t3": (True, False),
+    }
+    assert queries <= 3
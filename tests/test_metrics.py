@@ -0,0 +1,169 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from models.campaign import Campaign
+from models.client import Client
+from models.justcall_webhook import JustCallWebhook
+from services.seed_service import justcall_webhook_payload
+
+
+def _value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_count_webhook_leads_and_notifications(
+    app_module, session, monkeypatch
+):
+    monkeypatch.setitem(app_module.app.config, "METRICS_PUBLIC", True)
+    client_row = Client(
+        company_name="Acme",
+        contact_name="A",
+        contact_email="a@example.com",
+        phone="+15550000000",
+    )
+    session.add(client_row)
+    session.flush()
+    session.add(
+        Campaign(
+            id="c1",
+            campaign_name="Metrics",
+            status="active",
+            client_id=client_row.id,
+        )
+    )
+    session.add(JustCallWebhook(token="metrics", target_type="lead"))
+    session.commit()
+    before = {
+        "received": _value(
+            "getconnects_webhook_payloads_total", outcome="received"
+        ),
+        "deduplicated": _value(
+            "getconnects_webhook_payloads_total", outcome="deduplicated"
+        ),
+        "failed": _value(
+            "getconnects_webhook_payloads_total", outcome="failed"
+        ),
+        "leads": _value("getconnects_leads_created_total"),
+        "sms": _value(
+            "getconnects_notifications_total", channel="sms", status="failed"
+        ),
+        "requests": _value(
+            "getconnects_http_requests_total",
+            endpoint="webhooks.justcall_webhook",
+            method="POST",
+            status="204",
+        ),
+    }
+
+    web = app_module.app.test_client()
+    payload = justcall_webhook_payload(1, campaign_name="Metrics")
+    assert (
+        web.post("/webhooks/justcall/metrics", json=payload).status_code == 204
+    )
+    assert (
+        web.post("/webhooks/justcall/metrics", json=payload).status_code == 204
+    )
+    assert (
+        web.post("/webhooks/justcall/unknown", json=payload).status_code == 404
+    )
+
+    assert (
+        _value("getconnects_webhook_payloads_total", outcome="received")
+        == before["received"] + 3
+    )
+    assert (
+        _value("getconnects_webhook_payloads_total", outcome="deduplicated")
+        == before["deduplicated"] + 1
+    )
+    assert (
+        _value("getconnects_webhook_payloads_total", outcome="failed")
+        == before["failed"] + 1
+    )
+    assert _value("getconnects_leads_created_total") == before["leads"] + 1
+    # No JustCall credentials are configured, so the SMS is recorded as failed
+    assert (
+        _value(
+            "getconnects_notifications_total", channel="sms", status="failed"
+        )
+        == before["sms"] + 1
+    )
+    assert (
+        _value(
+            "getconnects_http_requests_total",
+            endpoint="webhooks.justcall_webhook",
+            method="POST",
+            status="204",
+        )
+        == before["requests"] + 2
+    )
+
+    resp = web.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain")
+    text = resp.get_data(as_text=True)
+    assert (
+        "getconnects_http_request_duration_seconds_bucket"
+        '{endpoint="webhooks.justcall_webhook"' in text
+    )
+    assert "getconnects_db_pool_checkout_wait_seconds_count" in text
+    assert "getconnects_db_pool_connections_in_use" in text
+
+
+def test_metrics_are_hidden_unless_opened(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setitem(app_module.app.config, "METRICS_PUBLIC", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_token_is_required_when_configured(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "METRICS_PUBLIC", True)
+    monkeypatch.setitem(app_module.app.config, "METRICS_TOKEN", "s3cret")
+    client = app_module.app.test_client()
+    assert client.get("/metrics").status_code == 401
+    assert (
+        client.get(
+            "/metrics", headers={"Authorization": "Bearer s3cret"}
+        ).status_code
+        == 200
+    )
+
+
+_WORKER = """
+from getconnects_admin.services.metrics_service import record_lead_created
+record_lead_created()
+"""
+
+_SCRAPE = """
+from getconnects_admin import create_app
+client = create_app("testing").test_client()
+print(client.get("/metrics").get_data(as_text=True))
+"""
+
+
+def test_metrics_are_summed_across_worker_processes(tmp_path):
+    env = dict(
+        os.environ,
+        PROMETHEUS_MULTIPROC_DIR=str(tmp_path),
+        METRICS_PUBLIC="true",
+    )
+    root = Path(__file__).resolve().parent.parent
+
+    def _run(code):
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=60,
+        ).stdout
+
+    _run(_WORKER)
+    _run(_WORKER)
+    assert "getconnects_leads_created_total 2.0" in _run(_SCRAPE)
@@ -0,0 +1,232 @@
+import re
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+from models.lead import Lead
+from services.migration_service import (
+    LEAD_INDEXES,
+    MIGRATIONS,
+    applied_versions,
+    apply_migrations,
+    create_index_ddl,
+    pending_migrations,
+)
+from services.schema_service import schema_version
+
+
+def _legacy_engine():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE leads (id INTEGER PRIMARY KEY,"
+                " lead_type VARCHAR, client_id INTEGER, campaign_id VARCHAR,"
+                " created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text("CREATE INDEX ix_leads_client_id ON leads(client_id)")
+        )
+        conn.execute(
+            text("CREATE INDEX ix_leads_campaign_id ON leads(campaign_id)")
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY,"
+                " uid VARCHAR NOT NULL)"
+            )
+        )
+        conn.execute(text("INSERT INTO users (uid) VALUES ('legacy')"))
+        conn.execute(
+            text(
+                "CREATE TABLE notification_logs (id INTEGER PRIMARY KEY,"
+                " client_id INTEGER, lead_id INTEGER, channel VARCHAR,"
+                " status VARCHAR, message VARCHAR)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO notification_logs (channel) VALUES ('sms')")
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE campaigns (id VARCHAR PRIMARY KEY,"
+                " campaign_name VARCHAR)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE lead_types (id VARCHAR PRIMARY KEY,"
+                " name VARCHAR, group_id VARCHAR)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE campaign_lead_types (campaign_id VARCHAR,"
+                " lead_type_id VARCHAR, lead_type_name VARCHAR,"
+                " PRIMARY KEY (campaign_id, lead_type_id))"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE campaign_lead_type_groups (campaign_id VARCHAR,"
+                " lead_type_group_id VARCHAR,"
+                " PRIMARY KEY (campaign_id, lead_type_group_id))"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO lead_types (id, name, group_id) VALUES"
+                " ('t1', 'Sale', NULL), ('t2', 'Callback', 'g1')"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO campaign_lead_types VALUES ('c1', 't1', NULL)")
+        )
+        conn.execute(
+            text("INSERT INTO campaign_lead_type_groups VALUES ('c1', 'g1')")
+        )
+    return engine
+
+
+def _lead_indexes(engine):
+    return {
+        index["name"]: index["column_names"]
+        for index in inspect(engine).get_indexes("leads")
+    }
+
+
+VERSIONS = [migration.version for migration in MIGRATIONS]
+
+
+def test_lead_index_migration_is_versioned_and_idempotent(app_module):
+    engine = _legacy_engine()
+    assert [m.version for m in pending_migrations(engine)] == VERSIONS
+
+    with app_module.app.app_context():
+        before = schema_version(engine)
+        assert [m.version for m in apply_migrations(engine)] == VERSIONS
+        assert schema_version(engine) != before
+        # Nothing left to apply; a rerun is a no-op
+        assert apply_migrations(engine) == []
+
+    indexes = _lead_indexes(engine)
+    assert indexes == {
+        "ix_leads_client_id_created_at": ["client_id", "created_at"],
+        "ix_leads_campaign_id_created_at": ["campaign_id", "created_at"],
+        "ix_leads_lead_type": ["lead_type"],
+        "ix_leads_created_at": ["created_at"],
+    }
+    assert applied_versions(engine) == set(VERSIONS)
+    with engine.connect() as conn:
+        assert (
+            conn.execute(text("SELECT auth_version FROM users")).scalar() == 0
+        )
+        conn.execute(
+            text("SELECT created_at, body_hash FROM notification_logs")
+        ).all()
+        conn.execute(
+            text("SELECT hash, content, size FROM notification_bodies")
+        ).all()
+        conn.execute(text("SELECT sync_hash FROM campaigns")).all()
+        conn.execute(
+            text("SELECT name, status, progress FROM background_jobs")
+        ).all()
+        conn.execute(
+            text("SELECT name, owner, expires_at FROM job_locks")
+        ).all()
+        # Lead types accepted before the table existed are backfilled
+        effective = conn.execute(
+            text(
+                "SELECT campaign_id, lead_type_name, source"
+                " FROM campaign_effective_lead_types ORDER BY lead_type_name"
+            )
+        ).all()
+        assert [tuple(row) for row in effective] == [
+            ("c1", "Callback", "group"),
+            ("c1", "Sale", "campaign"),
+        ]
+    assert {
+        "ix_notification_logs_client_id_created_at",
+        "ix_notification_logs_status_channel",
+        "ix_notification_logs_body_hash",
+    } <= {
+        index["name"]
+        for index in inspect(engine).get_indexes("notification_logs")
+    }
+
+
+def test_postgres_indexes_are_built_concurrently():
+    from sqlalchemy.dialects import postgresql
+
+    ddl = create_index_ddl(
+        Lead.__table__, "ix_leads_client_id_created_at", concurrently=True
+    )
+    assert str(ddl.compile(dialect=postgresql.dialect())) == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leads_client_id_created_at"
+        " ON leads (client_id, created_at)"
+    )
+    # The declared index is untouched, so create_all still works in a
+    # transaction
+    plain = create_index_ddl(Lead.__table__, "ix_leads_client_id_created_at")
+    assert "CONCURRENTLY" not in str(
+        plain.compile(dialect=postgresql.dialect())
+    )
+
+
+def test_models_declare_migrated_indexes(app_module, session):
+    declared = {index.name for index in Lead.__table__.indexes}
+    assert set(LEAD_INDEXES) <= declared
+    # Databases built from the models already have the indexes
+    assert set(LEAD_INDEXES) <= set(_lead_indexes(app_module.engine))
+    with app_module.app.app_context():
+        assert [
+            m.version for m in apply_migrations(app_module.engine)
+        ] == VERSIONS
+
+
+def test_schema_stamp_follows_migrations_from_other_processes(
+    monkeypatch, tmp_path
+):
+    from services import schema_service
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'stamp.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text("CREATE TABLE notification_templates (id INTEGER, name TEXT)")
+        )
+    assert not schema_service.schema_capabilities(engine).supports(
+        "notification_template_email_text"
+    )
+
+    # `flask migrate` in another process: nothing in this process is told
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "ALTER TABLE notification_templates ADD COLUMN email_text TEXT"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE schema_migrations (version VARCHAR PRIMARY KEY)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO schema_migrations (version) VALUES ('0003')")
+        )
+
+    assert not schema_service.schema_capabilities(engine).supports(
+        "notification_template_email_text"
+    )
+    monkeypatch.setattr(schema_service, "SCHEMA_VERSION_TTL", 0)
+    assert schema_service.schema_capabilities(engine).supports(
+        "notification_template_email_text"
+    )
+
+
+def test_schema_sql_records_every_migration():
+    # Databases created from schema.sql must not re-run migrations it includes
+    sql = (Path(__file__).resolve().parent.parent / "schema.sql").read_text()
+    rows = sql.split("INSERT INTO schema_migrations", 1)[1].split(";", 1)[0]
+    recorded = re.findall(r"\('(\d+)', '([^']*)'\)", rows)
+    assert recorded == [(m.version, m.description) for m in MIGRATIONS]
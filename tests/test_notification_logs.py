@@ -43,3 +43,260 @@ def test_notification_log_records_and_api(app_module, session, monkeypatch):
     for entry in data:
         assert entry["client_name"] == "Acme"
         assert entry["lead_name"] == "Bob"
+
+
+def _add_client_and_campaign(app_module, session):
+    client = app_module.Client(
+        company_name="Acme",
+        contact_name="Alice",
+        contact_email="a@example.com",
+        phone="111",
+    )
+    campaign = app_module.Campaign(
+        id="camp1", campaign_name="Camp", client=client
+    )
+    session.add_all([client, campaign])
+    session.commit()
+    return campaign
+
+
+def test_notification_logs_written_in_single_insert(
+    app_module, session, monkeypatch
+):
+    from sqlalchemy import event
+
+    campaign = _add_client_and_campaign(app_module, session)
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_sms",
+        MagicMock(return_value=True),
+    )
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_email",
+        MagicMock(return_value=True),
+    )
+
+    inserts = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO notification_logs"):
+            inserts.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _capture)
+    try:
+        app_module.create_lead(
+            "Bob", "222", "b@example.com", campaign_id=campaign.id
+        )
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _capture)
+
+    assert len(inserts) == 1
+    logs = session.query(app_module.NotificationLog).all()
+    assert {log.channel for log in logs} == {"sms", "email"}
+    assert all(log.created_at is not None for log in logs)
+
+
+def test_notification_log_buffer_flushes_batch_on_exit(
+    app_module, session, monkeypatch
+):
+    from services.notification_service import notification_log_buffer
+
+    campaign = _add_client_and_campaign(app_module, session)
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_sms",
+        MagicMock(return_value=True),
+    )
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_email",
+        MagicMock(return_value=False),
+    )
+
+    NotificationLog = app_module.NotificationLog
+    with notification_log_buffer() as buffer:
+        for name in ("Bob", "Carol"):
+            app_module.create_lead(
+                name,
+                "222",
+                "b@example.com",
+                campaign_id=campaign.id,
+                notification_logs=buffer,
+            )
+        assert len(buffer) == 4
+        assert session.query(NotificationLog).count() == 0
+
+    assert session.query(NotificationLog).count() == 4
+    assert (
+        session.query(NotificationLog).filter_by(status="failed").count() == 2
+    )
+
+
+def _seed_logs(app_module, session, count):
+    client = app_module.Client(
+        company_name="Acme",
+        contact_name="Alice",
+        contact_email="a@example.com",
+        phone="111",
+    )
+    session.add(client)
+    session.commit()
+    session.add_all(
+        [
+            app_module.NotificationLog(
+                client_id=client.id,
+                channel="sms" if i % 2 else "email",
+                status="sent" if i % 3 else "failed",
+                message=f"msg {i}",
+            )
+            for i in range(count)
+        ]
+    )
+    session.commit()
+    return client
+
+
+def test_notifications_api_cursor_pagination(app_module, session):
+    _seed_logs(app_module, session, 7)
+    test_client = app_module.app.test_client()
+
+    resp = test_client.get("/notifications?limit=3")
+    first = resp.get_json()
+    assert [e["id"] for e in first] == [7, 6, 5]
+    assert resp.headers["X-Next-Before-Id"] == "5"
+
+    resp = test_client.get("/notifications?limit=3&before_id=5")
+    assert [e["id"] for e in resp.get_json()] == [4, 3, 2]
+
+    resp = test_client.get("/notifications?limit=3&before_id=2")
+    assert [e["id"] for e in resp.get_json()] == [1]
+    assert "X-Next-Before-Id" not in resp.headers
+
+
+def test_notifications_api_caps_limit_and_polls_since_id(app_module, session):
+    from services.notification_service import MAX_PAGE_SIZE
+
+    _seed_logs(app_module, session, MAX_PAGE_SIZE + 5)
+    test_client = app_module.app.test_client()
+
+    resp = test_client.get("/notifications?limit=100000")
+    assert len(resp.get_json()) == MAX_PAGE_SIZE
+
+    resp = test_client.get(f"/notifications?since_id={MAX_PAGE_SIZE + 2}")
+    assert [e["id"] for e in resp.get_json()] == [
+        MAX_PAGE_SIZE + 5,
+        MAX_PAGE_SIZE + 4,
+        MAX_PAGE_SIZE + 3,
+    ]
+
+
+def test_notifications_api_filters(app_module, session):
+    client = _seed_logs(app_module, session, 6)
+    test_client = app_module.app.test_client()
+
+    resp = test_client.get("/notifications?status=failed&channel=email")
+    data = resp.get_json()
+    assert data and all(
+        e["status"] == "failed" and e["channel"] == "email" for e in data
+    )
+
+    resp = test_client.get(f"/notifications?client_id={client.id + 1}")
+    assert resp.get_json() == []
+
+    resp = test_client.get("/notifications?start_date=2999-01-01")
+    assert resp.get_json() == []
+
+
+def test_notifications_page_renders_filtered_page(app_module, session):
+    _seed_logs(app_module, session, 3)
+    test_client = app_module.app.test_client()
+    resp = test_client.get("/notifications/all?status=failed")
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert "msg 0" in html
+    assert "msg 1" not in html
+
+
+def test_notification_bodies_deduplicated_and_loaded_on_demand(
+    app_module, session, monkeypatch
+):
+    from models.notification_body import NotificationBody
+    from services.notification_service import MESSAGE_PREVIEW_LENGTH
+
+    campaign = _add_client_and_campaign(app_module, session)
+    long_sms = "Hello from Acme. " * 20
+    session.add(
+        app_module.NotificationTemplate(
+            name="Default", sms_template=long_sms, is_default=True
+        )
+    )
+    session.commit()
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_sms",
+        MagicMock(return_value=True),
+    )
+    monkeypatch.setattr(
+        app_module.services.lead_service,
+        "send_email",
+        MagicMock(return_value=False),
+    )
+
+    for name in ("Bob", "Carol"):
+        app_module.create_lead(
+            name, "222", "b@example.com", campaign_id=campaign.id
+        )
+
+    sms_logs = (
+        session.query(app_module.NotificationLog)
+        .filter_by(channel="sms")
+        .all()
+    )
+    assert len(sms_logs) == 2
+    assert sms_logs[0].body_hash == sms_logs[1].body_hash
+    assert session.query(NotificationBody).count() == 1
+    assert len(sms_logs[0].message) == MESSAGE_PREVIEW_LENGTH
+
+    test_client = app_module.app.test_client()
+    listed = test_client.get("/notifications?channel=sms").get_json()
+    assert all(
+        e["has_body"] and len(e["message"]) <= MESSAGE_PREVIEW_LENGTH
+        for e in listed
+    )
+
+    resp = test_client.get(f"/notifications/{sms_logs[0].id}/body")
+    assert resp.get_json()["body"] == long_sms
+    assert test_client.get("/notifications/999/body").status_code == 404
+
+
+def test_store_bodies_leaves_existing_rows_alone(app_module, session):
+    from sqlalchemy import event
+
+    from models.notification_body import NotificationBody
+    from services.notification_service import hash_body, store_bodies
+
+    shared = "Shared body"
+    session.add(NotificationBody(hash=hash_body(shared), content=b"", size=0))
+    session.commit()
+
+    statements = []
+
+    def _track(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _track)
+    try:
+        hashes = store_bodies(session, [shared, "New body"])
+        session.commit()
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _track)
+
+    assert hashes == {
+        shared: hash_body(shared),
+        "New body": hash_body("New body"),
+    }
+    assert not any("DO UPDATE" in statement for statement in statements)
+    # The shared row was not rewritten
+    assert session.get(NotificationBody, hash_body(shared)).size == 0
+    assert session.query(NotificationBody).count() == 2
@@ -1,6 +1,6 @@
 import re
 
-def test_permission_denied(app_module):
+def test_permission_denied(app_module, session):
     client = app_module.app.test_client()
     with client.session_transaction() as sess:
         sess["uid"] = "user1"
@@ -10,7 +10,7 @@ def test_permission_denied(app_module):
     assert "don't have permission" in resp.get_data(as_text=True)
 
 
-def test_navigation_hides_links(app_module):
+def test_navigation_hides_links(app_module, session):
     client = app_module.app.test_client()
     with client.session_transaction() as sess:
         sess["uid"] = "user1"
@@ -19,3 +19,91 @@ def test_navigation_hides_links(app_module):
     html = resp.get_data(as_text=True)
     assert re.search(r'href="/clients"', html) is None
     assert re.search(r'href="/dashboard"', html)
+
+
+def test_permission_trie_matches_prefixes():
+    from services.auth_decorators import PermissionTrie
+
+    trie = PermissionTrie(["/dashboard", "/settings/gmail"])
+    assert trie.allows("/dashboard")
+    assert trie.allows("/settings/gmail/edit")
+    assert not trie.allows("/settings")
+    assert not trie.allows("/clients")
+    # Navigation sections are shown when any page beneath them is granted
+    assert trie.covers("/settings")
+    assert not trie.covers("/settings/users")
+    assert not PermissionTrie([])
+
+
+def test_authorisation_cached_until_version_bumped(app_module, session):
+    from sqlalchemy import event
+    from models.page_permission import PagePermission
+    from models.user import User
+    from services.auth_decorators import bump_permissions_version
+
+    user = User(uid="cached-user", email="cached@example.com", is_staff=True)
+    session.add(user)
+    session.commit()
+    session.add(PagePermission(user_id=user.id, path="/dashboard"))
+    session.commit()
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["uid"] = "cached-user"
+        sess["permissions"] = ["/clients"]
+        sess["is_staff"] = True
+
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        if "users" in statement:
+            statements.append(statement)
+
+    # The first check in a process reads the stamp from the row
+    assert client.get("/clients").status_code == 200
+
+    event.listen(app_module.engine, "before_cursor_execute", _capture)
+    try:
+        assert client.get("/clients").status_code == 200
+        assert statements == []
+
+        with app_module.app.app_context():
+            bump_permissions_version(user)
+            session.commit()
+        statements.clear()
+        assert client.get("/clients").status_code == 403
+        assert len(statements) == 1
+        assert client.get("/dashboard").status_code == 200
+        assert len(statements) == 1
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _capture)
+
+
+def test_bumps_from_other_workers_are_seen_after_the_ttl(
+    app_module, session, monkeypatch
+):
+    from models.page_permission import PagePermission
+    from models.user import User
+    from services import auth_decorators
+
+    user = User(uid="remote-user", email="remote@example.com", is_staff=True)
+    session.add(user)
+    session.commit()
+    session.add(PagePermission(user_id=user.id, path="/dashboard"))
+    session.commit()
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["uid"] = "remote-user"
+        sess["permissions"] = ["/clients"]
+        sess["is_staff"] = True
+    assert client.get("/clients").status_code == 200
+
+    # Bumped by another process: this process's cache is not told
+    user.auth_version = 42
+    session.commit()
+    assert client.get("/clients").status_code == 200
+    monkeypatch.setattr(auth_decorators, "AUTH_VERSION_TTL", 0)
+    with app_module.app.app_context():
+        app_module.cache.clear()
+    assert client.get("/clients").status_code == 403
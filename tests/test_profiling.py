@@ -0,0 +1,95 @@
+import pstats
+
+import pytest
+
+from models.user import User
+from services.auth_decorators import bump_permissions_version
+
+
+@pytest.fixture
+def profile_dir(app_module, tmp_path, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _superuser_client(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["is_superuser"] = True
+    return client
+
+
+def test_superuser_can_profile_a_request(app_module, session, profile_dir):
+    client = _superuser_client(app_module)
+    resp = client.get("/leads?__profile=1")
+    assert resp.status_code == 200
+    profile_id = resp.headers["X-Profile-Id"]
+
+    stats = pstats.Stats(str(profile_dir / f"{profile_id}.pstats"))
+    assert any(func[2] == "leads_page" for func in stats.stats)
+    assert (profile_dir / f"{profile_id}.folded").exists()
+
+    listing = client.get("/settings/profiles")
+    assert listing.status_code == 200
+    assert b"GET /leads?__profile=1" in listing.data
+    download = client.get(f"/settings/profiles/{profile_id}.pstats")
+    assert download.status_code == 200
+    assert download.headers["Content-Disposition"].startswith("attachment")
+    assert (
+        client.get("/settings/profiles/..%2Fsecret.pstats").status_code == 404
+    )
+    assert (
+        client.get(f"/settings/profiles/{profile_id}.json").status_code == 404
+    )
+
+
+def test_profiling_requires_a_superuser(app_module, session, profile_dir):
+    client = app_module.app.test_client()
+    resp = client.get("/leads", headers={"X-Profile": "1"})
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    assert list(profile_dir.iterdir()) == []
+    assert client.get("/settings/profiles").status_code == 403
+
+
+def test_profiling_flag_must_be_set(app_module, session, profile_dir):
+    client = _superuser_client(app_module)
+    assert "X-Profile-Id" not in client.get("/leads?__profile=0").headers
+    assert (
+        "X-Profile-Id"
+        not in client.get("/leads", headers={"X-Profile": "no"}).headers
+    )
+    assert "X-Profile-Id" in client.get("/leads?__profile=true").headers
+
+
+def test_demoted_superuser_cannot_profile(app_module, session, profile_dir):
+    client = _superuser_client(app_module)
+    user = User(
+        uid="test", email="test@example.com", is_staff=True, is_superuser=False
+    )
+    session.add(user)
+    with app_module.app.app_context():
+        bump_permissions_version(user)
+        session.commit()
+
+    resp = client.get("/leads?__profile=1")
+    assert resp.status_code == 200
+    assert "X-Profile-Id" not in resp.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_profiles_are_kept_in_a_ring_buffer(
+    app_module, session, profile_dir, monkeypatch
+):
+    monkeypatch.setitem(app_module.app.config, "PROFILE_KEEP", 2)
+    client = _superuser_client(app_module)
+    ids = [
+        client.get("/leads", headers={"X-Profile": "1"}).headers[
+            "X-Profile-Id"
+        ]
+        for _ in range(3)
+    ]
+
+    kept = sorted(path.stem for path in profile_dir.glob("*.json"))
+    assert kept == ids[1:]
+    assert len(list(profile_dir.iterdir())) == 6
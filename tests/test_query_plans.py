@@ -0,0 +1,121 @@
+from services.query_plan_service import (
+    PlanReport,
+    QUERIES,
+    analyze,
+    compare_plans,
+    explain_queries,
+)
+from services.seed_service import seed_dataset
+
+
+def test_check_query_plans_flags_new_full_scans(app_module, session, tmp_path):
+    seed_dataset(
+        session, clients=2, campaigns_per_client=2, lead_types=3, leads=500
+    )
+    analyze(session)
+    baseline = tmp_path / "plans.json"
+    runner = app_module.app.test_cli_runner()
+
+    result = runner.invoke(
+        args=[
+            "check-query-plans",
+            "--baseline",
+            str(baseline),
+            "--update-baseline",
+        ]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Baseline for sqlite" in result.output
+    result = runner.invoke(
+        args=["check-query-plans", "--baseline", str(baseline)]
+    )
+    assert result.exit_code == 0, result.output
+
+    with app_module.engine.begin() as conn:
+        for name in (
+            "ix_leads_lead_type",
+            "ix_leads_created_at",
+            "ix_leads_campaign_id_created_at",
+            "ix_leads_client_id_created_at",
+        ):
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+    result = runner.invoke(
+        args=["check-query-plans", "--baseline", str(baseline)]
+    )
+    assert result.exit_code == 1
+    assert "leads.count_by_lead_type: full scan of leads" in result.output
+
+
+def test_explain_queries_covers_registry(app_module, session):
+    seed_dataset(
+        session, clients=1, campaigns_per_client=1, lead_types=1, leads=10
+    )
+    with app_module.app.app_context():
+        dialect, reports = explain_queries()
+    assert dialect == "sqlite"
+    assert [report.name for report in reports] == list(QUERIES)
+
+
+def test_client_filter_uses_an_index(app_module, session):
+    seed_dataset(
+        session, clients=40, campaigns_per_client=3, lead_types=4, leads=3000
+    )
+    analyze(session)
+    with app_module.app.app_context():
+        _, reports = explain_queries(
+            ["leads.page_by_client", "leads.count_by_client"]
+        )
+    for report in reports:
+        assert "leads" not in report.scans, report.plan
+
+
+def test_compare_plans_applies_cost_threshold():
+    baseline = {"q": {"scans": ["clients"], "cost": 100.0}}
+
+    assert (
+        compare_plans([PlanReport("q", ("clients",), 140.0)], baseline, 0.5)
+        == []
+    )
+    assert compare_plans(
+        [PlanReport("q", ("clients",), 160.0)], baseline, 0.5
+    ) == ["q: cost 160.0 exceeds baseline 100.0"]
+    # Queries without a baseline are reported by the CLI but not checked
+    assert (
+        compare_plans([PlanReport("new", ("leads",), None)], baseline, 0.5)
+        == []
+    )
+
+
+def test_seed_leads_refuses_populated_and_production_databases(
+    app_module, session, monkeypatch, tmp_path
+):
+    from models.lead import Lead
+
+    runner = app_module.app.test_cli_runner()
+    baseline = str(tmp_path / "plans.json")
+    seed = [
+        "check-query-plans",
+        "--seed-leads",
+        "20",
+        "--update-baseline",
+        "--baseline",
+        baseline,
+    ]
+
+    monkeypatch.setenv("FLASK_CONFIG", "production")
+    result = runner.invoke(args=seed)
+    assert result.exit_code == 1
+    assert "production" in result.output
+    assert session.query(Lead).count() == 0
+    monkeypatch.delenv("FLASK_CONFIG")
+
+    session.add(Lead(name="Real", phone="1"))
+    session.commit()
+    result = runner.invoke(args=seed)
+    assert result.exit_code == 1
+    assert "already has leads" in result.output
+    assert session.query(Lead).count() == 1
+
+    result = runner.invoke(args=[*seed, "--force"])
+    assert result.exit_code == 0, result.output
+    assert session.query(Lead).count() == 21
@@ -0,0 +1,222 @@
+from sqlalchemy import event, insert, update
+
+from models.campaign import Campaign
+from models.campaign_lead_type import CampaignLeadType
+from models.campaign_lead_type_group import CampaignLeadTypeGroup
+from models.client import Client
+from models.lead_type import LeadType
+from models.lead_type_group import LeadTypeGroup
+
+
+def _seed(session):
+    client = Client(
+        company_name="Acme",
+        contact_name="A",
+        contact_email="a@x.com",
+        phone="1",
+    )
+    session.add(client)
+    session.flush()
+    session.add_all(
+        [
+            Campaign(id="c1", campaign_name="One", client_id=client.id),
+            Campaign(id="c2", campaign_name="Two"),
+            LeadTypeGroup(id="g1", name="Group"),
+            LeadType(id="t1", name="Sale"),
+            LeadType(id="t2", name="Callback", group_id="g1"),
+        ]
+    )
+    session.flush()
+    session.add_all(
+        [
+            CampaignLeadType(
+                campaign_id="c1", lead_type_id="t1", lead_type_name="Sale"
+            ),
+            CampaignLeadTypeGroup(campaign_id="c1", lead_type_group_id="g1"),
+        ]
+    )
+    session.commit()
+
+
+def test_reference_data_served_from_snapshot_with_etag(app_module, session):
+    _seed(session)
+    client = app_module.app.test_client()
+
+    resp = client.get("/leads/reference-data")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"].strip('"')
+    data = resp.get_json()
+    campaigns = {c["id"]: c for c in data["campaigns"]}
+    assert campaigns["c1"]["client"] == "Acme"
+    assert campaigns["c1"]["lead_types"] == ["Sale", "Callback"]
+    assert campaigns["c2"]["client"] == "None"
+    assert sorted(data["lead_types"]) == ["Callback", "Sale"]
+
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(app_module.engine, "before_cursor_execute", _count)
+    try:
+        resp = client.get(
+            "/leads/reference-data", headers={"If-None-Match": f'"{etag}"'}
+        )
+        assert resp.status_code == 304
+        resp = client.get(f"/leads/reference-data?v={etag}")
+        assert "immutable" in resp.headers["Cache-Control"]
+        client.get("/leads")
+    finally:
+        event.remove(app_module.engine, "before_cursor_execute", _count)
+    assert not any(
+        "campaign_lead_types" in s or "FROM lead_types" in s
+        for s in statements
+    )
+
+    # Bulk statements bypass the flush but still invalidate the snapshot
+    session.execute(
+        insert(LeadType).values(id="t3", name="Voicemail", group_id="g1")
+    )
+    session.commit()
+    resp = client.get(
+        "/leads/reference-data", headers={"If-None-Match": f'"{etag}"'}
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["campaigns"][0]["lead_types"][-1] == "Voicemail"
+
+    session.execute(update(Client).values(company_name="Renamed"))
+    session.commit()
+    assert (
+        client.get("/leads/reference-data").get_json()["campaigns"][0][
+            "client"
+        ]
+        == "Renamed"
+    )
+
+
+def test_snapshot_expires_for_changes_made_by_other_workers(
+    app_module, session, monkeypatch
+):
+    from sqlalchemy import text
+    from services import reference_service
+
+    _seed(session)
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    client = app_module.app.test_client()
+    assert "c3" not in {
+        c["id"]
+        for c in client.get("/leads/reference-data").get_json()["campaigns"]
+    }
+
+    # Written by another process: no session hook runs in this one
+    with app_module.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO campaigns (id, campaign_name)"
+                " VALUES ('c3', 'Three')"
+            )
+        )
+    assert "c3" not in {
+        c["id"]
+        for c in client.get("/leads/reference-data").get_json()["campaigns"]
+    }
+
+    # A campaign the snapshot does not know yet is looked up before rejecting
+    resp = client.post(
+        "/leads/bulk-update", data={"lead_ids": [], "new_campaign_id": "c3"}
+    )
+    assert resp.status_code == 302
+
+    with app_module.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO campaigns (id, campaign_name)"
+                " VALUES ('c4', 'Four')"
+            )
+        )
+    monkeypatch.setattr(reference_service, "REFERENCE_DATA_TTL", 0)
+    assert "c4" in {
+        c["id"]
+        for c in client.get("/leads/reference-data").get_json()["campaigns"]
+    }
+
+
+def test_lead_forms_look_up_values_added_by_other_workers(app_module, session):
+    import io
+
+    from sqlalchemy import text
+
+    from models.lead import Lead
+
+    _seed(session)
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    client = app_module.app.test_client()
+    client.get("/leads/reference-data")
+
+    # Written by another process: this worker's snapshot lacks them
+    with app_module.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO campaigns (id, campaign_name)"
+                " VALUES ('c3', 'Three')"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO lead_types (id, name) VALUES ('t3', 'Survey')")
+        )
+        conn.execute(
+            text(
+                "INSERT INTO campaign_effective_lead_types (campaign_id,"
+                " lead_type_id, lead_type_name, source)"
+                " VALUES ('c3', 't3', 'Survey', 'campaign')"
+            )
+        )
+
+    lead = {
+        "name": "Bob",
+        "phone": "1",
+        "email": "bob@example.com",
+        "campaign_id": "c3",
+    }
+    resp = client.post("/leads", data={**lead, "lead_type": "Survey"})
+    assert resp.status_code == 302
+    created = session.query(Lead).filter_by(name="Bob").one()
+    assert (created.campaign_id, created.lead_type) == ("c3", "Survey")
+
+    resp = client.post(
+        f"/leads/{created.id}/update",
+        data={**lead, "name": "Robert", "lead_type": "Survey"},
+    )
+    assert resp.status_code == 302
+    session.expire_all()
+    assert session.get(Lead, created.id).name == "Robert"
+
+    with app_module.engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO campaigns (id, campaign_name)"
+                " VALUES ('c4', 'Four')"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO campaign_effective_lead_types (campaign_id,"
+                " lead_type_id, lead_type_name, source)"
+                " VALUES ('c4', 't3', 'Survey', 'campaign')"
+            )
+        )
+    csv_data = "name,phone,campaign,lead_type\nAmy,2,c4,Survey\n"
+    client.post(
+        "/leads/import",
+        data={
+            "file": (io.BytesIO(csv_data.encode()), "leads.csv"),
+            "name_column": "name",
+            "phone_column": "phone",
+            "campaign_id_column": "campaign",
+            "lead_type_column": "lead_type",
+            "consent": "y",
+        },
+        content_type="multipart/form-data",
+    )
+    imported = session.query(Lead).filter_by(name="Amy").one()
+    assert (imported.campaign_id, imported.lead_type) == ("c4", "Survey")
@@ -0,0 +1,139 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from models.justcall_webhook import JustCallWebhook
+from models.justcall_webhook_payload import JustCallWebhookPayload
+from models.notification_body import NotificationBody
+from models.notification_log import NotificationLog
+from services.notification_service import (
+    flush_notification_logs,
+    record_notification,
+)
+from services.retention_service import apply_retention
+
+
+def _seed(session):
+    now = datetime.utcnow()
+    old = now - timedelta(days=200)
+    buffer = []
+    for i in range(5):
+        record_notification(
+            buffer,
+            None,
+            None,
+            "sms",
+            "sent",
+            f"old {i}",
+            body=f"old body {i % 2}",
+        )
+    record_notification(
+        buffer, None, None, "sms", "sent", "new", body="old body 0"
+    )
+    flush_notification_logs(session, buffer)
+    for log in session.query(NotificationLog).filter(
+        NotificationLog.message != "new"
+    ):
+        log.created_at = old
+    webhook = JustCallWebhook(token="tok", target_type="lead")
+    session.add(webhook)
+    session.flush()
+    session.add_all(
+        [
+            JustCallWebhookPayload(
+                token_id=webhook.id, payload={"n": 1}, created_at=old
+            ),
+            JustCallWebhookPayload(
+                token_id=webhook.id, payload={"n": 2}, created_at=now
+            ),
+        ]
+    )
+    session.commit()
+
+
+def test_retention_dry_run_reports_without_changes(
+    app_module, session, tmp_path
+):
+    _seed(session)
+
+    result = apply_retention(
+        "notification_logs", 90, str(tmp_path), dry_run=True, batch_size=2
+    )
+
+    assert result.rows == 5
+    assert result.bytes > 0
+    assert result.archive_path is None
+    assert session.query(NotificationLog).count() == 6
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_retention_archives_then_deletes_in_batches(
+    app_module, session, tmp_path
+):
+    _seed(session)
+
+    result = apply_retention(
+        "notification_logs", 90, str(tmp_path), batch_size=2
+    )
+
+    assert result.rows == result.deleted == 5
+    with gzip.open(result.archive_path, "rt") as fh:
+        archived = [json.loads(line) for line in fh]
+    assert [row["message"] for row in archived] == [
+        f"old {i}" for i in range(5)
+    ]
+    assert archived[1]["body"] == "old body 1"
+
+    session.expire_all()
+    assert [log.message for log in session.query(NotificationLog)] == ["new"]
+    # The body still referenced by the remaining log is kept
+    assert [b.size for b in session.query(NotificationBody)] == [
+        len("old body 0")
+    ]
+    assert result.extra["bodies_deleted"] == 1
+
+
+def test_archive_logs_cli(app_module, session, tmp_path, monkeypatch):
+    _seed(session)
+    monkeypatch.setitem(
+        app_module.app.config, "RETENTION_ARCHIVE_DIR", str(tmp_path)
+    )
+    runner = app_module.app.test_cli_runner()
+
+    result = runner.invoke(args=["archive-logs", "--dry-run"])
+    assert result.exit_code == 0
+    assert "notification_logs: 5 rows" in result.output
+    assert "justcall_webhook_payloads: 1 rows" in result.output
+
+    result = runner.invoke(args=["archive-logs"])
+    assert result.exit_code == 0
+    session.expire_all()
+    assert session.query(JustCallWebhookPayload).count() == 1
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 2
+
+
+def test_runs_in_the_same_second_do_not_overwrite_archives(
+    app_module, session, tmp_path
+):
+    _seed(session)
+    now = datetime.utcnow()
+    webhook = session.query(JustCallWebhook).one()
+
+    first = apply_retention(
+        "justcall_webhook_payloads", 30, str(tmp_path), now=now
+    )
+    session.add(
+        JustCallWebhookPayload(
+            token_id=webhook.id,
+            payload={"n": 3},
+            created_at=now - timedelta(days=200),
+        )
+    )
+    session.commit()
+    second = apply_retention(
+        "justcall_webhook_payloads", 30, str(tmp_path), now=now
+    )
+
+    assert first.archive_path != second.archive_path
+    with gzip.open(first.archive_path, "rt") as fh:
+        assert [json.loads(line)["payload"] for line in fh] == [{"n": 1}]
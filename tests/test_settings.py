@@ -37,7 +37,7 @@ def test_settings_ui_toggle(app_module, session, monkeypatch):
         follow_redirects=True,
     )
     monkeypatch.setattr(
-        getconnects_admin.routes.settings, "fetch_sms_numbers", lambda: []
+        getconnects_admin.routes.settings, "get_sms_numbers", lambda: []
     )
     resp = client.get("/settings/justcall")
     assert b"Delete Credentials" in resp.data
@@ -66,7 +66,9 @@ def test_can_save_default_sms_number(app_module, session, monkeypatch):
         follow_redirects=True,
     )
     monkeypatch.setattr(
-        getconnects_admin.routes.settings, "fetch_sms_numbers", lambda: ["111", "222"]
+        getconnects_admin.routes.settings,
+        "get_sms_numbers",
+        lambda: ["111", "222"],
     )
     client.post(
         "/settings/justcall",
@@ -147,3 +149,52 @@ def test_notification_template_email_defaults_in_form(app_module, session):
     resp = client.get(f"/settings/templates/{tmpl.id}")
     assert b"Subject" in resp.data
     assert b"Body copy" in resp.data
+
+
+def test_template_pages_inspect_schema_once(
+    app_module, session, monkeypatch, tmp_path
+):
+    from sqlalchemy import create_engine, text
+    from services import schema_service
+
+    inspected = []
+    original = schema_service._inspect
+    monkeypatch.setattr(
+        schema_service,
+        "_inspect",
+        lambda bind, v: inspected.append(v) or original(bind, v),
+    )
+    monkeypatch.setattr(schema_service, "_snapshots", {})
+    app_module.app.config["WTF_CSRF_ENABLED"] = False
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess["uid"] = "test"
+        sess["is_superuser"] = True
+
+    for _ in range(3):
+        assert client.get("/settings/templates").status_code == 200
+    assert len(inspected) == 1
+
+    # A database that predates the email_text migration
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        conn.execute(
+            text("CREATE TABLE notification_templates (id INTEGER, name TEXT)")
+        )
+    caps = schema_service.schema_capabilities(legacy)
+    assert caps.has_table("notification_templates")
+    assert not caps.supports("notification_template_email_text")
+
+    with legacy.begin() as conn:
+        conn.execute(
+            text(
+                "ALTER TABLE notification_templates ADD COLUMN email_text TEXT"
+            )
+        )
+    assert not schema_service.schema_capabilities(legacy).supports(
+        "notification_template_email_text"
+    )
+    schema_service.bump_schema_version()
+    assert schema_service.schema_capabilities(legacy).supports(
+        "notification_template_email_text"
+    )
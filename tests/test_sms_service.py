@@ -73,7 +73,6 @@ def test_fetch_sms_numbers(app_module, session, monkeypatch):
     assert numbers == ["+123", "+456"]
 
 
-
 def test_fetch_sms_numbers_root_list(app_module, session, monkeypatch):
     session.add(JustCallCredential(api_key="k", api_secret="s"))
     session.commit()
@@ -185,3 +184,49 @@ def test_default_number_used(app_module, session, monkeypatch):
     assert sms_service.send_sms("123", "hi")
     assert captured["json"]["justcall_number"] == "999"
 
+
+def test_get_sms_numbers_cached_with_stale_revalidation(
+    app_module, session, monkeypatch
+):
+    session.add(JustCallCredential(api_key="k", api_secret="s"))
+    session.commit()
+    sms_service.invalidate_sms_numbers()
+    inventory = [["+111"]]
+    calls = []
+
+    def fake_get(url, auth, timeout):
+        calls.append(auth)
+
+        class DummyResp:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return {"numbers": list(inventory[-1])}
+
+        return DummyResp()
+
+    monkeypatch.setattr(sms_service.requests, "get", fake_get)
+    clock = [1000.0]
+    monkeypatch.setattr(sms_service.time, "time", lambda: clock[0])
+
+    with app_module.app.app_context():
+        assert sms_service.get_sms_numbers() == ["+111"]
+        assert sms_service.get_sms_numbers() == ["+111"]
+        assert len(calls) == 1
+
+        # Past the TTL the stale list is served while a refresh runs
+        inventory.append(["+222"])
+        clock[0] += sms_service.NUMBERS_TTL + 1
+        assert sms_service.get_sms_numbers() == ["+111"]
+        assert len(calls) == 2
+        assert sms_service.get_sms_numbers() == ["+222"]
+
+        # New credentials never see the previous account's numbers
+        creds = session.query(JustCallCredential).first()
+        creds.api_key = "k2"
+        session.commit()
+        assert sms_service.get_sms_numbers() == ["+222"]
+        assert calls[-1] == ("k2", "s")
+        assert len(calls) == 3
+    sms_service.invalidate_sms_numbers()